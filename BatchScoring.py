@@ -0,0 +1,131 @@
+import numpy as np
+import Constants as co
+
+# Profile-dependent factors of calculate_optimal_arrow_weight / calculate_optimal_tip_diameter
+ARROW_WEIGHT_PROFILE_FACTORS = {'Child': 0.8, 'Adult': 1.0, 'Professional': 1.25}
+TIP_DIAMETER_PROFILE_FACTORS = {'Child': 1.3, 'Adult': 1.0, 'Professional': 0.85}
+
+
+def derived_arrow_weight(limb_stiffness, bow_thickness, profile, rounded=True):
+    """Vectorized calculate_optimal_arrow_weight heuristic (g), used for models without an arrow mesh"""
+    weight = (2.0 * (1.0 + (limb_stiffness - 0.6) * 0.6) * (1.0 + (bow_thickness - 5.0) * 0.1)
+              * ARROW_WEIGHT_PROFILE_FACTORS.get(profile, 1.0))
+    return np.round(weight, 2) if rounded else weight
+
+
+def derived_tip_diameter(limb_stiffness, bow_thickness, profile, rounded=True):
+    """Vectorized calculate_optimal_tip_diameter (mm)"""
+    diameter = (co.DEFAULT_ARROW_TIP_DIAMETER * (1.0 - (limb_stiffness - 0.6) * 0.4)
+                * (1.0 - (bow_thickness - 5.0) * 0.04) * TIP_DIAMETER_PROFILE_FACTORS.get(profile, 1.0))
+    diameter = np.clip(diameter, co.MIN_ARROW_TIP_DIAMETER, co.MAX_ARROW_TIP_DIAMETER)
+    return np.round(diameter, 2) if rounded else diameter
+
+
+def comfort_scores(bow_thickness, bow_curvature, limb_stiffness, grip_width, palm_size, profile):
+    """Vectorized compute_comfort_score (without the debug log)"""
+    grip_ratio = grip_width / (palm_size * 0.27)
+    grip_score = np.where(grip_ratio > 1.2, 0.7 if profile == 'Child' else 0.9,
+                          np.where(grip_ratio < 0.8, 0.6, 1.0))
+
+    thickness_score = np.where((bow_thickness > 6.0) & (palm_size < 75.0), 0.6,
+                               np.where((bow_thickness < 4.5) & (palm_size > 100.0), 0.8, 1.0))
+
+    if profile == 'Child':
+        stiffness_score = np.where(limb_stiffness > 0.7, 0.5, 1.0)
+    elif profile == 'Professional':
+        stiffness_score = np.where(limb_stiffness < 0.5, 0.7, 1.0)
+    else:
+        stiffness_score = np.ones_like(limb_stiffness, dtype=np.float64)
+
+    curvature_score = np.where((bow_curvature >= 0.25) & (bow_curvature <= 0.35), 1.0, 0.8)
+
+    comfort = (grip_score * 0.4 + thickness_score * 0.3 + stiffness_score * 0.2 + curvature_score * 0.1) * 100
+    return np.round(np.clip(comfort, 0, 100), 1)
+
+
+def score_designs(optimizer, bow_thickness, bow_curvature, limb_stiffness, grip_width, palm_size,
+                  profile=None, arrow_weight=None, tip_diameter=None):
+    """Vectorized simulate_performance over many designs at once.
+
+    All design arguments broadcast against each other. Arrow weight and tip diameter default
+    to the values refresh_parameters() derives from the bow parameters (the arrow weight from
+    the arrow mesh when the model has one). Physics goes through
+    the optimizer's own estimate_* methods; nothing is logged and the optimizer state is unchanged.
+    Returns a dict of arrays keyed like simulate_performance().
+    """
+    profile = profile or optimizer.current_user
+    bow_thickness, bow_curvature, limb_stiffness, grip_width, palm_size = np.broadcast_arrays(
+        *[np.asarray(value, dtype=np.float64) for value in
+          (bow_thickness, bow_curvature, limb_stiffness, grip_width, palm_size)]
+    )
+    if tip_diameter is None:
+        tip_diameter = derived_tip_diameter(limb_stiffness, bow_thickness, profile)
+    # Printed mass of the arrow with this tip, as simulate_performance uses after refresh_parameters()
+    arrow_mass = optimizer.arrow_mass(optimizer.arrow_length, tip_diameter)
+    if arrow_weight is None:
+        if optimizer.arrow_mass_terms:
+            arrow_weight = np.round(arrow_mass, 2)
+        else:
+            arrow_weight = derived_arrow_weight(limb_stiffness, bow_thickness, profile)
+
+    launch_speed = optimizer.estimate_launch_speed(bow_thickness, bow_curvature, limb_stiffness, grip_width,
+                                                   arrow_mass)
+    draw_force = optimizer.estimate_draw_force(bow_thickness, bow_curvature, limb_stiffness, grip_width)
+
+    # Flight distance at 45 degrees, adjusted for arrow weight, tip drag and grip stability
+    base_distance = launch_speed**2 / 9.81
+    grip_ratio = grip_width / (palm_size * 0.27)
+    stability_factor = np.where((grip_ratio < 0.8) | (grip_ratio > 1.2), 0.9, 1.0)
+    flight_distance = base_distance * (2.0 / arrow_weight) * (8.0 / tip_diameter) * stability_factor
+
+    grip_accuracy_factor = 1.0 - np.abs(grip_ratio - 1.0) * 0.2
+    accuracy_score = (70 + limb_stiffness * 20) * grip_accuracy_factor
+
+    comfort_score = comfort_scores(bow_thickness, bow_curvature, limb_stiffness, grip_width, palm_size, profile)
+
+    if profile == 'Child':
+        safety_threshold = 2.5
+        tip_size_factor = tip_diameter / 10.0
+    else:
+        safety_threshold = 4.0
+        tip_size_factor = tip_diameter / co.DEFAULT_ARROW_TIP_DIAMETER
+    safety_score = (100 - np.maximum(0, (launch_speed - safety_threshold) * 20)) * tip_size_factor
+
+    if profile == 'Child':
+        performance_score = accuracy_score * 0.2 + comfort_score * 0.3 + safety_score * 0.5
+    elif profile == 'Professional':
+        performance_score = (accuracy_score * 0.5 + comfort_score * 0.2 + safety_score * 0.1 +
+                             np.minimum(100, flight_distance * 10) * 0.2)
+    else:
+        performance_score = (accuracy_score * 0.3 + comfort_score * 0.3 + safety_score * 0.2 +
+                             np.minimum(100, flight_distance * 12) * 0.2)
+
+    return {
+        'launch_speed': launch_speed,
+        'draw_force': draw_force,
+        'flight_distance': flight_distance,
+        'accuracy_score': np.clip(accuracy_score, 0, 100),
+        'comfort_score': np.clip(comfort_score, 0, 100),
+        'safety_score': np.clip(safety_score, 0, 100),
+        'performance_score': np.clip(performance_score, 0, 100)
+    }
+
+
+def screen_designs(optimizer, cost, palm_size, profile=None, candidates=co.SCREEN_CANDIDATES, seed=0, extra=None):
+    """Best design by cost(scores, designs) among random candidates within the parameter bounds.
+
+    cost takes a score dict and the (N, 4) bow parameter rows and returns (N,) costs, lower
+    is better. extra are (M, 4) rows (e.g. the current design) that are always scored.
+    Every candidate is scored by score_designs(). Returns (bow parameters, scores of the best
+    design as floats, costs of all scored designs).
+    """
+    rng = np.random.default_rng(seed)
+    low, high = np.array(optimizer.parameter_bounds(), dtype=np.float64).T
+    designs = low + (high - low) * rng.random((candidates, 4))
+    if extra is not None:
+        designs = np.vstack([np.clip(np.atleast_2d(np.asarray(extra, dtype=np.float64)), low, high), designs])
+
+    scores = score_designs(optimizer, *designs.T, palm_size, profile=profile)
+    costs = cost(scores, designs)
+    best = int(np.argmin(costs))
+    return designs[best].tolist(), {name: float(values[best]) for name, values in scores.items()}, costs.tolist()
@@ -0,0 +1,161 @@
+import time
+import numpy as np
+import Constants as co
+
+# Bump when the measurement changes so that cached analyses are redone
+BEAM_ANALYSIS_VERSION = 1
+
+
+def section_segments(vertices, faces, z):
+    """Segments (S, 2, 2) in xy where the plane at height z cuts the mesh, for all faces at once"""
+    triangles = np.asarray(vertices, dtype=np.float64)[np.asarray(faces)]
+    height = triangles[:, :, 2] - z
+    ends = []
+    crossed = []
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        crosses = (height[:, a] < 0) != (height[:, b] < 0)
+        denominator = np.where(crosses, height[:, a] - height[:, b], 1.0)
+        fraction = height[:, a] / denominator
+        ends.append(triangles[:, a, :2] + fraction[:, None] * (triangles[:, b, :2] - triangles[:, a, :2]))
+        crossed.append(crosses)
+    ends = np.stack(ends, axis=1)
+    crossed = np.stack(crossed, axis=1)
+    # A face cut by the plane has exactly two crossing edges; keep their two points in edge order
+    cut = crossed.sum(axis=1) == 2
+    order = np.argsort(~crossed[cut], axis=1, kind='stable')[:, :2]
+    return np.take_along_axis(ends[cut], order[:, :, None], axis=1)
+
+
+def slice_intervals(segments, ys):
+    """Material intervals along the lines y = ys of a closed section, all lines at once.
+
+    Returns (starts, ends), each (S // 2 + 1, K) and nan-padded, of the x intervals inside the
+    section on each line (even-odd rule on the sorted crossings).
+    """
+    y0, y1 = segments[:, 0, 1][:, None], segments[:, 1, 1][:, None]
+    crosses = (y0 < ys) != (y1 < ys)
+    fraction = (ys - y0) / np.where(y1 == y0, 1.0, y1 - y0)
+    x = segments[:, 0, 0][:, None] + fraction * (segments[:, 1, 0] - segments[:, 0, 0])[:, None]
+    x = np.sort(np.where(crosses, x, np.nan), axis=0)
+    # Lines with an odd number of crossings graze a vertex; drop them
+    x[:, np.count_nonzero(crosses, axis=0) % 2 == 1] = np.nan
+    if len(x) % 2:
+        x = np.vstack([x, np.full((1, x.shape[1]), np.nan)])
+    return x[0::2], x[1::2]
+
+
+def beam_groups(thin_counts, min_count):
+    """Runs (first, last) of consecutive lines crossing at least min_count thin walls"""
+    inside = np.concatenate([[False], thin_counts >= min_count, [False]])
+    edges = np.flatnonzero(inside[1:] != inside[:-1])
+    return list(zip(edges[0::2], edges[1::2] - 1))
+
+
+def measure_beams(vertices, faces, planes=co.BEAM_SLICE_PLANES, max_width=co.BEAM_MAX_WIDTH,
+                  min_count=co.BEAM_MIN_COUNT):
+    """Count and dimensions of the flexure beams of a bow body, from its mesh.
+
+    The body is cut at its mid-height and the section is sliced by `planes` lines across the
+    bow (constant y) at once. Material intervals thinner than max_width are beam cross-sections;
+    runs of lines crossing at least min_count of them are beam groups (one per side of the grip).
+    Per group: the beam count, the beam direction (fitted to the interval centers along the
+    run), the span along y and the offset along x of the beam ends. Returns a dict with the total
+    'count', 'counts' per group, 'thickness' (perpendicular to the beams), 'width' (mesh height
+    at the beams), 'span', 'offset' and 'length' in mm, or None if no beams are found.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    z_min, z_max = vertices[:, 2].min(), vertices[:, 2].max()
+    segments = section_segments(vertices, faces, (z_min + z_max) / 2)
+    if len(segments) == 0:
+        return None
+    y_min, y_max = vertices[:, 1].min(), vertices[:, 1].max()
+    ys = np.linspace(y_min, y_max, planes + 2)[1:-1]
+    spacing = ys[1] - ys[0]
+    starts, ends = slice_intervals(segments, ys)
+    widths = ends - starts
+    thin = widths < max_width  # nan compares False
+    thin_counts = thin.sum(axis=0)
+
+    counts, thicknesses, spans, offsets, heights = [], [], [], [], []
+    for first, last in beam_groups(thin_counts, min_count):
+        lines = np.arange(first, last + 1)
+        group_counts = thin_counts[lines]
+        count = int(np.bincount(group_counts).argmax())
+        regular = lines[group_counts == count]
+        if len(regular) < 2:
+            continue
+        # Beam i's center on every regular line (thin intervals in x order)
+        centers = np.array([((starts[:, k] + ends[:, k]) / 2)[thin[:, k]] for k in regular])
+        line_ys = ys[regular]
+        # Common slope dx/dy of the beams, fitted with each beam's own mean removed
+        dy = line_ys - line_ys.mean()
+        dx = centers - centers.mean(axis=0)
+        slope = float((dy[:, None] * dx).sum() / (len(centers[0]) * (dy**2).sum()))
+
+        span = (last - first + 1) * spacing
+        region = ((vertices[:, 1] >= ys[first]) & (vertices[:, 1] <= ys[last])
+                  & (vertices[:, 0] >= centers.min()) & (vertices[:, 0] <= centers.max()))
+        counts.append(count)
+        thicknesses.append(np.median(widths[:, regular][thin[:, regular]]) / np.sqrt(1 + slope**2))
+        spans.append(span)
+        offsets.append(abs(slope) * span)
+        heights.append(np.ptp(vertices[region, 2]) if region.any() else z_max - z_min)
+
+    if not counts:
+        return None
+    weights = np.array(counts, dtype=np.float64)
+    span = float(np.average(spans, weights=weights))
+    offset = float(np.average(offsets, weights=weights))
+    return {
+        'count': int(sum(counts)),
+        'counts': counts,
+        'thickness': float(np.average(thicknesses, weights=weights)),
+        'width': float(np.average(heights, weights=weights)),
+        'span': span,
+        'offset': offset,
+        'length': float(np.hypot(span, offset))
+    }
+
+
+def force_model_geometry(beams):
+    """Beam terms of estimate_draw_force() for measured beams (the reference bow's without).
+
+    The nominal constants (DEFAULT_BEAM_THICKNESS, DEFAULT_HEIGHT_DIFFERENCE_BETWEEN_BEAM_ENDS,
+    20 beams) and the calibrated corrective factor belong to the reference bow, so a measured
+    dimension scales its constant by its ratio to the same measurement of the reference bow.
+    Thickness and span are scaled further by the bow_thickness and grip_width parameters.
+    """
+    if beams is None:
+        return {
+            'beam_count': co.REFERENCE_BEAM_COUNT,
+            'beam_thickness': co.DEFAULT_BEAM_THICKNESS,
+            'beam_width_ratio': 1.0,
+            'beam_span_ratio': 1.0,
+            'height_difference_between_beam_ends': co.DEFAULT_HEIGHT_DIFFERENCE_BETWEEN_BEAM_ENDS
+        }
+    return {
+        'beam_count': beams['count'],
+        'beam_thickness': co.DEFAULT_BEAM_THICKNESS * beams['thickness'] / co.REFERENCE_BEAM_THICKNESS,
+        'beam_width_ratio': beams['width'] / co.REFERENCE_BEAM_WIDTH,
+        'beam_span_ratio': beams['span'] / co.REFERENCE_BEAM_SPAN,
+        'height_difference_between_beam_ends':
+            co.DEFAULT_HEIGHT_DIFFERENCE_BETWEEN_BEAM_ENDS * beams['offset'] / co.REFERENCE_BEAM_OFFSET
+    }
+
+
+def cached_beam_geometry(mesh_hash, vertices, faces, result_cache=None):
+    """measure_beams() of a bow body, stored in the result cache under the mesh hash"""
+    from ResultCache import make_key
+
+    key = make_key(mesh_hash, {'beam_analysis_version': BEAM_ANALYSIS_VERSION,
+                               'planes': co.BEAM_SLICE_PLANES, 'max_width': co.BEAM_MAX_WIDTH,
+                               'min_count': co.BEAM_MIN_COUNT}, {'analysis': 'beams'})
+    if result_cache is not None:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached['beams']
+    start = time.perf_counter()
+    beams = measure_beams(vertices, faces)
+    if result_cache is not None:
+        result_cache.put(key, mesh_hash, {'analysis': 'beams'}, {'beams': beams}, time.perf_counter() - start)
+    return beams
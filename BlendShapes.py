@@ -0,0 +1,156 @@
+import itertools
+import numpy as np
+import Constants as co
+from Deformation import bow_regions, reference_y_center, deform_component
+
+# Factor vector evaluated by DeformationBasis: index 0 is the constant 1 (coordinates no factor moves)
+BASIS_FACTORS = ['one', 'thickness_factor', 'curvature_factor', 'grip_scale', 'arrow_scale', 'tip_scale']
+
+
+class DeformationBasis:
+    """Per-vertex displacement fields of the geometry edits, precomputed once per model.
+
+    Every edit of deform_bow / deform_arrow except the thickness is affine in one scale factor
+    per coordinate: coordinate = offset + field * factors[index]. All components are stacked into
+    one (N, 3) buffer, so any parameter combination is one multiply-add over the whole model
+    into preallocated memory; the thickness scaling of the grip's power region (only where z >= 0)
+    is a second, masked multiply over that region. Results equal deform_component() exactly.
+    """
+
+    def __init__(self, roles, original_vertices):
+        self.roles = list(roles)
+        self.original_vertices = original_vertices
+        counts = [len(original) for original in original_vertices]
+        self.starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        stacked = np.concatenate(original_vertices) if original_vertices else np.empty((0, 3))
+        self.offset = stacked.copy()
+        self.field = np.zeros_like(stacked)
+        self.index = np.zeros(stacked.shape, dtype=np.intp)
+        power = []
+
+        y_center = reference_y_center(self.roles, original_vertices)
+        column = {name: BASIS_FACTORS.index(name) for name in BASIS_FACTORS}
+        for role, original, start in zip(self.roles, original_vertices, self.starts):
+            rows = slice(start, start + len(original))
+            offset, field, index = self.offset[rows], self.field[rows], self.index[rows]
+            if role == 'bow':
+                regions = bow_regions(original)
+                # Grip y: y_center + (y - y_center) * grip_scale
+                grip = regions['grip']
+                offset[grip, 1] = regions['y_center']
+                field[grip, 1] = original[grip, 1] - regions['y_center']
+                index[grip, 1] = column['grip_scale']
+                # Limb z: z + curvature_factor * rel_x^2 (the overlap with the power region too)
+                limbs = np.concatenate([regions['limb_z'], regions['limb_power_z']])
+                field[limbs, 2] = regions['rel_x_squared'][limbs]
+                index[limbs, 2] = column['curvature_factor']
+                power.append(start + np.concatenate([regions['power_z'], regions['limb_power_z']]))
+            elif role == 'arrow':
+                center_y = np.mean(original[:, 1]) if y_center is None else y_center
+                x_min, x_max = np.min(original[:, 0]), np.max(original[:, 0])
+                center_x = (x_min + x_max) / 2
+                # Length: x about the arrow's x center; tip: y about the bow's y center and z about 0
+                offset[:, 0] = center_x
+                field[:, 0] = original[:, 0] - center_x
+                index[:, 0] = column['arrow_scale']
+                offset[:, 1] = center_y
+                field[:, 1] = original[:, 1] - center_y
+                offset[:, 2] = 0.0
+                field[:, 2] = original[:, 2]
+                index[:, 1:] = column['tip_scale']
+
+        # Flat indices of the z coordinates the thickness scales (where they end up >= 0)
+        self.power = (np.concatenate(power) * 3 + 2) if power else np.empty(0, dtype=np.int64)
+
+        # Preallocated output and scratch buffers, reused by every evaluate()
+        self.buffer = np.empty_like(stacked)
+        self.weights = np.empty_like(stacked)
+        self.power_z = np.empty(len(self.power))
+        self.power_mask = np.empty(len(self.power), dtype=bool)
+        self.factor_values = np.ones(len(BASIS_FACTORS))
+
+    def evaluate(self, factors, out=None):
+        """Deformed vertices of every component for the factors of deformation_factors().
+
+        Written into out (default: the basis' own buffer, overwritten by the next call) and
+        returned as one (N, 3) view per component.
+        """
+        out = self.buffer if out is None else out
+        for i, name in enumerate(BASIS_FACTORS[1:], start=1):
+            self.factor_values[i] = factors[name]
+        np.take(self.factor_values, self.index, out=self.weights)
+        np.multiply(self.field, self.weights, out=out)
+        np.add(self.offset, out, out=out)
+
+        if len(self.power):
+            flat = out.reshape(-1)
+            np.take(flat, self.power, out=self.power_z)
+            np.greater_equal(self.power_z, 0, out=self.power_mask)
+            np.multiply(self.power_z, factors['thickness_factor'], out=self.power_z, where=self.power_mask)
+            flat[self.power] = self.power_z
+        return self.component_views(out)
+
+    def evaluate_many(self, factors):
+        """Deformed stacked vertices for many factor sets at once: (K, N, 3) for factors of length-K arrays"""
+        count = len(np.atleast_1d(factors['thickness_factor']))
+        factor_values = np.ones((count, len(BASIS_FACTORS)))
+        for i, name in enumerate(BASIS_FACTORS[1:], start=1):
+            factor_values[:, i] = factors[name]
+        out = self.offset + self.field * factor_values[:, self.index]
+        if len(self.power):
+            flat = out.reshape(count, -1)
+            z = flat[:, self.power]
+            flat[:, self.power] = np.where(z >= 0, z * factor_values[:, 1:2], z)
+        return out
+
+    def reach(self, factor_bounds):
+        """Bounds of every vertex at the corners of factor_bounds ({factor: (low, high)} for the
+        factors of deformation_factors()): one (low, high) pair of (K, N, 3) arrays per component,
+        over the K corners of the factors that move that component.
+
+        Coordinates are multi-affine in the factors, so for any factors within the bounds a
+        difference of two coordinates is at least its smallest value over the corners, where the
+        bounds are the coordinates themselves. The exception is a thickness-scaled z that is
+        >= 0 at some corners and < 0 at others; its bounds are its lowest and highest value over
+        all corners (it is monotone in every factor), which keeps that statement true.
+        """
+        names = BASIS_FACTORS[1:]
+        corners = np.array(list(itertools.product(*(factor_bounds[name] for name in names)))).T
+        positions = self.evaluate_many(dict(zip(names, corners)))
+        scaled = np.zeros(self.offset.size, dtype=bool)
+        scaled[self.power] = True
+        scaled = scaled.reshape(-1, 3)
+        reaches = []
+        for start, end in zip(self.starts[:-1], self.starts[1:]):
+            used = set(np.unique(self.index[start:end]).tolist()) - {0}
+            if scaled[start:end].any():
+                used.add(BASIS_FACTORS.index('thickness_factor'))
+            # One corner per combination of the factors this component depends on
+            kept = np.ones(corners.shape[1], dtype=bool)
+            for i, name in enumerate(names, start=1):
+                if i not in used:
+                    kept &= corners[i - 1] == factor_bounds[name][0]
+            low = positions[kept, start:end].copy()
+            high = low.copy()
+            crossing = scaled[start:end] & (low.min(axis=0) < 0) & (low.max(axis=0) >= 0)
+            low[:, crossing] = low[:, crossing].min(axis=0)
+            high[:, crossing] = high[:, crossing].max(axis=0)
+            reaches.append((low, high))
+        return reaches
+
+    def component_views(self, out):
+        return [out[start:end] for start, end in zip(self.starts[:-1], self.starts[1:])]
+
+    def reference_error(self, factors):
+        """Largest difference (mm) between evaluate() and deform_component() for the given factors"""
+        y_center = reference_y_center(self.roles, self.original_vertices)
+        views = self.evaluate(factors, out=np.empty_like(self.buffer))
+        errors = [np.max(np.abs(view - deform_component(role, original, factors, y_center)), initial=0.0)
+                  for role, original, view in zip(self.roles, self.original_vertices, views)]
+        return max(errors, default=0.0)
+
+
+def draw_curvature_factor(curvature_factor, draw_fraction):
+    """Curvature factor of the limbs at a fraction (0 = at rest, 1 = full draw) of the draw"""
+    return curvature_factor + draw_fraction * co.DRAW_FLEX_CURVATURE
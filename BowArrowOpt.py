@@ -1,21 +1,98 @@
 import numpy as np
-import trimesh
-from scipy.optimize import minimize
 import os
 import time
-import random
-import math
+from concurrent.futures import ThreadPoolExecutor
 import Constants as co
+from ResultCache import ResultCache, hash_mesh, make_key
+from WarmStart import WarmStartIndex
+from Sensitivity import design_sensitivity
+from Calibration import load_constants_profile
+from Profiling import traced
+from Deformation import classify_components, geometry_graph, deformation_factors
+from BlendShapes import DeformationBasis, draw_curvature_factor
+from BeamAnalysis import cached_beam_geometry, force_model_geometry
+from LevelOfDetail import build_lod
+from MassProperties import mass_properties, scaling_terms, scaled_volume_area, printed_mass
+from MeshValidity import (MeshChecker, CANDIDATES_VERSION, load_candidates, save_candidates, merge_reports,
+                          describe_defects)
+from PrintEstimate import estimate_print, setting_value
+from DesignHistory import DesignHistory, STATE_ATTRIBUTES
+from BatchScoring import derived_tip_diameter, score_designs, screen_designs
+
+# Tip scales of the arrow surface-area table used by arrow_mass()
+ARROW_TIP_SCALES = np.linspace(*co.ARROW_TIP_SCALE_RANGE, co.ARROW_AREA_TABLE_POINTS)
 
 class BowArrowOptimizer:
-    def __init__(self, model_path):
+    def __init__(self, model_path, use_cache=True, constants_profile=None):
+        # trimesh and scipy are imported where they are needed, so importing this module
+        # (e.g. for the physics estimates) stays cheap
+        import trimesh
         self.model = trimesh.load(model_path)
         self.components = self.model.split()
         
-        if len(self.components) != 2:
-            raise ValueError("STL must contain exactly 2 components (Bow and Arrow)")
+        if len(self.components) == 0:
+            raise ValueError("STL must contain at least one component (Bow or Arrow)")
         
         self.original_model = self.model.copy()
+        self.model_hash = hash_mesh(self.original_model)
+        # Undeformed vertices of each component; every geometry update starts from these
+        self.original_vertices = [np.array(component.vertices) for component in self.components]
+        # Bow or arrow, by shape; a print plate can hold one bow and several arrows
+        self.roles = classify_components(self.original_vertices)
+        # Threads deforming independent components concurrently (created on first use)
+        self.deform_pool = None
+        # Parameters -> scale factors -> per-region vertex rewrites; only stale regions are recomputed
+        self.geometry_graph, self.geometry_sink_components = geometry_graph(
+            self.components, self.roles, self.original_vertices)
+        # Components whose vertices changed since the viewer last took them
+        self.dirty_components = set()
+        # Simplified viewer meshes, built on first use by level_of_detail()
+        self.lod_meshes = None
+        # Precomputed displacement fields for previews, built on first use by deformation_basis()
+        self.blend_basis = None
+        # Mass properties of the deformed components, recomputed only for changed components
+        self.mass_properties = [None] * len(self.components)
+        self.mass_properties_stale = set(range(len(self.components)))
+        # Arrow volume/area terms under length and tip scaling, and area tables by arrow length
+        self.arrow_mass_terms = [scaling_terms(vertices, component.faces)
+                                 for role, vertices, component in zip(self.roles, self.original_vertices, self.components)
+                                 if role == 'arrow']
+        self.arrow_area_tables = {}
+        # Printability checkers of the components, built on first use by check_mesh_validity()
+        self.mesh_checkers = None
+        self.mesh_validity = None
+        # Print time and filament estimates of the current geometry by (layer height, infill)
+        self.print_estimates = {}
+        # Output of the last get_print_settings() call made by simulate_performance()
+        self.print_settings = None
+
+        # Persistent store of solved optimizations, shared across sessions
+        self.result_cache = ResultCache() if use_cache else None
+        # Flexure beams of the (first) bow measured from the mesh, and the force-model terms they give
+        bows = [i for i, role in enumerate(self.roles) if role == 'bow']
+        self.beam_geometry = None
+        if bows:
+            bow = self.components[bows[0]]
+            self.beam_geometry = cached_beam_geometry(hash_mesh(bow), self.original_vertices[bows[0]], bow.faces,
+                                                      self.result_cache)
+            if self.beam_geometry is None:
+                print("No flexure beams found in the bow; using the reference beam constants")
+        self.beam_model = force_model_geometry(self.beam_geometry)
+        # Previously solved targets, used to warm-start nearby solves within a session
+        self.warm_start_index = WarmStartIndex()
+
+        # Calibrated force-model constants: latest profile written by calibrate.py (None),
+        # a specific profile path, or the hand-tuned defaults (False)
+        self.youngs_modulus = co.DEFAULT_YOUNGS_MODULUS
+        self.empirical_corrective_factor = co.DEFAULT_EMPIRICAL_CORRECTIVE_FACTOR
+        self.constants_profile_version = None
+        if constants_profile is not False:
+            profile = load_constants_profile(constants_profile)
+            if profile is not None:
+                self.youngs_modulus = profile['youngs_modulus']
+                self.empirical_corrective_factor = profile['empirical_corrective_factor']
+                self.constants_profile_version = profile['version']
+                print(f"Loaded constants profile v{profile['version']} from {profile['path']}")
         
         # Default parameters of Bow
         self.bow_thickness = co.DEFAULT_BOW_THICKNESS       # mm
@@ -81,6 +158,150 @@ class BowArrowOptimizer:
         self.palm_size = co.DEFAULT_PALM_SIZE # mm (default adult palm size)
         self.preferred_speed = 'Medium' # Low, Medium, High
 
+        # Undo/redo over parameter records; a restored step's geometry is rebuilt on first use
+        self.history = DesignHistory()
+        self.history.record(self.design_state(), 'Initial design')
+        self.geometry_pending = False
+
+    def component_roles(self):
+        """Role ('bow' or 'arrow') of each component, classified by shape when the model was loaded"""
+        return list(self.roles)
+
+    def level_of_detail(self):
+        """Vertex-clustered LOD mesh of every component (see LevelOfDetail.py), built once.
+
+        LOD vertices are original vertices, so the deformed LOD of a component is
+        lod.vertices(component.vertices); exports always use the full-resolution components.
+        """
+        if self.lod_meshes is None:
+            self.lod_meshes = [build_lod(vertices, component.faces)
+                               for vertices, component in zip(self.original_vertices, self.components)]
+        return self.lod_meshes
+
+    def deformation_basis(self):
+        """Blend-shape basis of the geometry edits (see BlendShapes.py), built once"""
+        if self.blend_basis is None:
+            self.blend_basis = DeformationBasis(self.roles, self.original_vertices)
+        return self.blend_basis
+
+    def factor_bounds(self):
+        """Lowest and highest value of every deformation factor over the parameter bounds"""
+        low = deformation_factors(co.MIN_BOW_THICKNESS, co.MIN_BOW_CURVATURE, co.MIN_GRIP_WIDTH,
+                                  co.MIN_ARROW_LENGTH, co.MIN_ARROW_TIP_DIAMETER)
+        high = deformation_factors(co.MAX_BOW_THICKNESS, co.MAX_BOW_CURVATURE, co.MAX_GRIP_WIDTH,
+                                   co.MAX_ARROW_LENGTH, co.MAX_ARROW_TIP_DIAMETER)
+        return {name: (low[name], high[name]) for name in low}
+
+    def vertex_reach(self):
+        """Bounds of every vertex at the corners of the parameter bounds, one (low, high) pair of
+        (K, N, 3) arrays per component (see DeformationBasis.reach())"""
+        return self.deformation_basis().reach(self.factor_bounds())
+
+    def preview_vertices(self, bow_thickness=None, bow_curvature=None, grip_width=None, draw_fraction=0.0):
+        """Deformed vertices of every component for trial parameters (default: current), e.g. while scrubbing.
+
+        The model and its parameters are left untouched; the result is identical to what
+        apply_geometry_update() would produce (at draw_fraction 0). draw_fraction bends the limbs
+        as at that fraction of the draw. Returns views into a buffer reused by the next call.
+        """
+        factors = deformation_factors(
+            self.bow_thickness if bow_thickness is None else bow_thickness,
+            self.bow_curvature if bow_curvature is None else bow_curvature,
+            self.grip_width if grip_width is None else grip_width,
+            self.arrow_length, self.tip_diameter
+        )
+        factors['curvature_factor'] = draw_curvature_factor(factors['curvature_factor'], draw_fraction)
+        return self.deformation_basis().evaluate(factors)
+
+    def component_mass_properties(self):
+        """Volume, area, center of mass, inertia and printed mass (g) of every deformed component.
+
+        Cached per deformation state: only components changed by apply_geometry_update() since
+        the last call are integrated again.
+        """
+        self.ensure_geometry()
+        for i in sorted(self.mass_properties_stale):
+            component = self.components[i]
+            properties = mass_properties(component.vertices, component.faces)
+            properties['mass'] = printed_mass(properties['volume'], properties['area'])
+            self.mass_properties[i] = properties
+        self.mass_properties_stale.clear()
+        return self.mass_properties
+
+    def arrow_mass(self, arrow_length=None, tip_diameter=None):
+        """Printed mass (g) of one arrow at the given length and tip diameter (default: current).
+
+        The volume is exact for the arrow apply_geometry_update() produces; the surface area
+        (for the solid walls) is interpolated in a table over tip scales that is built once per
+        arrow length (see scaled_volume_area). Averaged over the arrows of the model;
+        tip_diameter may be an array. Models without an arrow use DEFAULT_ARROW_WEIGHT.
+        """
+        arrow_length = self.arrow_length if arrow_length is None else arrow_length
+        tip_diameter = self.tip_diameter if tip_diameter is None else tip_diameter
+        if not self.arrow_mass_terms:
+            return co.DEFAULT_ARROW_WEIGHT if np.ndim(tip_diameter) == 0 else np.full(np.shape(tip_diameter), co.DEFAULT_ARROW_WEIGHT)
+        axial_scale = arrow_length / co.DEFAULT_ARROW_LENGTH
+        tip_scale = np.asarray(tip_diameter, dtype=np.float64) / co.DEFAULT_ARROW_TIP_DIAMETER
+
+        key = round(float(arrow_length), co.RESULT_CACHE_DECIMALS)
+        if key not in self.arrow_area_tables:
+            self.arrow_area_tables[key] = [scaled_volume_area(terms, axial_scale, ARROW_TIP_SCALES)[1]
+                                           for terms in self.arrow_mass_terms]
+        masses = [printed_mass(terms['volume'] * axial_scale * tip_scale**2,
+                               np.interp(tip_scale, ARROW_TIP_SCALES, areas))
+                  for terms, areas in zip(self.arrow_mass_terms, self.arrow_area_tables[key])]
+        mass = np.mean(masses, axis=0)
+        return float(mass) if np.ndim(mass) == 0 else mass
+
+    def design_arrow_mass(self, bow_thickness, limb_stiffness, profile=None):
+        """Printed mass (g) of the arrow a design gets: tip diameter derived from its thickness and stiffness.
+
+        Not rounded like calculate_optimal_tip_diameter, so the solvers see a smooth model.
+        """
+        tip_diameter = derived_tip_diameter(limb_stiffness, bow_thickness, profile or self.current_user, rounded=False)
+        return self.arrow_mass(self.arrow_length, tip_diameter)
+
+    def take_dirty_components(self):
+        """Indices of the components changed since the last call (e.g. to re-upload only their GPU buffers)"""
+        self.ensure_geometry()
+        dirty = sorted(self.dirty_components)
+        self.dirty_components.clear()
+        return dirty
+
+    def design_state(self):
+        """Current parameters and profile context (the STATE_ATTRIBUTES values)"""
+        return {name: getattr(self, name) for name in STATE_ATTRIBUTES}
+
+    def record_design(self, label):
+        """Add the current design to the undo history as a step named label"""
+        return self.history.record(self.design_state(), label)
+
+    def restore_design(self, state):
+        """Set the parameters of a design_state(); the geometry follows on first use (ensure_geometry())"""
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.geometry_pending = True
+
+    def undo(self):
+        """Go back one history step; returns the step (label, state) or None. Only parameters are set."""
+        step = self.history.undo()
+        if step is not None:
+            self.restore_design(step['state'])
+        return step
+
+    def redo(self):
+        """Go forward one history step; returns the step (label, state) or None. Only parameters are set."""
+        step = self.history.redo()
+        if step is not None:
+            self.restore_design(step['state'])
+        return step
+
+    def ensure_geometry(self):
+        """Deform the mesh to the current parameters if a restored design has not been built yet"""
+        if self.geometry_pending:
+            self.apply_geometry_update()
+
+    @traced()
     def set_user_profile(self, profile_name, palm_size=None, preferred_speed=None):
         """Set user profile and adjust parameters accordingly"""
         if profile_name in self.user_profiles:
@@ -111,6 +332,7 @@ class BowArrowOptimizer:
             return True
         return False
 
+    @traced()
     def adjust_for_palm_size(self):
         """Adjust parameters based on user's palm size"""
         profile = self.user_profiles[self.current_user]
@@ -131,6 +353,7 @@ class BowArrowOptimizer:
         print(f"Adjusted for palm size {self.palm_size:.1f}mm: Grip width = {self.grip_width:.1f}mm")
         
     # To calculate comfort score
+    @traced()
     def compute_comfort_score(self):
         """Compute comfort score based on ergonomic heuristics and log debug data"""
         os.makedirs("logs", exist_ok=True)
@@ -196,6 +419,7 @@ class BowArrowOptimizer:
 
         return comfort_score
 
+    @traced()
     def adjust_for_speed(self):
         """Adjust parameters based on preferred shooting speed"""
         profile = self.user_profiles[self.current_user]
@@ -212,11 +436,16 @@ class BowArrowOptimizer:
 
         # TODO: Adjust parameters based on speed preference 
         self.limb_stiffness = profile['limb_stiffness'] * speed_factor
-        self.arrow_weight = profile['arrow_weight'] * (1 / speed_factor)
         self.tip_diameter = profile['tip_diameter'] * safety_factor
+        # With an arrow mesh the weight is the printed mass of the arrow at that tip, as in refresh_parameters
+        if self.arrow_mass_terms:
+            self.arrow_weight = round(self.arrow_mass(), 2)
+        else:
+            self.arrow_weight = profile['arrow_weight'] * (1 / speed_factor)
         
         print(f"Adjusted for {self.preferred_speed} speed preference")
 
+    @traced()
     def refresh_parameters(self, bow_thickness, bow_curvature, limb_stiffness, 
                           grip_width, arrow_length, arrow_weight, tip_diameter):
         """Update all parameters"""
@@ -242,96 +471,99 @@ class BowArrowOptimizer:
               f'Stiffness={self.limb_stiffness:.2f}, Grip Width={self.grip_width:.1f},'
               f'Arrow Length={self.arrow_length:.1f}, Arrow Weight={self.arrow_weight:.1f}, Tip Diameter={self.tip_diameter:.1f}')
 
+    @traced()
     def apply_geometry_update(self):
-        """Apply parameter changes to the 3D model geometry"""
-        # Reset model to original state before applying modifications
-        for i, component in enumerate(self.components):
-            if i < len(self.original_model.split()):
-                original_component = self.original_model.split()[i]
-                component.vertices = np.array(original_component.vertices)
-        
-        # Calculate scaling and adjustment factors
-        thickness_factor = self.bow_thickness / co.DEFAULT_BOW_THICKNESS
-        curvature_factor = self.bow_curvature / co.DEFAULT_BOW_CURVATURE
-        grip_scale = self.grip_width / co.DEFAULT_GRIP_WIDTH
-        
-        # Identify bow components (first component is bow body and second is arrow)
-        bow_body_index = 0
-        
-        # Process each component
-        for i, component in enumerate(self.components):
-            vertices = np.array(component.vertices)
-            
-            if i == bow_body_index:
-                # Bow body modifications
-                # 1. Calculate bow position - assume x-center is bow midpoint
-                x_min, x_max = np.min(vertices[:, 0]), np.max(vertices[:, 0])
-                bow_center_x = (x_min + x_max) / 2
-                
-                # 2. Apply curvature to bow limbs (assume limbs are on +/- x ends)
-                # Stronger curvature at limb ends, using a quadratic function
-                for v_idx, vertex in enumerate(vertices):
-                    rel_x = (vertex[0] - bow_center_x) / ((x_max - x_min) / 2)
-                    
-                    # Apply curvature only to limb portions (not grip)
-                    if abs(rel_x) > 0.3:  # Outside grip region
-                        # Quadratic curvature function
-                        curvature_z = curvature_factor * rel_x**2
-                        vertices[v_idx, 2] += curvature_z
-                
-                # 3. Apply grip width adjustment (scale central portion in y-direction)
-                y_center = np.mean(vertices[:, 1])
-                for v_idx, vertex in enumerate(vertices):
-                    rel_x = (vertex[0] - bow_center_x) / ((x_max - x_min) / 2)
-                    
-                    # Only adjust grip width in central region
-                    if abs(rel_x) < 0.3:  # Grip region
-                        y_offset = (vertex[1] - y_center)
-                        vertices[v_idx, 1] = y_center + y_offset * grip_scale
-                
-                # 4. Apply thickness scaling (only for grip region and in z-direction)
-                for v_idx, vertex in enumerate(vertices):
-                    rel_x = (vertex[0] - bow_center_x) / ((x_max - x_min) / 2)
-                    
-                    # Only adjust thickness in the grip's power region
-                    if rel_x < 0.2 and rel_x > -0.5:  # Grip's power region
-                        if vertices[v_idx, 2] >= 0:  # Modify thickness only one side for more convinience 3D print
-                            vertices[v_idx, 2] *= thickness_factor   # Adjust only the z-direction
-                
-            else:
-                # Arrow component modifications if present
-                # Assuming second component is the arrow
-                if i == 1:
-                    # Scale arrow length
-                    arrow_scale = self.arrow_length / co.DEFAULT_ARROW_LENGTH
-                    # Find arrow axis (assume primarily along x-axis)
-                    x_min, x_max = np.min(vertices[:, 0]), np.max(vertices[:, 0])
-                    arrow_center_x = (x_min + x_max) / 2
-                    
-                    print(f"[Geometry Update] Arrow scaled to {self.arrow_length:.2f} mm (scale factor: {arrow_scale:.2f})")
-                    
-                    # Scale from center point
-                    for v_idx, vertex in enumerate(vertices):
-                        rel_x = vertex[0] - arrow_center_x
-                        vertices[v_idx, 0] = arrow_center_x + rel_x * arrow_scale
-                        
-                    # Adjust tip diameter if this is arrow tip component
-                    # (simplified approach - just apply uniform scaling to tip)
-                    tip_scale = self.tip_diameter / co.DEFAULT_ARROW_TIP_DIAMETER
-                    for v_idx, vertex in enumerate(vertices):
-                        # Only scale y and z dimensions for tip
-                        vertices[v_idx, 1] = (vertex[1] - y_center) * tip_scale + y_center
-                        vertices[v_idx, 2] *= tip_scale
-            
-            # Update component with modified vertices
-            component.vertices = vertices
+        """Apply parameter changes to the 3D model geometry.
+
+        The parameters feed a recompute graph (see geometry_graph() in Deformation.py): only the
+        vertex regions whose scale factors changed since the last update are rewritten from the
+        cached original vertices, so repeated updates never accumulate. A grip width change
+        rewrites only the grip's y coordinates; an arrow change leaves the bow untouched.
+        Changed components are collected for take_dirty_components().
+        """
+        self.geometry_pending = False
+        self.geometry_graph.set_inputs(
+            bow_thickness=self.bow_thickness,
+            bow_curvature=self.bow_curvature,
+            grip_width=self.grip_width,
+            arrow_length=self.arrow_length,
+            tip_diameter=self.tip_diameter
+        )
+        if 'arrow' in self.roles:
+            print(f"[Geometry Update] Arrow scaled to {self.arrow_length:.2f} mm "
+                  f"(scale factor: {self.arrow_length / co.DEFAULT_ARROW_LENGTH:.2f})")
+
+        # Independent regions are rewritten concurrently (numpy releases the GIL)
+        if len(self.components) > 1 and self.deform_pool is None:
+            self.deform_pool = ThreadPoolExecutor(max_workers=co.DEFORM_WORKERS)
+        updated = self.geometry_graph.evaluate(self.deform_pool)
+        changed = {self.geometry_sink_components[name] for name in updated}
+        self.dirty_components.update(changed)
+        self.mass_properties_stale.update(changed)
+        if changed:
+            self.print_estimates.clear()
         
         print('Geometry updated with current parameters')
+        if changed:
+            report = self.check_mesh_validity()
+            if not report['valid']:
+                print(f"[Mesh Check] Deformed mesh is not printable: {describe_defects(report)}")
         
         # Call UI update if callback is registered
         if hasattr(self, 'ui_update_callback'):
             self.ui_update_callback()
 
+    def build_mesh_checkers(self):
+        """One MeshChecker per component, with its baseline (the original mesh) checked.
+
+        The checkers' candidate face pairs depend only on the mesh and the parameter bounds, so
+        they are kept in MESH_CHECK_CACHE_DIR when the cache is on.
+        """
+        path = None
+        if self.result_cache is not None:
+            key = make_key(self.model_hash, {'candidates_version': CANDIDATES_VERSION,
+                                             'min_wall': co.MESH_MIN_WALL_THICKNESS,
+                                             'factor_bounds': self.factor_bounds()}, {'analysis': 'mesh_check'})
+            path = os.path.join(co.MESH_CHECK_CACHE_DIR, key + '.npz')
+        cached = load_candidates(path, len(self.components)) if path else None
+        checkers = [MeshChecker(vertices, component.faces, reach, candidates)
+                    for vertices, component, reach, candidates in
+                    zip(self.original_vertices, self.components, self.vertex_reach(),
+                        cached or [None] * len(self.components))]
+        for checker, vertices in zip(checkers, self.original_vertices):
+            checker.check(vertices)
+        if path and cached is None:
+            save_candidates(path, checkers)
+        return checkers
+
+    @traced()
+    def check_mesh_validity(self):
+        """Self-intersection, inverted-face and wall-thickness check of the deformed components.
+
+        Only faces moved since the previous check are tested again (see MeshValidity.MeshChecker).
+        Returns the merged report, also kept as self.mesh_validity.
+        """
+        self.ensure_geometry()
+        if self.mesh_checkers is None:
+            self.mesh_checkers = self.build_mesh_checkers()
+        self.mesh_validity = merge_reports([checker.check(component.vertices)
+                                            for checker, component in zip(self.mesh_checkers, self.components)])
+        return self.mesh_validity
+
+    @traced()
+    def print_estimate(self, layer_height=co.PRINT_LAYER_HEIGHT, infill=co.PRINT_INFILL):
+        """Filament length, mass and print time of the deformed components, sliced as one plate.
+
+        See PrintEstimate.estimate_print(); kept until the next geometry update changes a component.
+        """
+        self.ensure_geometry()
+        key = (round(float(layer_height), co.RESULT_CACHE_DECIMALS), round(float(infill), co.RESULT_CACHE_DECIMALS))
+        if key not in self.print_estimates:
+            self.print_estimates[key] = estimate_print([component.vertices for component in self.components],
+                                                       [component.faces for component in self.components],
+                                                       layer_height, infill)
+        return self.print_estimates[key]
+
     def objective(self, x, user_profile):
         """Objective function for optimization"""
         bow_thickness, bow_curvature, limb_stiffness, grip_width = x
@@ -396,17 +628,20 @@ class BowArrowOptimizer:
         
         return cost
 
-    def estimate_launch_speed(self, bow_thickness, bow_curvature, limb_stiffness, grip_width):
+    def estimate_launch_speed(self, bow_thickness, bow_curvature, limb_stiffness, grip_width, arrow_mass=None):
         """Estimate arrow launch speed based on bow parameters.
         
         Energy is transferred to the arrow in the form of work (force * distance) over a distance of 1 mm. 
         Then, by the work-energy theorem, the launch speed of the arrow (in m/s) is given by sqrt(v^2 + 2W/M), where:
         v: velocity before work is applied (m/s)
         W: work (Joules)
-        M: mass of arrow (kg)
+        M: mass of arrow (kg); the printed mass of the arrow this design gets (see design_arrow_mass()),
+           unless arrow_mass (g) is given
 
         Since the arrow is at rest before work is applied, v = 0 and the equation simplifies to sqrt(2W/M).
 
+        Parameters may be scalars or numpy arrays (evaluated element-wise).
+
         Curious to see the resultant estimated distance? See https://www.omnicalculator.com/physics/projectile-motion
 
         Equation source: https://study.com/skill/learn/how-to-use-the-work-energy-theorem-to-calculate-the-final-velocity-of-an-object-explanation.html
@@ -414,8 +649,10 @@ class BowArrowOptimizer:
         distance_arrow_is_pushed = co.DEFAULT_DISTANCE_ARROW_PUSHED / 1000  # in m
         force = self.estimate_draw_force(bow_thickness, bow_curvature, limb_stiffness, grip_width)  # in N
         work = force * distance_arrow_is_pushed  # in J
-        mass_of_arrow = co.DEFAULT_ARROW_WEIGHT / 1000  # in kg
-        estimated_speed = math.sqrt(2 * work / mass_of_arrow)  # in m/s
+        if arrow_mass is None:
+            arrow_mass = self.design_arrow_mass(bow_thickness, limb_stiffness)
+        mass_of_arrow = arrow_mass / 1000  # in kg
+        estimated_speed = np.sqrt(2 * work / mass_of_arrow)  # in m/s
         
         return estimated_speed
 
@@ -428,36 +665,138 @@ class BowArrowOptimizer:
         I: area moment of inertia, which for a rectangular beam with a cross section of dimensions b * h, is given by b(h^3)/12 (mm^4)
         L: length of the beam (mm)
 
-        For 2 * 10 = 20 beams, the total force is given by 60DEI/(L^3).
+        For N beams (2 * 10 = 20 on the reference bow), the total force is given by 3NDEI/(L^3).
+        N, the beam thickness h, the beam width b (scaled by bow_thickness) and the beam length
+        (from grip_width and the offset of the beam ends) come from the beams measured in the
+        mesh (see beam_model and BeamAnalysis.py).
+
+        Parameters may be scalars or numpy arrays (evaluated element-wise).
         """
         deflection = co.DEFAULT_DEFLECTION
-        youngs_modulus = co.DEFAULT_YOUNGS_MODULUS  # E for PLA at infill density of 100% and layer height of 0.20 mm
-        beam_thickness = co.DEFAULT_BEAM_THICKNESS
-        moment_of_inertia = bow_thickness * (beam_thickness ** 3) / 12
+        youngs_modulus = self.youngs_modulus  # E for PLA at infill density of 100% and layer height of 0.20 mm (or calibrated)
+        beam_thickness = self.beam_model['beam_thickness']
+        beam_width = bow_thickness * self.beam_model['beam_width_ratio']
+        moment_of_inertia = beam_width * (beam_thickness ** 3) / 12
 
-        height_difference_between_beam_ends = co.DEFAULT_HEIGHT_DIFFERENCE_BETWEEN_BEAM_ENDS  # in mm
-        beam_length = math.sqrt((grip_width ** 2) + (height_difference_between_beam_ends ** 2))
+        height_difference_between_beam_ends = self.beam_model['height_difference_between_beam_ends']  # in mm
+        beam_span = grip_width * self.beam_model['beam_span_ratio']
+        beam_length = np.sqrt((beam_span ** 2) + (height_difference_between_beam_ends ** 2))
 
-        estimated_force = 60 * deflection * youngs_modulus * moment_of_inertia / (beam_length ** 3)
+        estimated_force = (3 * self.beam_model['beam_count'] * deflection * youngs_modulus * moment_of_inertia
+                           / (beam_length ** 3))
 
-        empirical_corrective_factor = co.DEFAULT_EMPIRICAL_CORRECTIVE_FACTOR  # we are doing more deformation than the original equation expects
+        empirical_corrective_factor = self.empirical_corrective_factor  # we are doing more deformation than the original equation expects
 
         estimated_force = estimated_force * empirical_corrective_factor
         
         return estimated_force
 
-    # UPDATE: Added a method to optimize for launch speed and draw force
-    def optimize_for_performance(self, target_speed, target_force, lock_speed=False, lock_force=False):
-        """Optimize parameters to achieve target performance metrics"""
-        print(f"Optimizing for - Speed: {target_speed} m/s (locked: {lock_speed}), Force: {target_force} N (locked: {lock_force})")
-        
-        # Define optimization objective function for performance targets
-        def objective_performance(x):
+    def physics_constants(self):
+        """Constants the physics model depends on (part of every optimization cache key)"""
+        return {
+            'deflection': co.DEFAULT_DEFLECTION,
+            'youngs_modulus': self.youngs_modulus,
+            **self.beam_model,
+            'empirical_corrective_factor': self.empirical_corrective_factor,
+            'arrow_weight': None if self.arrow_mass_terms else co.DEFAULT_ARROW_WEIGHT,
+            'arrow_length': self.arrow_length,
+            'print_mass_model': [co.PRINT_MATERIAL_DENSITY, co.PRINT_INFILL, co.PRINT_WALL_THICKNESS],
+            'distance_arrow_pushed': co.DEFAULT_DISTANCE_ARROW_PUSHED,
+            'bounds': self.parameter_bounds()
+        }
+
+    def parameter_bounds(self):
+        """Bounds of the bow parameters (thickness, curvature, stiffness, grip width)"""
+        return [
+            (co.MIN_BOW_THICKNESS, co.MAX_BOW_THICKNESS),     # bow_thickness
+            (co.MIN_BOW_CURVATURE, co.MAX_BOW_CURVATURE),     # bow_curvature
+            (co.MIN_LIMB_STIFFNESS, co.MAX_LIMB_STIFFNESS),     # limb_stiffness
+            (co.MIN_GRIP_WIDTH, co.MAX_GRIP_WIDTH)    # grip_width
+        ]
+
+    def optimization_inputs(self, target_speed, target_force, lock_speed, lock_force,
+                            mode='penalty', constraint_kind='eq'):
+        """Everything besides the mesh and constants that determines an optimization result"""
+        return {
+            'profile': self.current_user,
+            'palm_size': self.palm_size,
+            'preferred_speed': self.preferred_speed,
+            'target_speed': target_speed,
+            'target_force': target_force,
+            'lock_speed': lock_speed,
+            'lock_force': lock_force,
+            'mode': mode,
+            'constraint_kind': constraint_kind
+        }
+
+    @traced()
+    def optimize_score(self):
+        """Apply the design with the highest performance score for the current profile and palm size.
+
+        SCREEN_CANDIDATES random designs and the current bow parameters are scored with
+        score_designs (see BatchScoring.screen_designs). The best is applied only if it beats the
+        current design with its current arrow. Returns whether it was applied, its parameters and
+        scores, the previous score and the costs (negated scores) of the scored designs.
+        """
+        start_time = time.perf_counter()
+        current = [self.bow_thickness, self.bow_curvature, self.limb_stiffness, self.grip_width]
+        design, scores, costs = screen_designs(self, lambda scores, designs: -scores['performance_score'],
+                                               self.palm_size, self.current_user, extra=current)
+        previous_score = float(score_designs(self, *current, self.palm_size, arrow_weight=self.arrow_weight,
+                                             tip_diameter=self.tip_diameter)['performance_score'])
+        applied = scores['performance_score'] > previous_score
+        if applied:
+            bow_thickness, bow_curvature, limb_stiffness, grip_width = design
+            self.refresh_parameters(bow_thickness, bow_curvature, limb_stiffness, grip_width, co.DEFAULT_ARROW_LENGTH,
+                                    self.calculate_optimal_arrow_weight(limb_stiffness, grip_width),
+                                    self.calculate_optimal_tip_diameter(limb_stiffness, grip_width))
+            self.apply_geometry_update()
+            print(f"Performance score {previous_score:.1f} -> {scores['performance_score']:.1f} "
+                  f"(best of {len(costs)} scored designs)")
+        else:
+            print(f"No screened design beats the current performance score of {previous_score:.1f}")
+        return {
+            'applied': applied,
+            'parameters': dict(zip(['bow_thickness', 'bow_curvature', 'limb_stiffness', 'grip_width'], design)),
+            'scores': scores,
+            'previous_score': previous_score,
+            'costs': costs,
+            'seconds': time.perf_counter() - start_time
+        }
+
+    @traced()
+    def solve_performance(self, target_speed, target_force, lock_speed=False, lock_force=False,
+                          initial_guess=None, mode='penalty', constraint_kind='eq'):
+        """Solve for bow parameters that hit the performance targets, without touching the model.
+
+        mode='penalty' multiplies the squared error of locked targets by 100 (L-BFGS-B).
+        mode='constrained' turns locked targets into real constraints (SLSQP): 'eq' holds them
+        exactly, 'ineq' treats them as upper limits. Unlocked targets stay in the objective.
+        Returns a dict with the solution, status ('solved' or 'infeasible'), iterations,
+        function evaluations and solve time.
+        """
+        from scipy.optimize import minimize
+
+        if mode not in ('penalty', 'constrained'):
+            raise ValueError(f"Unknown optimization mode: {mode}")
+        if constraint_kind not in ('eq', 'ineq'):
+            raise ValueError(f"Unknown constraint kind: {constraint_kind}")
+
+        def performance(x):
             bow_thickness, bow_curvature, limb_stiffness, grip_width = x
-            
-            # Calculate expected performance with these parameters
             launch_speed = self.estimate_launch_speed(bow_thickness, bow_curvature, limb_stiffness, grip_width)
             draw_force = self.estimate_draw_force(bow_thickness, bow_curvature, limb_stiffness, grip_width)
+            return launch_speed, draw_force
+
+        def grip_comfort_penalty(grip_width):
+            # Higher penalty for uncomfortable configurations
+            palm_factor = self.palm_size / co.DEFAULT_PALM_SIZE
+            grip_width_ideal = co.DEFAULT_GRIP_WIDTH * palm_factor
+            return 2.0 * ((grip_width - grip_width_ideal) / grip_width_ideal)**2
+
+        # Define optimization objective function for performance targets
+        def objective_performance(x):
+            launch_speed, draw_force = performance(x)
             
             # Calculate error from targets
             speed_error = 0
@@ -480,68 +819,185 @@ class BowArrowOptimizer:
             # Add penalties for unrealistic or unsafe values
             safety_penalty = 0
             
-            # Calculate comfort based on physical parameters
-            # Higher penalty for uncomfortable configurations
-            palm_factor = self.palm_size / co.DEFAULT_PALM_SIZE
-            grip_width_ideal = co.DEFAULT_GRIP_WIDTH * palm_factor
-            grip_comfort_penalty = 2.0 * ((grip_width - grip_width_ideal) / grip_width_ideal)**2
-            
             # Total cost
-            total_cost = speed_error + force_error + safety_penalty + grip_comfort_penalty
+            total_cost = speed_error + force_error + safety_penalty + grip_comfort_penalty(x[3])
             
             return total_cost
+
+        # Locked targets become constraints, so only unlocked targets remain in the objective
+        def objective_constrained(x):
+            launch_speed, draw_force = performance(x)
+            cost = grip_comfort_penalty(x[3])
+            if not lock_speed:
+                cost += (launch_speed - target_speed)**2
+            if not lock_force:
+                cost += (draw_force - target_force)**2
+            return cost
+
+        # Constraints are scaled by their target so speed and force residuals are comparable
+        constraints = []
+        if lock_speed:
+            constraints.append({'type': constraint_kind,
+                                'fun': lambda x: (target_speed - performance(x)[0]) / target_speed})
+        if lock_force:
+            constraints.append({'type': constraint_kind,
+                                'fun': lambda x: (target_force - performance(x)[1]) / target_force})
+
+        if initial_guess is None:
+            # Start from current values
+            initial_guess = [
+                self.bow_thickness,
+                self.bow_curvature,
+                self.limb_stiffness,
+                self.grip_width
+            ]
+        bounds = self.parameter_bounds()
+        # Both solvers require the starting point to respect the bounds
+        initial_guess = np.clip(initial_guess, [low for low, _ in bounds], [high for _, high in bounds])
+
+        start_time = time.perf_counter()
+        if mode == 'constrained' and constraints:
+            result = minimize(objective_constrained, initial_guess, method='SLSQP', bounds=bounds,
+                              constraints=constraints, options={'maxiter': 200, 'ftol': 1e-10})
+        else:
+            result = minimize(objective_performance, initial_guess, method='L-BFGS-B', bounds=bounds)
+        solve_seconds = time.perf_counter() - start_time
+
+        solution = [float(value) for value in np.clip(result.x, [low for low, _ in bounds], [high for _, high in bounds])]
+        launch_speed, draw_force = performance(solution)
+
+        # A lock that cannot be met inside the bounds leaves a residual the solver cannot remove
+        violation = 0.0
+        for constraint in constraints:
+            residual = constraint['fun'](solution)
+            violation = max(violation, abs(residual) if constraint_kind == 'eq' else max(0.0, -residual))
+        infeasible = mode == 'constrained' and violation > co.CONSTRAINT_TOLERANCE
+
+        return {
+            'solution': solution,
+            'status': 'infeasible' if infeasible else 'solved',
+            'launch_speed': float(launch_speed),
+            'draw_force': float(draw_force),
+            'constraint_violation': violation,
+            'iterations': int(result.nit),
+            'function_evaluations': int(result.nfev),
+            'solve_seconds': solve_seconds
+        }
+
+    # UPDATE: Added a method to optimize for launch speed and draw force
+    @traced()
+    def optimize_for_performance(self, target_speed, target_force, lock_speed=False, lock_force=False,
+                                 mode='penalty', constraint_kind='eq'):
+        """Optimize parameters to achieve target performance metrics.
+
+        Results are stored in the persistent result cache keyed by the mesh hash, the physics
+        constants and the optimizer inputs, so repeating an optimization returns instantly.
+        The starting point is not part of the key: a hit returns the first solution found for
+        those inputs. Misses start from the nearest previously solved request in the warm-start
+        index (or from the current parameters when it is empty).
+        See solve_performance() for the 'penalty' and 'constrained' modes. An infeasible
+        constrained solve leaves the model unchanged.
+        Returns a dict with the status, parameters, achieved metrics, solve time and iteration count.
+        """
+        print(f"Optimizing for - Speed: {target_speed} m/s (locked: {lock_speed}), Force: {target_force} N (locked: {lock_force}), Mode: {mode}")
         
-        # Initial guess - start from current values
-        initial_guess = [
-            self.bow_thickness,
-            self.bow_curvature,
-            self.limb_stiffness,
-            self.grip_width
-        ]
-        
-        # Define parameter bounds
-        bounds = [
-            (co.MIN_BOW_THICKNESS, co.MAX_BOW_THICKNESS),     # bow_thickness
-            (co.MIN_BOW_CURVATURE, co.MAX_BOW_CURVATURE),     # bow_curvature
-            (co.MIN_LIMB_STIFFNESS, co.MAX_LIMB_STIFFNESS),     # limb_stiffness
-            (co.MIN_GRIP_WIDTH, co.MAX_GRIP_WIDTH)    # grip_width
-        ]
-        
-        # Run optimization
-        result = minimize(objective_performance, initial_guess, method='L-BFGS-B', bounds=bounds)
-        
-        # Apply optimized parameters
-        bow_thickness, bow_curvature, limb_stiffness, grip_width = result.x
-        
-        # Calculate derived parameters (arrows, etc.)
-        # arrow_length = self.calculate_optimal_arrow_length(bow_thickness, bow_curvature, grip_width)
-        arrow_length = co.DEFAULT_ARROW_LENGTH  # Keep arrow length fixed to the existing self.arrow_len
-        arrow_weight = self.calculate_optimal_arrow_weight(limb_stiffness, grip_width)
-        tip_diameter = self.calculate_optimal_tip_diameter(limb_stiffness, grip_width)
-        
-        # Update all parameters
-        self.refresh_parameters(
-            bow_thickness, bow_curvature, limb_stiffness,
-            grip_width, arrow_length, arrow_weight, tip_diameter
+        inputs = self.optimization_inputs(target_speed, target_force, lock_speed, lock_force, mode, constraint_kind)
+        cache_key = None
+        cached = None
+        if self.result_cache is not None:
+            cache_key = make_key(self.model_hash, self.physics_constants(), inputs)
+            cached = self.result_cache.get(cache_key)
+
+        warm_start_features = self.warm_start_index.feature_vector(
+            target_speed, target_force, lock_speed, lock_force, self.current_user, self.palm_size
         )
-        
-        # Apply geometry updates
-        self.apply_geometry_update()
+        warm_started = False
+
+        if cached is not None:
+            solved = cached
+            print(f"Using cached optimization result (originally solved in {solved['solve_seconds']:.3f} s)")
+        else:
+            # Initial guess - nearest solved request, otherwise start from current values
+            initial_guess, distance = self.warm_start_index.query(warm_start_features)
+            if initial_guess is not None:
+                warm_started = True
+                print(f"Warm-starting from nearest solved request (distance {distance:.3f})")
+
+            solved = self.solve_performance(target_speed, target_force, lock_speed, lock_force,
+                                            initial_guess, mode, constraint_kind)
+            if cache_key is not None:
+                self.result_cache.put(cache_key, self.model_hash, inputs, {
+                    'solution': solved['solution'],
+                    'status': solved['status'],
+                    'launch_speed': solved['launch_speed'],
+                    'draw_force': solved['draw_force'],
+                    'constraint_violation': solved['constraint_violation'],
+                    'iterations': solved['iterations'],
+                    'function_evaluations': solved['function_evaluations']
+                }, solved['solve_seconds'])
+
+        bow_thickness, bow_curvature, limb_stiffness, grip_width = solved['solution']
+        status = solved['status']
+        solve_seconds = solved['solve_seconds']
+        iterations = solved['iterations']
+
+        if status == 'infeasible':
+            print(f"Optimization infeasible - closest reachable: Speed: {solved['launch_speed']:.2f} m/s, "
+                  f"Force: {solved['draw_force']:.2f} N; model left unchanged")
+        else:
+            self.warm_start_index.add(warm_start_features, solved['solution'])
+
+            # Calculate derived parameters (arrows, etc.)
+            # arrow_length = self.calculate_optimal_arrow_length(bow_thickness, bow_curvature, grip_width)
+            arrow_length = co.DEFAULT_ARROW_LENGTH  # Keep arrow length fixed to the existing self.arrow_len
+            arrow_weight = self.calculate_optimal_arrow_weight(limb_stiffness, grip_width)
+            tip_diameter = self.calculate_optimal_tip_diameter(limb_stiffness, grip_width)
+            
+            # Update all parameters
+            self.refresh_parameters(
+                bow_thickness, bow_curvature, limb_stiffness,
+                grip_width, arrow_length, arrow_weight, tip_diameter
+            )
+            
+            # Apply geometry updates
+            self.apply_geometry_update()
         
         # Log results
-        optimized_speed = self.estimate_launch_speed(bow_thickness, bow_curvature, limb_stiffness, grip_width)
-        optimized_force = self.estimate_draw_force(bow_thickness, bow_curvature, limb_stiffness, grip_width)
+        optimized_speed = solved['launch_speed']
+        optimized_force = solved['draw_force']
         
         os.makedirs("logs", exist_ok=True)
         with open("logs/performance_optimization.txt", "w") as log_file:
             log_file.write("=== Performance Optimization Results ===\n")
+            log_file.write(f"Mode: {mode} ({constraint_kind}), Status: {status}\n")
             log_file.write(f"Target Launch Speed: {target_speed:.2f} m/s (locked: {lock_speed})\n")
             log_file.write(f"Target Draw Force: {target_force:.2f} N (locked: {lock_force})\n")
             log_file.write(f"Achieved Launch Speed: {optimized_speed:.2f} m/s\n")
             log_file.write(f"Achieved Draw Force: {optimized_force:.2f} N\n")
             log_file.write(f"Parameters - Thickness: {bow_thickness:.2f} mm, Curvature: {bow_curvature:.2f}, Stiffness: {limb_stiffness:.2f}, Grip Width: {grip_width:.2f} mm\n")
+            log_file.write(f"Cached: {cached is not None}, Solve Time: {solve_seconds:.3f} s\n")
+            log_file.write(f"Warm-started: {warm_started}, Iterations: {iterations}\n")
         
-        print(f"Optimization complete - Speed: {optimized_speed:.2f} m/s, Force: {optimized_force:.2f} N")
+        if status != 'infeasible':
+            print(f"Optimization complete - Speed: {optimized_speed:.2f} m/s, Force: {optimized_force:.2f} N "
+                  f"({iterations} iterations{', warm-started' if warm_started else ''})")
+
+        return {
+            'status': status,
+            'parameters': {
+                'bow_thickness': bow_thickness,
+                'bow_curvature': bow_curvature,
+                'limb_stiffness': limb_stiffness,
+                'grip_width': grip_width
+            },
+            'launch_speed': optimized_speed,
+            'draw_force': optimized_force,
+            'constraint_violation': solved['constraint_violation'],
+            'cached': cached is not None,
+            'solve_seconds': solve_seconds,
+            'iterations': iterations,
+            'warm_started': warm_started
+        }
         
     def estimate_top_clamp_space(self):
         """
@@ -578,8 +1034,11 @@ class BowArrowOptimizer:
     #     length = base_length * stiffness_factor * curvature_factor * thickness_factor * profile_factor * grip_factor
     #     return max(co.MIN_ARROW_LENGTH, min(length, co.MAX_ARROW_LENGTH))  # clamp between 45mm and 80mm
     
+    @traced()
     def calculate_optimal_arrow_weight(self, limb_stiffness, grip_width):
-        """Simplified arrow weight based on bow stiffness and thickness"""
+        """Printed mass of the arrow with the tip these parameters call for (heuristic without an arrow mesh)"""
+        if self.arrow_mass_terms:
+            return round(self.arrow_mass(self.arrow_length, self.calculate_optimal_tip_diameter(limb_stiffness, grip_width)), 2)
         base_weight = 2.0  # g
         stiffness_factor = 1.0 + (limb_stiffness - 0.6) * 0.6
         thickness_factor = 1.0 + (self.bow_thickness - 5.0) * 0.1
@@ -590,6 +1049,7 @@ class BowArrowOptimizer:
         }.get(self.current_user, 1.0)
         return round(base_weight * stiffness_factor * thickness_factor * profile_factor, 2)
     
+    @traced()
     def calculate_optimal_tip_diameter(self, limb_stiffness, grip_width):
         """Tip diameter based on bow stiffness and thickness"""
         base_diameter = co.DEFAULT_ARROW_TIP_DIAMETER
@@ -601,13 +1061,15 @@ class BowArrowOptimizer:
             'Professional': 0.85
         }.get(self.current_user, 1.0)
         diameter = base_diameter * stiffness_factor * thickness_factor * profile_factor
-        return round(min(max(diameter, 4.0), 12.0), 2)
+        return round(min(max(diameter, co.MIN_ARROW_TIP_DIAMETER), co.MAX_ARROW_TIP_DIAMETER), 2)
 
+    @traced()
     def simulate_performance(self):
         """Simulate bow and arrow performance with current parameters"""
         # Calculate key performance metrics
         launch_speed = self.estimate_launch_speed(
-            self.bow_thickness, self.bow_curvature, self.limb_stiffness, self.grip_width
+            self.bow_thickness, self.bow_curvature, self.limb_stiffness, self.grip_width,
+            self.arrow_mass()
         )
         
         draw_force = self.estimate_draw_force(
@@ -643,7 +1105,7 @@ class BowArrowOptimizer:
         comfort_score = self.compute_comfort_score()
         
         # 3D Print Settings
-        self.get_print_settings()  # Log the dynamic 3D print settings
+        self.print_settings = self.get_print_settings()  # Log the dynamic 3D print settings
 
         # Safety score
         if self.current_user == 'Child':
@@ -697,8 +1159,36 @@ class BowArrowOptimizer:
             'performance_score': performance_score
         }
 
-    def export_model(self, filename):
-        """Export the current model to STL file"""
+    @traced()
+    def sensitivity_report(self):
+        """Jacobian and elasticities of the current design with respect to the bow parameters and palm size
+        (speed and force on the unrounded tip diameter model, see Sensitivity.MODEL_NOTE)"""
+        design = [self.bow_thickness, self.bow_curvature, self.limb_stiffness, self.grip_width]
+        report = design_sensitivity(self, [design], [self.palm_size], self.current_user)
+        return {
+            'parameters': report['parameters'],
+            'outputs': report['outputs'],
+            'values': report['values'][0],
+            'jacobian': report['jacobian'][0],
+            'elasticity': report['elasticity'][0],
+            'model': report['model']
+        }
+
+    @traced()
+    def export_model(self, filename, allow_invalid=False):
+        """Export the current model to STL file.
+
+        Raises ValueError if the deformed mesh fails check_mesh_validity(), unless allow_invalid
+        (then it is exported with a warning).
+        """
+        import trimesh
+
+        report = self.check_mesh_validity()
+        if not report['valid']:
+            if not allow_invalid:
+                raise ValueError(f"Deformed mesh is not printable: {describe_defects(report)}")
+            print(f"[Mesh Check] Exporting a mesh that is not printable: {describe_defects(report)}")
+
         # Combine all components into one mesh
         combined_mesh = trimesh.util.concatenate(self.components)
         combined_mesh.export(filename)
@@ -706,8 +1196,16 @@ class BowArrowOptimizer:
         return os.path.abspath(filename)
 
     # TODO: Optimization for 3D printing parameters   
-    def get_print_settings(self):
-        """Dynamically recommend 3D print settings based on bow and arrow parameters and log them"""
+    @traced()
+    def get_print_settings(self, estimate=False, mass=True):
+        """Dynamically recommend 3D print settings based on bow and arrow parameters and log them.
+
+        With estimate, the current geometry is also sliced at the recommended layer height and
+        infill for its filament use and print time (see print_estimate(); tens of ms, so only
+        the viewer's Print Cost asks for it). With mass, the
+        printed mass of the current geometry at the recommended infill is included; callers
+        recommending settings for other geometry (e.g. catalogue variants) leave it out.
+        """
 
         # Ensure logs directory exists
         os.makedirs("logs", exist_ok=True)
@@ -748,6 +1246,11 @@ class BowArrowOptimizer:
         else:
             instructions = "Standard printing orientation is recommended"
 
+        # Printed mass of the current (deformed) geometry at the recommended infill
+        print_mass = sum(printed_mass(properties['volume'], properties['area'], infill=setting_value(infill))
+                         for properties in self.component_mass_properties()) if mass else None
+        cost = self.print_estimate(setting_value(layer_height), setting_value(infill)) if estimate else None
+
         # Write to log file
         with open(log_path, "w", encoding="utf-8") as f:
             f.write("=== 3D Print Settings Log ===\n")
@@ -761,11 +1264,22 @@ class BowArrowOptimizer:
             f.write(f"Infill: {infill}\n")
             f.write(f"Supports: {supports}\n")
             f.write(f"Instructions: {instructions}\n")
+            if print_mass is not None:
+                f.write(f"Estimated Print Mass: {print_mass:.2f} g\n")
+            if cost is not None:
+                f.write(f"Estimated Filament: {cost['filament_m']:.2f} m\n")
+                f.write(f"Estimated Print Time: {cost['print_time_s'] / 60:.0f} min\n")
 
-        return {
+        settings = {
             "material": material,
             "layer_height": layer_height,
             "infill": infill,
             "supports": supports,
             "special_instructions": instructions
         }
+        if print_mass is not None:
+            settings["estimated_mass"] = round(float(print_mass), 2)
+        if cost is not None:
+            settings["estimated_filament_m"] = round(cost['filament_m'], 3)
+            settings["estimated_print_time_s"] = round(cost['print_time_s'])
+        return settings
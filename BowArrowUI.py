@@ -1,33 +1,175 @@
+import time
+# Process start reference for the time-to-first-frame / time-to-interactive readout
+STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QLabel, QComboBox, QSlider, QPushButton, 
                            QSpinBox, QDoubleSpinBox, QGroupBox, QTabWidget,
-                           QFormLayout, QFileDialog, QMessageBox, QCheckBox)
-from PyQt5.QtCore import Qt, pyqtSlot
-from PyQt5.QtGui import QPixmap, QImage
+                           QFormLayout, QFileDialog, QMessageBox, QCheckBox,
+                           QTableWidget, QTableWidgetItem, QHeaderView, QAction)
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal, QThread, QTimer
+from PyQt5.QtGui import QPixmap, QImage, QKeySequence
 import pyqtgraph.opengl as gl
 import numpy as np
 from BowArrowOpt import BowArrowOptimizer
+from ViewMesh import component_view_arrays, displacement_colors, part_colors, region_colors, COLOR_MODES
+from MeshValidity import describe_defects
+from PrintEstimate import gcode_header, setting_value
+from Toolpath import stream_layers
+from Profiling import tracer, span
+from SessionReplay import SessionRecorder
 import Constants as co
 
+class TracedGLViewWidget(gl.GLViewWidget):
+    """GLViewWidget whose frames (including GL buffer uploads) show up as profiling spans.
+
+    Emits interacting on every camera drag or zoom event (used to switch to the LOD meshes).
+    """
+    interacting = pyqtSignal()
+
+    def paintGL(self, *args, **kwargs):
+        with span('GLViewWidget.paintGL'):
+            super().paintGL(*args, **kwargs)
+
+    def mousePressEvent(self, event):
+        self.interacting.emit()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons():
+            self.interacting.emit()
+        super().mouseMoveEvent(event)
+
+    def wheelEvent(self, event):
+        self.interacting.emit()
+        super().wheelEvent(event)
+
+class ModelLoader(QThread):
+    """Loads and splits the model on a worker thread so the window can paint meanwhile"""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, model_path):
+        super().__init__()
+        self.model_path = model_path
+
+    def run(self):
+        try:
+            optimizer = BowArrowOptimizer(self.model_path)
+            # Build the viewer's LOD meshes here rather than on the first interaction
+            optimizer.level_of_detail()
+            # and the mesh checkers, which every geometry update runs
+            optimizer.check_mesh_validity()
+            self.loaded.emit(optimizer)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class ToolpathLoader(QThread):
+    """Parses a G-code file on a worker thread, emitting each layer's line buffers as soon as it is built"""
+    layer_loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, gcode_path):
+        super().__init__()
+        self.gcode_path = gcode_path
+
+    def run(self):
+        try:
+            for layer in stream_layers(self.gcode_path):
+                if self.isInterruptionRequested():
+                    return
+                self.layer_loaded.emit(layer)
+        except Exception as e:
+            self.failed.emit(str(e))
+
 class BowArrowUI(QMainWindow):
     def __init__(self, model_path):
         super().__init__()
         self.setWindowTitle("Bow Toy Optimizer")
         self.setGeometry(100, 100, 1000, 700)
+        self.optimizer = None
+        self.mesh_items = []  # one GL mesh item per optimizer component
+        self.lod_items = []  # simplified stand-ins shown while the camera moves
+        self.region_colors = None  # per-component region colors, computed once per model
+        self.lod_active = False
+        # Switches back to full resolution once the camera has been idle for a moment
+        self.lod_idle_timer = QTimer(self)
+        self.lod_idle_timer.setSingleShot(True)
+        self.lod_idle_timer.setInterval(co.LOD_IDLE_MS)
+        self.lod_idle_timer.timeout.connect(self.show_full_resolution)
+        # Parameter scrubbing redraws the LOD items from the blend-shape basis, at most once per interval
+        self.preview_colors = None  # colors of the items while a preview is shown
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(co.PREVIEW_INTERVAL_MS)
+        self.preview_timer.timeout.connect(self.show_preview)
+        # Draw animation: steps the draw slider from rest to full draw and back
+        self.draw_timer = QTimer(self)
+        self.draw_timer.setInterval(1000 // co.DRAW_ANIMATION_FRAMES)
+        self.draw_timer.timeout.connect(self.advance_draw_animation)
+        self.draw_direction = 1
+        # G-code toolpath shown beside the model: one line item per layer, added as layers are parsed
+        self.toolpath_items = []
+        self.toolpath_loader = None
+        self.session = SessionRecorder(model_path)
+        self.toolpath_offset = None
+        self.toolpath_stats = None
+        # Undo/redo set only the parameters; the model is rebuilt once stepping pauses
+        self.history_timer = QTimer(self)
+        self.history_timer.setSingleShot(True)
+        self.history_timer.setInterval(co.HISTORY_REBUILD_MS)
+        self.history_timer.timeout.connect(self.show_history_geometry)
+        self.first_frame_time = None
+        self.interactive_time = None
         
-        try:
-            self.optimizer = BowArrowOptimizer(model_path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load model: {str(e)}")
-            sys.exit(1)
+        # Start loading the mesh right away; it finishes while the window is shown
+        self.model_loader = ModelLoader(model_path)
+        self.model_loader.loaded.connect(self.on_model_loaded)
+        self.model_loader.failed.connect(self.on_model_failed)
+        self.model_loader.start()
         
-        # Setup UI components
+        # Setup UI components (controls stay disabled until the model is loaded)
         self.setup_ui()
+        self.set_controls_enabled(False)
+        self.statusBar().showMessage(f"Loading {os.path.basename(model_path)}...")
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.first_frame_time is None:
+            # Runs once the event loop has processed the first paint of the window
+            QTimer.singleShot(0, self.on_first_frame)
+        
+    def on_first_frame(self):
+        """Record time-to-first-frame"""
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - STARTUP_TIME
+            print(f"Time to first frame: {self.first_frame_time:.2f} s")
+        
+    def on_model_loaded(self, optimizer):
+        """Attach the loaded optimizer, draw the model and enable the controls"""
+        self.optimizer = optimizer
+        self.model_loader = None
         
         # Initialize viewer with model
         self.update_model_view()
+        self.set_controls_enabled(True)
+        
+        self.interactive_time = time.perf_counter() - STARTUP_TIME
+        print(f"Time to interactive: {self.interactive_time:.2f} s")
+        first_frame = f"first frame {self.first_frame_time:.2f} s, " if self.first_frame_time is not None else ""
+        self.statusBar().showMessage(f"Ready ({first_frame}interactive {self.interactive_time:.2f} s)", 10000)
+        
+    def on_model_failed(self, message):
+        QMessageBox.critical(self, "Error", f"Failed to load model: {message}")
+        QApplication.instance().exit(1)
+        
+    def set_controls_enabled(self, enabled):
+        """Enable or disable every control that needs the optimizer"""
+        for widget in self.model_controls:
+            widget.setEnabled(enabled)
+        self.update_history_actions()
         
     # UPDATE: the allowed range of performance metrics based on physical constraints
     def update_performance_range(self):
@@ -75,26 +217,66 @@ class BowArrowUI(QMainWindow):
             # Get lock states
             lock_speed = self.lock_speed_checkbox.isChecked()
             lock_force = self.lock_force_checkbox.isChecked()
+            mode = 'constrained' if self.hard_constraints_checkbox.isChecked() else 'penalty'
             
-            # Call optimizer with performance targets
-            self.optimizer.optimize_for_performance(
-                target_speed, target_force, 
-                lock_speed, lock_force
-            )
+            with self.session.action('optimize_performance', target_speed=target_speed, target_force=target_force,
+                                     lock_speed=lock_speed, lock_force=lock_force, mode=mode), \
+                    span('BowArrowUI.optimize_performance'):
+                # Call optimizer with performance targets
+                result = self.optimizer.optimize_for_performance(
+                    target_speed, target_force, 
+                    lock_speed, lock_force, mode=mode
+                )
+                
+                if result['status'] != 'infeasible':
+                    self.optimizer.record_design("Optimize Performance")
+                    self.update_history_actions()
+                    # Update UI to show new parameters
+                    self.update_parameter_displays()
+                    self.update_model_view()
+            self.show_profile_summary()
+
+            if result['status'] == 'infeasible':
+                QMessageBox.warning(self, "Targets Not Reachable",
+                                    "The locked targets cannot be met within the parameter bounds.\n"
+                                    f"Closest reachable: {result['launch_speed']:.2f} m/s, "
+                                    f"{result['draw_force']:.2f} N. The model was left unchanged.")
+                return
             
-            # Update UI to show new parameters
-            self.update_parameter_displays()
-            self.update_model_view()
             self.simulate_performance()
             
             QMessageBox.information(self, "Performance Optimization Complete", 
-                            "Model has been optimized for your performance targets.")
+                            "Model has been optimized for your performance targets.\n"
+                            f"{self.describe_solve(result)}")
         except Exception as e:
             QMessageBox.critical(self, "Optimization Error", 
                         f"Failed to optimize for performance: {str(e)}")
     
     def setup_ui(self):
         """Set up the user interface"""
+        # Profiling menu and status bar readout
+        profiling_menu = self.menuBar().addMenu("Profiling")
+        self.profiling_action = QAction("Enable Profiling", self, checkable=True)
+        self.profiling_action.setChecked(tracer.enabled)
+        self.profiling_action.toggled.connect(self.toggle_profiling)
+        profiling_menu.addAction(self.profiling_action)
+        dump_trace_action = QAction("Dump Chrome Trace...", self)
+        dump_trace_action.triggered.connect(self.dump_profile_trace)
+        profiling_menu.addAction(dump_trace_action)
+        self.record_session_action = QAction("Record Session", self, checkable=True)
+        self.record_session_action.toggled.connect(self.toggle_session_recording)
+        profiling_menu.addAction(self.record_session_action)
+        edit_menu = self.menuBar().addMenu("Edit")
+        self.undo_action = QAction("Undo", self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo_design)
+        edit_menu.addAction(self.undo_action)
+        self.redo_action = QAction("Redo", self)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo_design)
+        edit_menu.addAction(self.redo_action)
+        self.statusBar()
+        
         # Create central widget and main layout
         central_widget = QWidget()
         main_layout = QHBoxLayout(central_widget)
@@ -104,6 +286,7 @@ class BowArrowUI(QMainWindow):
         left_panel = QWidget()
         left_layout = QVBoxLayout(left_panel)
         left_panel.setMaximumWidth(400)
+        self.model_controls = [left_panel]
         
         # Create right panel for visualization
         right_panel = QWidget()
@@ -191,6 +374,10 @@ class BowArrowUI(QMainWindow):
         
         config_layout.addWidget(params_group)
         
+        # Preview geometry edits live while a value is scrubbed (nothing is applied)
+        for spin in (self.thickness_spin, self.curvature_spin, self.grip_width_spin):
+            spin.valueChanged.connect(self.schedule_preview)
+        
         # Apply parameters button
         apply_params_btn = QPushButton("Apply Parameters")
         apply_params_btn.clicked.connect(self.apply_parameters)
@@ -200,6 +387,11 @@ class BowArrowUI(QMainWindow):
         optimize_btn = QPushButton("Optimize Design")
         optimize_btn.clicked.connect(self.optimize_design)
         config_layout.addWidget(optimize_btn)
+        optimize_score_btn = QPushButton("Maximize Score")
+        optimize_score_btn.setToolTip("Score random designs for the current profile and apply the one with the "
+                                      "highest performance score")
+        optimize_score_btn.clicked.connect(self.optimize_score)
+        config_layout.addWidget(optimize_score_btn)
 
        # Second tab: Setup results tab
         results_layout = QVBoxLayout(results_tab)
@@ -226,7 +418,24 @@ class BowArrowUI(QMainWindow):
         self.overall_label = QLabel("0")
         perf_form.addRow("Overall Score:", self.overall_label)
         
+        self.print_cost_label = QLabel("")
+        perf_form.addRow("Print Cost:", self.print_cost_label)
+        
         results_layout.addWidget(performance_group)
+
+        # Sensitivity: elasticity of each metric with respect to each knob
+        sensitivity_group = QGroupBox("Sensitivity (% change per 1% change)")
+        sensitivity_layout = QVBoxLayout(sensitivity_group)
+        self.sensitivity_table = QTableWidget(5, 5)
+        self.sensitivity_table.setHorizontalHeaderLabels(["Thick.", "Curv.", "Stiff.", "Grip", "Palm"])
+        self.sensitivity_table.setVerticalHeaderLabels(["Speed", "Force", "Comfort", "Safety", "Overall"])
+        self.sensitivity_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.sensitivity_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.sensitivity_table.setMaximumHeight(180)
+        sensitivity_layout.addWidget(self.sensitivity_table)
+        self.sensitivity_summary_label = QLabel("")
+        sensitivity_layout.addWidget(self.sensitivity_summary_label)
+        results_layout.addWidget(sensitivity_group)
         
         # UPDATE: Performance targets including launch speed and draw force
         performance_targets_group = QGroupBox("Performance Targets")
@@ -256,6 +465,10 @@ class BowArrowUI(QMainWindow):
         targets_form.addRow(self.lock_speed_checkbox)
         targets_form.addRow(self.lock_force_checkbox)
 
+        # Locked targets as exact constraints instead of heavy penalties
+        self.hard_constraints_checkbox = QCheckBox("Hold prioritized targets exactly")
+        targets_form.addRow(self.hard_constraints_checkbox)
+
         # UPDATE: Add User Reminder 
         targets_form.addRow(QLabel("Reminder: Because of the mutual constraints you"))
         targets_form.addRow(QLabel("should ideally fix at most one parameter at a time."))
@@ -288,7 +501,8 @@ class BowArrowUI(QMainWindow):
         right_layout.addWidget(view_label)
         
         # Create OpenGL widget for 3D rendering
-        self.view3d = gl.GLViewWidget()
+        self.view3d = TracedGLViewWidget()
+        self.view3d.interacting.connect(self.on_view_interaction)
         right_layout.addWidget(self.view3d)
         
         # Add grid for reference
@@ -299,8 +513,63 @@ class BowArrowUI(QMainWindow):
         
         # Add update view button
         update_view_btn = QPushButton("Update View")
-        update_view_btn.clicked.connect(self.update_model_view)
+        update_view_btn.clicked.connect(self.rebuild_model_items)
         right_layout.addWidget(update_view_btn)
+        self.model_controls.append(update_view_btn)
+        
+        # Color mode: parts, displacement heatmap or deformation regions (recolors without a rebuild)
+        color_mode_widget = QWidget()
+        color_mode_layout = QHBoxLayout(color_mode_widget)
+        color_mode_layout.setContentsMargins(0, 0, 0, 0)
+        color_mode_layout.addWidget(QLabel("Color by:"))
+        self.color_mode_combo = QComboBox()
+        self.color_mode_combo.addItems(COLOR_MODES)
+        self.color_mode_combo.currentTextChanged.connect(self.recolor_model_items)
+        color_mode_layout.addWidget(self.color_mode_combo)
+        self.color_legend_label = QLabel("")
+        color_mode_layout.addWidget(self.color_legend_label, 1)
+        right_layout.addWidget(color_mode_widget)
+        self.model_controls.append(color_mode_widget)
+        
+        # Draw preview: limb flex from rest to full draw, scrubbed or animated
+        draw_widget = QWidget()
+        draw_layout = QHBoxLayout(draw_widget)
+        draw_layout.setContentsMargins(0, 0, 0, 0)
+        draw_layout.addWidget(QLabel("Draw:"))
+        self.draw_slider = QSlider(Qt.Horizontal)
+        self.draw_slider.setRange(0, 100)
+        self.draw_slider.valueChanged.connect(self.schedule_preview)
+        draw_layout.addWidget(self.draw_slider, 1)
+        self.animate_draw_button = QPushButton("Animate Draw")
+        self.animate_draw_button.setCheckable(True)
+        self.animate_draw_button.toggled.connect(self.toggle_draw_animation)
+        draw_layout.addWidget(self.animate_draw_button)
+        self.draw_force_preview_label = QLabel("")
+        draw_layout.addWidget(self.draw_force_preview_label)
+        right_layout.addWidget(draw_widget)
+        self.model_controls.append(draw_widget)
+        
+        # G-code toolpath: streamed in the background; the sliders pick the shown layer range
+        toolpath_widget = QWidget()
+        toolpath_layout = QHBoxLayout(toolpath_widget)
+        toolpath_layout.setContentsMargins(0, 0, 0, 0)
+        load_toolpath_btn = QPushButton("Load G-code...")
+        load_toolpath_btn.clicked.connect(self.load_toolpath)
+        toolpath_layout.addWidget(load_toolpath_btn)
+        clear_toolpath_btn = QPushButton("Clear")
+        clear_toolpath_btn.clicked.connect(self.clear_toolpath)
+        toolpath_layout.addWidget(clear_toolpath_btn)
+        toolpath_layout.addWidget(QLabel("Layers:"))
+        self.layer_first_slider = QSlider(Qt.Horizontal)
+        self.layer_last_slider = QSlider(Qt.Horizontal)
+        for slider in (self.layer_first_slider, self.layer_last_slider):
+            slider.setRange(0, 0)
+            slider.valueChanged.connect(self.update_toolpath_range)
+            toolpath_layout.addWidget(slider, 1)
+        self.layer_range_label = QLabel("")
+        toolpath_layout.addWidget(self.layer_range_label)
+        right_layout.addWidget(toolpath_widget)
+        self.model_controls.append(toolpath_widget)
         
     def apply_profile(self):
         """Apply the selected user profile"""
@@ -309,8 +578,16 @@ class BowArrowUI(QMainWindow):
         speed_pref = self.speed_combo.currentText()
         
         # Apply to optimizer
-        if self.optimizer.set_user_profile(profile_name, palm_size, speed_pref):
-            self.update_parameter_displays()
+        with self.session.action('apply_profile', profile=profile_name, palm_size=palm_size, speed=speed_pref), \
+                span('BowArrowUI.apply_profile'):
+            applied = self.optimizer.set_user_profile(profile_name, palm_size, speed_pref)
+            if applied:
+                self.optimizer.record_design(f"Apply {profile_name} Profile")
+                self.update_history_actions()
+                self.update_parameter_displays()
+        self.show_profile_summary()
+        
+        if applied:
             QMessageBox.information(self, "Profile Applied", 
                                   f"Applied {profile_name} profile with palm size {palm_size}mm "
                                   f"and {speed_pref} speed preference.")
@@ -321,33 +598,43 @@ class BowArrowUI(QMainWindow):
     def apply_parameters(self):
         """Apply the current parameter values to the optimizer"""
         
-        # Reapply current profile first
-        profile_name = self.profile_combo.currentText()
-        palm_size = self.palm_size_spin.value()
-        speed_pref = self.speed_combo.currentText()
-        self.optimizer.set_user_profile(profile_name, palm_size, speed_pref)
+        with self.session.action('apply_parameters', **self.parameter_inputs()), span('BowArrowUI.apply_parameters'):
+            # Reapply current profile first
+            profile_name = self.profile_combo.currentText()
+            palm_size = self.palm_size_spin.value()
+            speed_pref = self.speed_combo.currentText()
+            self.optimizer.set_user_profile(profile_name, palm_size, speed_pref)
         
-        # Get values from UI
-        thickness = self.thickness_spin.value()
-        curvature = self.curvature_spin.value()
-        stiffness = self.stiffness_spin.value()
-        grip_width = self.grip_width_spin.value()
+            # Get values from UI
+            thickness = self.thickness_spin.value()
+            curvature = self.curvature_spin.value()
+            stiffness = self.stiffness_spin.value()
+            grip_width = self.grip_width_spin.value()
         
-        # Apply to optimizer
-        self.optimizer.refresh_parameters(
-            thickness, curvature, stiffness,
-            grip_width, self.optimizer.arrow_length,
-            self.optimizer.arrow_weight, self.optimizer.tip_diameter
-        )
+            # Apply to optimizer
+            self.optimizer.refresh_parameters(
+                thickness, curvature, stiffness,
+                grip_width, self.optimizer.arrow_length,
+                self.optimizer.arrow_weight, self.optimizer.tip_diameter
+            )
         
-        # Update geometry
-        self.optimizer.apply_geometry_update()
+            # Update geometry
+            self.optimizer.apply_geometry_update()
+            self.optimizer.record_design("Apply Parameters")
+            self.update_history_actions()
         
-        # Update view
-        self.update_model_view()
+            # Update view
+            self.update_model_view()
+        self.show_profile_summary()
         
-        QMessageBox.information(self, "Parameters Applied", 
-                              "Parameters have been applied to the model.")
+        report = self.optimizer.mesh_validity
+        if report is not None and not report['valid']:
+            QMessageBox.warning(self, "Parameters Applied",
+                                f"Parameters have been applied, but the deformed mesh is not printable:\n"
+                                f"{describe_defects(report)}")
+        else:
+            QMessageBox.information(self, "Parameters Applied", 
+                                  "Parameters have been applied to the model.")
     
     def optimize_design(self):
         """Run the optimization algorithm"""
@@ -356,40 +643,65 @@ class BowArrowUI(QMainWindow):
             # Fix: Use optimize_for_performance instead of optimize_model
             target_speed = self.optimizer.user_profiles[self.optimizer.current_user]['max_launch_speed']
             target_force = self.optimizer.user_profiles[self.optimizer.current_user]['max_draw_force']
-            self.optimizer.optimize_for_performance(target_speed, target_force, lock_speed=True, lock_force=True)
+            with self.session.action('optimize_design'), span('BowArrowUI.optimize_design'):
+                result = self.optimizer.optimize_for_performance(target_speed, target_force, lock_speed=True, lock_force=True)
+                self.optimizer.record_design("Optimize Design")
+                self.update_history_actions()
 
-            self.update_parameter_displays()
-            self.update_model_view()
+                self.update_parameter_displays()
+                self.update_model_view()
+            self.show_profile_summary()
             self.simulate_performance()  # Update performance metrics
             QMessageBox.information(self, "Optimization Complete", 
-                                  "Model has been optimized for the current profile.")
+                                  "Model has been optimized for the current profile.\n"
+                                  f"{self.describe_solve(result)}")
         except Exception as e:
             QMessageBox.critical(self, "Optimization Error", 
                                f"Failed to optimize model: {str(e)}")
     
+    def optimize_score(self):
+        """Apply the design with the highest performance score found by screening random designs"""
+        try:
+            with self.session.action('optimize_score'), span('BowArrowUI.optimize_score'):
+                result = self.optimizer.optimize_score()
+                if result['applied']:
+                    self.optimizer.record_design("Maximize Score")
+                    self.update_history_actions()
+                    self.update_parameter_displays()
+                    self.update_model_view()
+            self.show_profile_summary()
+            if not result['applied']:
+                QMessageBox.information(self, "Maximize Score",
+                                        f"No screened design beats the current score of {result['previous_score']:.1f}.")
+                return
+            self.simulate_performance()
+        except Exception as e:
+            QMessageBox.critical(self, "Optimization Error",
+                               f"Failed to maximize the performance score: {str(e)}")
+    
+    def describe_solve(self, result):
+        """One-line description of where an optimization result came from"""
+        if result['cached']:
+            return f"Loaded from result cache (originally solved in {result['solve_seconds']:.2f} s)."
+        warm_start = ", warm-started from a nearby solution" if result['warm_started'] else ""
+        return f"Solved in {result['solve_seconds']:.2f} s ({result['iterations']} iterations{warm_start})."
+
     def update_parameter_displays(self):
-        """Update UI elements with current optimizer parameters"""
-        self.thickness_spin.setValue(self.optimizer.bow_thickness)
-        self.curvature_spin.setValue(self.optimizer.bow_curvature)
-        self.stiffness_spin.setValue(self.optimizer.limb_stiffness)
-        self.grip_width_spin.setValue(self.optimizer.grip_width)
+        """Update UI elements with current optimizer parameters (without starting a preview)"""
+        for spin, value in ((self.thickness_spin, self.optimizer.bow_thickness),
+                            (self.curvature_spin, self.optimizer.bow_curvature),
+                            (self.stiffness_spin, self.optimizer.limb_stiffness),
+                            (self.grip_width_spin, self.optimizer.grip_width)):
+            spin.blockSignals(True)
+            spin.setValue(value)
+            spin.blockSignals(False)
     
     def simulate_performance(self):
         """Run performance simulation and update display"""
         try:
-            results = self.optimizer.simulate_performance()
-            
-            # Update display labels
-            self.launch_speed_label.setText(f"{results['launch_speed']:.2f} m/s")
-            self.draw_force_label.setText(f"{results['draw_force']:.2f} N")
-            self.accuracy_label.setText(f"{results['accuracy_score']:.1f}")
-            self.comfort_label.setText(f"{results['comfort_score']:.1f}")
-            self.safety_label.setText(f"{results['safety_score']:.1f}")
-            self.overall_label.setText(f"{results['performance_score']:.1f}")
-            
-            # Update sliders to match current performance values (added)
-            self.launch_speed_slider.setValue(int(results['launch_speed'] * co.SLIDER_SCALE))
-            self.draw_force_slider.setValue(int(results['draw_force'] * co.SLIDER_SCALE))
+            with self.session.action('simulate'), span('BowArrowUI.simulate_performance'):
+                results = self.update_performance_displays()
+            self.show_profile_summary()
             
             QMessageBox.information(self, "Simulation Complete", 
                                   f"Overall Performance Score: {results['performance_score']:.1f}/100")
@@ -397,6 +709,44 @@ class BowArrowUI(QMainWindow):
             QMessageBox.critical(self, "Simulation Error", 
                                f"Failed to simulate performance: {str(e)}")
     
+    def update_performance_displays(self):
+        """Run the simulation and refresh the metric labels, sensitivity table and sliders"""
+        results = self.optimizer.simulate_performance()
+        
+        # Update display labels
+        self.launch_speed_label.setText(f"{results['launch_speed']:.2f} m/s")
+        self.draw_force_label.setText(f"{results['draw_force']:.2f} N")
+        self.accuracy_label.setText(f"{results['accuracy_score']:.1f}")
+        self.comfort_label.setText(f"{results['comfort_score']:.1f}")
+        self.safety_label.setText(f"{results['safety_score']:.1f}")
+        self.overall_label.setText(f"{results['performance_score']:.1f}")
+        # The print estimate slices the mesh, so only this label asks for it (kept until the geometry changes)
+        settings = self.optimizer.print_settings
+        cost = self.optimizer.print_estimate(setting_value(settings['layer_height']), setting_value(settings['infill']))
+        self.print_cost_label.setText(
+            f"{cost['print_time_s'] / 60:.0f} min, {cost['filament_m']:.2f} m filament "
+            f"({settings['layer_height']}, infill {settings['infill']})")
+        
+        self.update_sensitivity_display()
+        
+        # Update sliders to match current performance values (added)
+        self.launch_speed_slider.setValue(int(results['launch_speed'] * co.SLIDER_SCALE))
+        self.draw_force_slider.setValue(int(results['draw_force'] * co.SLIDER_SCALE))
+        return results
+    
+    def update_sensitivity_display(self):
+        """Fill the sensitivity table with the elasticities of the current design"""
+        report = self.optimizer.sensitivity_report()
+        elasticity = report['elasticity']
+        for row in range(elasticity.shape[0]):
+            for column in range(elasticity.shape[1]):
+                self.sensitivity_table.setItem(row, column, QTableWidgetItem(f"{elasticity[row, column]:+.2f}"))
+        
+        knob_names = ["bow thickness", "bow curvature", "limb stiffness", "grip width", "palm size"]
+        strongest = int(np.argmax(np.abs(elasticity[1, :4])))
+        self.sensitivity_summary_label.setText(f"Draw force is most sensitive to {knob_names[strongest]}.")
+        self.sensitivity_table.setToolTip(report['model'])
+    
     def export_stl(self):
         """Export the current model to STL file"""
         try:
@@ -408,67 +758,383 @@ class BowArrowUI(QMainWindow):
             if file_dialog.exec_() == QFileDialog.Accepted:
                 file_path = file_dialog.selectedFiles()[0]
                 if file_path:
-                    exported_path = self.optimizer.export_model(file_path)
+                    report = self.optimizer.check_mesh_validity()
+                    if not report['valid']:
+                        answer = QMessageBox.question(
+                            self, "Mesh Check Failed",
+                            f"The deformed mesh is not printable:\n{describe_defects(report)}\n\nExport anyway?",
+                            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                        if answer != QMessageBox.Yes:
+                            return
+                    with self.session.action('export'), span('BowArrowUI.export_stl'):
+                        exported_path = self.optimizer.export_model(file_path, allow_invalid=True)
+                    self.show_profile_summary()
                     QMessageBox.information(self, "Export Successful", 
                                           f"Model exported to:\n{exported_path}")
         except Exception as e:
             QMessageBox.critical(self, "Export Error", 
                                f"Failed to export model: {str(e)}")
     
+    def toggle_profiling(self, enabled):
+        """Turn span recording on or off"""
+        tracer.enable(enabled)
+        self.statusBar().showMessage("Profiling enabled" if enabled else "Profiling disabled", 3000)
+    
+    def toggle_session_recording(self, enabled):
+        """Start recording the session's actions, or stop and save them for `benchmark.py replay`"""
+        if enabled:
+            self.session.start()
+            self.statusBar().showMessage("Recording session", 3000)
+            return
+        self.session.stop()
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Session", "session.json", "JSON Files (*.json)")
+        if file_path:
+            self.session.save(file_path)
+            QMessageBox.information(self, "Session Saved",
+                                  f"{len(self.session.actions)} actions written to:\n{file_path}\n"
+                                  f"Replay them with: python benchmark.py replay {os.path.basename(file_path)}")
+    
+    def parameter_inputs(self):
+        """Profile and parameter values of the controls, as recorded for apply_parameters"""
+        return {
+            'profile': self.profile_combo.currentText(),
+            'palm_size': self.palm_size_spin.value(),
+            'speed': self.speed_combo.currentText(),
+            'thickness': self.thickness_spin.value(),
+            'curvature': self.curvature_spin.value(),
+            'stiffness': self.stiffness_spin.value(),
+            'grip_width': self.grip_width_spin.value()
+        }
+    
+    def show_profile_summary(self):
+        """Show the timing breakdown of the last handler in the status bar"""
+        if tracer.enabled:
+            self.statusBar().showMessage(tracer.last_summary())
+    
+    def dump_profile_trace(self):
+        """Save the recorded spans as Chrome trace-event JSON"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Chrome Trace", "trace.json", "JSON Files (*.json)")
+        if file_path:
+            tracer.dump_chrome_trace(file_path)
+            QMessageBox.information(self, "Trace Saved", 
+                                  f"Trace written to:\n{file_path}\n"
+                                  "Open it in chrome://tracing or ui.perfetto.dev.")
+    
     def update_model_view(self):
-        """Update the 3D model display"""
+        """Update the 3D model display, re-uploading only the components that changed"""
+        with span('BowArrowUI.update_model_view'):
+            dirty = self.optimizer.take_dirty_components()
+            if len(self.mesh_items) != len(self.optimizer.components):
+                self.rebuild_model_items()
+            else:
+                self.refresh_model_items(dirty)
+    
+    def component_colors(self):
+        """Vertex colors of every component for the selected color mode"""
+        mode = self.color_mode_combo.currentText()
+        components = self.optimizer.components
+        roles = self.optimizer.component_roles()
+        if mode == 'Displacement':
+            colors, max_displacement = displacement_colors(self.optimizer.original_vertices,
+                                                           [component.vertices for component in components])
+            self.color_legend_label.setText(f"blue 0 mm \u2192 red {max_displacement:.2f} mm")
+            return colors
+        if mode == 'Region':
+            if self.region_colors is None:
+                self.region_colors = region_colors(roles, self.optimizer.original_vertices)
+            self.color_legend_label.setText("grip width (green), curvature (orange), thickness (purple), both (pink)")
+            return self.region_colors
+        self.color_legend_label.setText("")
+        return part_colors(roles, components)
+    
+    def component_view_arrays(self, index, colors, lod=False):
+        """Vertex, face and color arrays of one component (or its LOD mesh) for its own mesh item"""
+        lod_mesh = self.optimizer.level_of_detail()[index] if lod else None
+        return component_view_arrays(self.optimizer.components[index], colors[index], lod_mesh)
+    
+    def refresh_model_items(self, indices):
+        """Replace the vertex buffers of the given components' mesh items (full and LOD)"""
+        if not indices:
+            return
         try:
-            # Clear existing items (except grid which is item 0)
-            for i in range(len(self.view3d.items)-1, 0, -1):
-                self.view3d.removeItem(self.view3d.items[i])
-            
-            # Create mesh data from optimizer's current model
-            verts = []
-            faces = []
-            colors = []
+            # The heatmap scale depends on every component, so all are recolored
+            colors = self.component_colors()
+            for index in indices:
+                with span('GLMeshItem.setMeshData'):
+                    verts, faces, _ = self.component_view_arrays(index, colors)
+                    self.mesh_items[index].setMeshData(vertexes=verts, faces=faces, faceColors=colors[index])
+                    verts, faces, lod_colors = self.component_view_arrays(index, colors, lod=True)
+                    self.lod_items[index].setMeshData(vertexes=verts, faces=faces, faceColors=lod_colors)
+            if self.color_mode_combo.currentText() == 'Displacement':
+                self.set_item_colors(colors)
+        except Exception as e:
+            QMessageBox.warning(self, "Visualization Error", 
+                              f"Failed to update 3D view: {str(e)}\n"
+                              "The optimization will still work.")
+    
+    def set_item_colors(self, colors):
+        """Swap only the color arrays of the mesh items; vertices and normals are left as they are"""
+        with span('BowArrowUI.set_item_colors'):
+            lods = self.optimizer.level_of_detail()
+            for full, lod, lod_mesh, component_colors in zip(self.mesh_items, self.lod_items, lods, colors):
+                for item, item_colors in ((full, component_colors), (lod, component_colors[lod_mesh.representatives])):
+                    item_colors = np.ascontiguousarray(item_colors, dtype=np.float32)
+                    item.opts['meshdata'].setFaceColors(item_colors)
+                    # With smooth shading GLMeshItem draws its parsed colors array per vertex
+                    item.colors = item_colors
+                    item.update()
+    
+    def recolor_model_items(self):
+        """Apply the selected color mode as a color-buffer update"""
+        if self.optimizer is None or not self.mesh_items:
+            return
+        self.set_item_colors(self.component_colors())
+    
+    def rebuild_model_items(self):
+        """Replace the mesh items in the 3D view with one full and one LOD item per optimizer component"""
+        try:
+            # Clear existing mesh items (the grid and toolpath stay)
+            for item in self.mesh_items + self.lod_items:
+                self.view3d.removeItem(item)
+            self.mesh_items = []
+            self.lod_items = []
             
-            # Process each component
-            offset = 0
-            for i, component in enumerate(self.optimizer.components):
-                mesh_verts = np.array(component.vertices)
-                mesh_faces = np.array(component.faces)
-                
-                # Add vertices to the list
-                verts.append(mesh_verts)
-                
-                # Adjust face indices
-                mesh_faces = mesh_faces + offset
-                faces.append(mesh_faces)
-                
-                # Create colors for this component (different color for each component)
-                component_color = [0.7, 0.3, 0.3, 1.0] if i == 0 else [0.3, 0.5, 0.7, 1.0]
-                component_colors = np.tile(component_color, (len(mesh_verts), 1))
-                colors.append(component_colors)
-                
-                offset += len(mesh_verts)
+            # One mesh item (GPU buffer) per component, so a change re-uploads only that component
+            all_colors = self.component_colors()
+            for index in range(len(self.optimizer.components)):
+                for lod, items in ((False, self.mesh_items), (True, self.lod_items)):
+                    with span('component_view_arrays'):
+                        verts, faces, colors = self.component_view_arrays(index, all_colors, lod)
+                    
+                    # Create mesh item
+                    with span('GLMeshItem'):
+                        mesh = gl.GLMeshItem(
+                            vertexes=verts, 
+                            faces=faces, 
+                            faceColors=colors,
+                            smooth=True,
+                            drawEdges=True
+                        )
+                        mesh.setVisible(lod == self.lod_active)
+                        self.view3d.addItem(mesh)
+                    items.append(mesh)
             
-            # Combine all arrays
-            if verts:
-                verts = np.vstack(verts)
-                faces = np.vstack(faces) if faces else np.array([])
-                colors = np.vstack(colors) if colors else np.array([])
-                
-                # Create mesh item
-                mesh = gl.GLMeshItem(
-                    vertexes=verts, 
-                    faces=faces, 
-                    faceColors=colors,
-                    smooth=True,
-                    drawEdges=True
-                )
-                self.view3d.addItem(mesh)
-                
-                # Center view
-                self.view3d.setCameraPosition(distance=150)
+            # Center view
+            self.view3d.setCameraPosition(distance=150)
         except Exception as e:
+            self.mesh_items = []
+            self.lod_items = []
             QMessageBox.warning(self, "Visualization Error", 
                               f"Failed to update 3D view: {str(e)}\n"
                               "The optimization will still work.")
+    
+    def set_lod_active(self, active):
+        """Show the LOD items instead of the full-resolution ones (or back)"""
+        if active == self.lod_active:
+            return
+        self.lod_active = active
+        for full, lod in zip(self.mesh_items, self.lod_items):
+            full.setVisible(not active)
+            lod.setVisible(active)
+    
+    def on_view_interaction(self):
+        """Draw the LOD meshes while the camera moves"""
+        if self.lod_items:
+            self.set_lod_active(True)
+            self.lod_idle_timer.start()
+    
+    def show_full_resolution(self):
+        if self.preview_colors is not None:
+            # The preview ended: show the model the optimizer holds (and exports) again, on both item sets
+            with span('BowArrowUI.preview_full_resolution'):
+                self.preview_colors = None
+                self.refresh_model_items(range(len(self.mesh_items)))
+        self.set_lod_active(False)
+    
+    def schedule_preview(self):
+        """Coalesce scrubbing events into at most one preview frame per PREVIEW_INTERVAL_MS"""
+        if self.optimizer is None or not self.lod_items:
+            return
+        if not self.preview_timer.isActive():
+            self.preview_timer.start()
+    
+    def draw_fraction(self):
+        return self.draw_slider.value() / 100.0
+    
+    def preview_parameter_vertices(self):
+        """Vertices of every component for the spin box values and the draw slider (model unchanged)"""
+        return self.optimizer.preview_vertices(self.thickness_spin.value(), self.curvature_spin.value(),
+                                               self.grip_width_spin.value(), self.draw_fraction())
+    
+    def show_preview(self):
+        """Draw the previewed geometry on the LOD items; full resolution follows once scrubbing stops"""
+        inputs = dict(self.parameter_inputs(), draw_fraction=self.draw_fraction())
+        with self.session.action('preview', **inputs):
+            with span('BowArrowUI.show_preview'):
+                if self.preview_colors is None:
+                    self.preview_colors = self.component_colors()
+                vertices = self.preview_parameter_vertices()
+                for index, lod_mesh in enumerate(self.optimizer.level_of_detail()):
+                    self.lod_items[index].setMeshData(vertexes=lod_mesh.vertices(vertices[index]), faces=lod_mesh.faces,
+                                                      faceColors=self.preview_colors[index][lod_mesh.representatives])
+                self.set_lod_active(True)
+                self.lod_idle_timer.start()
+        
+            # Draw force grows linearly with the draw (the limbs act as a spring)
+            fraction = self.draw_fraction()
+            if fraction > 0:
+                force = self.optimizer.estimate_draw_force(self.thickness_spin.value(), self.curvature_spin.value(),
+                                                           self.stiffness_spin.value(), self.grip_width_spin.value())
+                self.draw_force_preview_label.setText(f"{force * fraction:.2f} N at {fraction * 100:.0f}%")
+            else:
+                self.draw_force_preview_label.setText("")
+    
+    def toggle_draw_animation(self, running):
+        """Start or stop drawing the bow back and forth"""
+        if running:
+            self.draw_direction = 1
+            self.draw_timer.start()
+        else:
+            self.draw_timer.stop()
+            self.draw_slider.setValue(0)
+    
+    def advance_draw_animation(self):
+        """Step the draw slider by one frame, reversing at rest and at full draw"""
+        value = self.draw_slider.value() + self.draw_direction * max(1, round(100 / co.DRAW_ANIMATION_FRAMES))
+        if value >= 100 or value <= 0:
+            self.draw_direction = -self.draw_direction
+        self.draw_slider.setValue(min(max(value, 0), 100))
+
+    def undo_design(self):
+        """Step back in the design history"""
+        if self.optimizer is not None:
+            with self.session.action('undo'):
+                self.show_history_step(self.optimizer.undo(), "Undo")
+    
+    def redo_design(self):
+        """Step forward in the design history"""
+        if self.optimizer is not None:
+            with self.session.action('redo'):
+                self.show_history_step(self.optimizer.redo(), "Redo")
+    
+    def show_history_step(self, step, action):
+        """Show a restored step's parameters right away (the LOD preview follows the spin boxes);
+        the full model and metrics are rebuilt once stepping pauses for HISTORY_REBUILD_MS"""
+        if step is None:
+            return
+        with span('BowArrowUI.show_history_step'):
+            state = step['state']
+            for widget, value in ((self.profile_combo, state['current_user']), (self.speed_combo, state['preferred_speed'])):
+                widget.blockSignals(True)
+                widget.setCurrentText(value)
+                widget.blockSignals(False)
+            self.palm_size_spin.blockSignals(True)
+            self.palm_size_spin.setValue(state['palm_size'])
+            self.palm_size_spin.blockSignals(False)
+            self.update_parameter_displays()
+            self.schedule_preview()
+            self.update_history_actions()
+        self.statusBar().showMessage(f"{action}: {step['label']}", 5000)
+        self.history_timer.start()
+    
+    def show_history_geometry(self):
+        """Rebuild the restored design's geometry and refresh the view and metrics"""
+        with self.session.action('history_rebuild'), span('BowArrowUI.show_history_geometry'):
+            self.update_model_view()
+            self.update_performance_displays()
+    
+    def update_history_actions(self):
+        """Enable the undo/redo actions and name the steps they would undo or redo"""
+        history = self.optimizer.history if self.optimizer is not None else None
+        undo_label = history.undo_label() if history is not None else None
+        redo_label = history.redo_label() if history is not None else None
+        self.undo_action.setEnabled(undo_label is not None)
+        self.undo_action.setText(f"Undo {undo_label}" if undo_label else "Undo")
+        self.redo_action.setEnabled(redo_label is not None)
+        self.redo_action.setText(f"Redo {redo_label}" if redo_label else "Redo")
+    
+    def load_toolpath(self):
+        """Stream a G-code file into the view beside the model, layer by layer"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Load G-code", "3DPrint", "G-code Files (*.gcode)")
+        if not file_path:
+            return
+        self.clear_toolpath()
+        bounds = gcode_header(file_path).get('bounds')
+        self.toolpath_offset = self.toolpath_placement(bounds) if bounds is not None else None
+        self.toolpath_stats = {'name': os.path.basename(file_path), 'moves': 0, 'segments': 0,
+                               'start': time.perf_counter()}
+        self.toolpath_loader = ToolpathLoader(file_path)
+        self.toolpath_loader.layer_loaded.connect(self.on_toolpath_layer)
+        self.toolpath_loader.failed.connect(lambda message: QMessageBox.warning(
+            self, "G-code Error", f"Failed to read G-code: {message}"))
+        self.toolpath_loader.finished.connect(self.on_toolpath_finished)
+        self.toolpath_loader.start()
+        self.statusBar().showMessage(f"Loading {self.toolpath_stats['name']}...")
+    
+    def toolpath_placement(self, bounds):
+        """Translation that puts a print with these printer-coordinate bounds beside the model, on its base"""
+        vertices = np.vstack([component.vertices for component in self.optimizer.components])
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+        (min_x, min_y, min_z), (max_x, max_y, _) = bounds
+        return (high[0] + co.TOOLPATH_VIEW_GAP - min_x, (low[1] + high[1]) / 2 - (min_y + max_y) / 2, low[2] - min_z)
+    
+    def on_toolpath_layer(self, layer):
+        """Upload one parsed layer as its own line item; the range sliders grow with the file"""
+        if self.sender() is not self.toolpath_loader:
+            return  # queued by a load that was cleared
+        if self.toolpath_offset is None:
+            # No bounds in the header: place the print by its first layer
+            positions = layer['positions']
+            if not len(positions):
+                return
+            self.toolpath_offset = self.toolpath_placement([positions.min(axis=0), positions.max(axis=0)])
+        with span('GLLinePlotItem'):
+            item = gl.GLLinePlotItem(pos=layer['positions'], color=layer['colors'], mode='lines', width=1.0,
+                                     antialias=False)
+            item.translate(*self.toolpath_offset)
+            self.view3d.addItem(item)
+        self.toolpath_items.append(item)
+        self.toolpath_stats['moves'] += layer['moves']
+        self.toolpath_stats['segments'] += layer['segments']
+        
+        # Follow the loading layers unless a lower top layer was picked
+        following = self.layer_last_slider.value() == self.layer_last_slider.maximum()
+        top = len(self.toolpath_items) - 1
+        for slider in (self.layer_first_slider, self.layer_last_slider):
+            slider.setMaximum(top)
+        if following:
+            self.layer_last_slider.setValue(top)
+        self.update_toolpath_range()
+    
+    def on_toolpath_finished(self):
+        stats = self.toolpath_stats
+        if self.sender() is not self.toolpath_loader:
+            return
+        self.toolpath_loader = None
+        self.statusBar().showMessage(
+            f"{stats['name']}: {len(self.toolpath_items)} layers, {stats['moves']} moves drawn as {stats['segments']} "
+            f"segments ({time.perf_counter() - stats['start']:.2f} s)", 10000)
+    
+    def update_toolpath_range(self):
+        """Show only the layers between the two sliders (visibility only, nothing is parsed again)"""
+        first, last = sorted((self.layer_first_slider.value(), self.layer_last_slider.value()))
+        for index, item in enumerate(self.toolpath_items):
+            item.setVisible(first <= index <= last)
+        self.layer_range_label.setText(f"{first}\u2013{last} of {len(self.toolpath_items)}" if self.toolpath_items else "")
+    
+    def clear_toolpath(self):
+        """Stop any running G-code load and remove the toolpath from the view"""
+        if self.toolpath_loader is not None:
+            self.toolpath_loader.requestInterruption()
+            self.toolpath_loader.wait()
+            self.toolpath_loader = None
+        for item in self.toolpath_items:
+            self.view3d.removeItem(item)
+        self.toolpath_items = []
+        self.toolpath_stats = None
+        for slider in (self.layer_first_slider, self.layer_last_slider):
+            slider.setRange(0, 0)
+        self.layer_range_label.setText("")
 
 def main():
     # Make sure required directories exist
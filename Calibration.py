@@ -0,0 +1,150 @@
+import csv
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import Constants as co
+
+# Columns of the measurement CSV; either measurement may be left empty on a row
+MEASUREMENT_COLUMNS = ['model', 'bow_thickness', 'bow_curvature', 'limb_stiffness', 'grip_width',
+                       'measured_draw_force', 'measured_launch_speed']
+
+PROFILE_PATTERN = re.compile(r'constants_v(\d+)\.json$')
+
+
+def load_measurements(path):
+    """Read measured draw forces (N) and launch speeds (m/s) of printed bows into arrays"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in MEASUREMENT_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Measurement file is missing columns: {', '.join(missing)}")
+        rows = [row for row in reader if row['model'].strip()]
+
+    def column(name):
+        return np.array([float(row[name]) if row[name].strip() else np.nan for row in rows])
+
+    return {
+        'model': [row['model'].strip() for row in rows],
+        'bow_thickness': column('bow_thickness'),
+        'bow_curvature': column('bow_curvature'),
+        'limb_stiffness': column('limb_stiffness'),
+        'grip_width': column('grip_width'),
+        'draw_force': column('measured_draw_force'),
+        'launch_speed': column('measured_launch_speed')
+    }
+
+
+def fit_constants(optimizer, measurements, fit='empirical_corrective_factor'):
+    """Fit the force-model constants to measurements with one vectorized least-squares solve.
+
+    The beam model is linear in the product E * k of Young's modulus and the empirical
+    corrective factor, and the squared launch speed is linear in the force, so both kinds of
+    measurement give linear equations in E * k. Residuals are relative, so forces and speeds
+    weigh equally. Only the product is identifiable: fit='empirical_corrective_factor' keeps
+    the optimizer's Young's modulus and solves for k, fit='youngs_modulus' does the opposite.
+    """
+    if fit not in ('empirical_corrective_factor', 'youngs_modulus'):
+        raise ValueError(f"Unknown constant to fit: {fit}")
+
+    parameters = [measurements[name] for name in ('bow_thickness', 'bow_curvature', 'limb_stiffness', 'grip_width')]
+    current_product = optimizer.youngs_modulus * optimizer.empirical_corrective_factor
+    # Model predictions per unit of E * k
+    force_per_unit = optimizer.estimate_draw_force(*parameters) / current_product
+    speed_squared_per_unit = optimizer.estimate_launch_speed(*parameters)**2 / current_product
+
+    force = measurements['draw_force']
+    speed_squared = measurements['launch_speed']**2
+    has_force = ~np.isnan(force)
+    has_speed = ~np.isnan(speed_squared)
+    if not has_force.any() and not has_speed.any():
+        raise ValueError("No draw force or launch speed measurements to fit")
+
+    # Relative residuals: (p * g_i - y_i) / y_i  ->  rows g_i / y_i, right-hand side 1
+    design = np.concatenate([force_per_unit[has_force] / force[has_force],
+                             speed_squared_per_unit[has_speed] / speed_squared[has_speed]])[:, None]
+    target = np.ones(len(design))
+    (product,), _, _, _ = np.linalg.lstsq(design, target, rcond=None)
+    if product <= 0:
+        raise ValueError("Least-squares fit produced a non-positive stiffness; check the measurements")
+
+    if fit == 'empirical_corrective_factor':
+        youngs_modulus = optimizer.youngs_modulus
+        empirical_corrective_factor = product / youngs_modulus
+    else:
+        empirical_corrective_factor = optimizer.empirical_corrective_factor
+        youngs_modulus = product / empirical_corrective_factor
+
+    force_error = product * force_per_unit[has_force] / force[has_force] - 1.0
+    speed_error = np.sqrt(product * speed_squared_per_unit[has_speed] / speed_squared[has_speed]) - 1.0
+
+    def rms(values):
+        return float(np.sqrt(np.mean(values**2))) if len(values) else None
+
+    return {
+        'fitted': fit,
+        'youngs_modulus': float(youngs_modulus),
+        'empirical_corrective_factor': float(empirical_corrective_factor),
+        'rows': len(measurements['model']),
+        'force_measurements': int(has_force.sum()),
+        'speed_measurements': int(has_speed.sum()),
+        'force_rms_relative_error': rms(force_error),
+        'speed_rms_relative_error': rms(speed_error),
+        'per_model': [
+            {
+                'model': model,
+                'predicted_draw_force': float(product * force_per_unit[i]),
+                'measured_draw_force': None if np.isnan(force[i]) else float(force[i]),
+                'predicted_launch_speed': float(np.sqrt(product * speed_squared_per_unit[i])),
+                'measured_launch_speed': None if np.isnan(speed_squared[i]) else float(np.sqrt(speed_squared[i]))
+            }
+            for i, model in enumerate(measurements['model'])
+        ]
+    }
+
+
+def profile_paths(directory=co.CONSTANTS_PROFILE_DIR):
+    """Constants profiles in directory as (version, path), oldest first"""
+    found = []
+    for path in glob.glob(os.path.join(directory, 'constants_v*.json')):
+        match = PROFILE_PATTERN.search(os.path.basename(path))
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+
+def write_constants_profile(fit_result, measurements_path, directory=co.CONSTANTS_PROFILE_DIR):
+    """Write the fit as the next versioned constants profile and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    existing = profile_paths(directory)
+    version = existing[-1][0] + 1 if existing else 1
+    with open(measurements_path, 'rb') as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+
+    profile = {
+        'version': version,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'source': os.path.basename(measurements_path),
+        'source_sha256': source_hash,
+        **fit_result
+    }
+    path = os.path.join(directory, f'constants_v{version:03d}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def load_constants_profile(path=None, directory=co.CONSTANTS_PROFILE_DIR):
+    """Load a constants profile (the latest version in directory by default), or None if there is none"""
+    if path is None:
+        existing = profile_paths(directory)
+        if not existing:
+            return None
+        path = existing[-1][1]
+    with open(path, encoding='utf-8') as f:
+        profile = json.load(f)
+    profile['path'] = path
+    return profile
@@ -40,6 +40,8 @@ MAX_ARROW_LENGTH = 80.0  # mm
 DEFAULT_ARROW_LENGTH = 60.0  # mm
 DEFAULT_ARROW_WEIGHT = 1.0  # g
 DEFAULT_ARROW_TIP_DIAMETER = 8.0  # mm
+MIN_ARROW_TIP_DIAMETER = 4.0  # mm
+MAX_ARROW_TIP_DIAMETER = 12.0  # mm
 DEFAULT_ARROW_TIP_LENGTH = 5.0  # mm
 DEFAULT_DISTANCE_ARROW_PUSHED = 1.0  # mm
 
@@ -47,4 +49,110 @@ DEFAULT_DISTANCE_ARROW_PUSHED = 1.0  # mm
 SLIDER_SCALE = 10.0
 SINGLE_STEP_DISTANCE = 0.5  # mm
 SINGLE_STEP_STIFFNESS = 0.05  
-SINGLE_STEP_CURVATURE = 0.01
\ No newline at end of file
+SINGLE_STEP_CURVATURE = 0.01
+SINGLE_STEP_PALM_SIZE = 1.0  # mm
+
+# optimization result cache info
+RESULT_CACHE_PATH = "cache/optimization_results.sqlite"
+RESULT_CACHE_MAX_ENTRIES = 5000
+RESULT_CACHE_DECIMALS = 6  # floats are rounded to this many decimals when building keys
+
+# warm-start index info
+WARM_START_MAX_ENTRIES = 2000
+WARM_START_PROFILE_WEIGHT = 10.0  # keeps solutions of other profiles far away in feature space
+
+# constrained optimization info
+CONSTRAINT_TOLERANCE = 1e-3  # relative residual above which a locked target counts as not met
+
+# calibration info
+CONSTANTS_PROFILE_DIR = "calibration"  # versioned constants profiles written by calibrate.py
+
+# profiling info
+PROFILE_MAX_EVENTS = 100000  # oldest spans are dropped beyond this
+
+# variant catalogue info
+VARIANT_OUTPUT_DIR = "catalogue"  # STL files and manifest written by make_catalogue.py
+VARIANT_MANIFEST_NAME = "manifest.json"
+
+# component classification and deformation info
+ARROW_ELONGATION_RATIO = 2.0  # main-axis spread over second-axis spread above which a component is an arrow
+DEFORM_WORKERS = 4  # threads deforming independent components concurrently
+
+# level-of-detail viewer info
+LOD_VERTEX_RATIO = 0.25  # LOD meshes keep about this fraction of each component's vertices
+LOD_IDLE_MS = 300  # full resolution is restored this long after the last camera interaction
+
+# printed mass info (fitted to the filament use of the bundled 3DPrint/*.gcode files)
+PRINT_MATERIAL_DENSITY = 1.24  # g/cm^3, PLA
+PRINT_INFILL = 0.10  # sparse infill fraction of the bundled prints
+PRINT_WALL_THICKNESS = 0.4  # mm, one 0.4 mm wall line
+ARROW_TIP_SCALE_RANGE = (0.25, 3.0)  # tip diameter / default covered by the arrow area table
+ARROW_AREA_TABLE_POINTS = 256
+
+# blend-shape preview info
+DRAW_FLEX_CURVATURE = 6.0  # extra limb curvature factor at full draw in the draw animation (limb tips move ~6 mm)
+DRAW_ANIMATION_FRAMES = 30  # frames of one draw in the animation
+PREVIEW_INTERVAL_MS = 16  # parameter scrubbing redraws at most this often (~60 FPS)
+
+# reverse shape fit info
+FIT_FACTOR_BOUNDS = {  # searched range of each observable scale factor (parameter / default)
+    'thickness_factor': (0.5, 3.0),
+    'curvature_factor': (-5.0, 5.0),
+    'grip_scale': (0.5, 2.0)
+}
+FIT_GRID_POINTS = 7  # coarse grid points per factor
+FIT_SAMPLE_POINTS = 800  # vertices per shape scored in the coarse grid
+FIT_REFINE_STARTS = 2  # best grid points refined concurrently
+FIT_TOLERANCE_MM = 0.05  # Chamfer distance above which the target is not a deformation of the base model
+
+# flexure beam analysis info
+BEAM_SLICE_PLANES = 400  # lines across the bow the mid-height section is sliced at
+BEAM_MAX_WIDTH = 2.0  # mm, material intervals thinner than this are beam cross-sections
+BEAM_MIN_COUNT = 3  # a line crossing at least this many beams is inside a beam group
+# Beams of the reference bow (models/Bow.stl) as measured by BeamAnalysis.measure_beams; the beam
+# constants above and the corrective factor describe this bow, other bows scale by their measurements
+REFERENCE_BEAM_COUNT = 20
+REFERENCE_BEAM_THICKNESS = 0.8000708346457784  # mm
+REFERENCE_BEAM_WIDTH = 8.0  # mm
+REFERENCE_BEAM_SPAN = 34.137157107231914  # mm
+REFERENCE_BEAM_OFFSET = 6.001547107069037  # mm
+
+# mesh validity check info
+MESH_MIN_WALL_THICKNESS = 0.4  # mm, walls thinner than one extrusion line cannot be printed
+MESH_DEFECT_TOLERANCE = 0.4  # mm, smaller crossings, folds and thin slivers (one extrusion line) do not fail the check
+BVH_LEAF_SIZE = 4  # faces per leaf of the validity check's bounding-volume hierarchy
+MESH_CHECK_CACHE_DIR = "cache/mesh_check"  # candidate face pairs of the validity check, per mesh
+
+# print time and filament estimate info (Cura settings of the bundled 3DPrint/*.gcode prints on an Anycubic Kobra 2;
+# the wall, speed, travel and time constants are PrintEstimate.calibrate_print_constants() of the four bow prints)
+PRINT_LAYER_HEIGHT = 0.4  # mm, used when no layer height is given
+PRINT_FIRST_LAYER_HEIGHT = 0.3  # mm
+PRINT_LINE_WIDTH = 0.4  # mm, skin and infill lines
+PRINT_WALL_LINE_WIDTH = 0.49  # mm, mean width of the single wall line (widened on thin features)
+PRINT_WALL_PATH_RATIO = 0.67  # wall path length / section perimeter (thin flexure beams get one center line, not two)
+PRINT_TOP_BOTTOM_THICKNESS = 0.8  # mm of solid skin at the top and bottom
+PRINT_SPEEDS = {'wall': 32.0, 'skin': 38.0, 'infill': 80.0, 'travel': 124.0}  # mm/s, mean feed rates in the G-code
+PRINT_TRAVEL_RATIO = 0.64  # travel length / wall length
+PRINT_TIME_FACTOR = 1.29  # Cura's time / feed-rate time (acceleration, retractions, layer changes), fitted to the bow prints
+FILAMENT_DIAMETER = 1.75  # mm
+
+# G-code toolpath preview info
+TOOLPATH_DECIMATION_TOLERANCE = 0.05  # mm (an eighth of a 0.4 mm line), chained moves are merged while the drawn path moves less than this
+TOOLPATH_DECIMATION_PASSES = 32  # merge passes per layer (each pass halves the mergeable chains)
+TOOLPATH_VIEW_GAP = 10.0  # mm between the model and the toolpath shown beside it
+
+# design history info
+HISTORY_MAX_ENTRIES = 500  # undo steps kept (parameter records only, a few hundred bytes each)
+HISTORY_REBUILD_MS = 150  # the geometry is rebuilt once undo/redo stepping pauses this long
+
+# population fit study info
+POPULATION_PALM_SIZES = {'Child': (65.0, 6.0), 'Adult': (88.0, 7.0), 'Professional': (90.0, 7.0)}  # mm, mean and standard deviation per profile
+POPULATION_SIZE = 100000  # sampled users per profile
+POPULATION_COVERAGE = 0.95  # fraction of the users the chosen grip sizes must fit
+POPULATION_GRIP_STEP = 0.5  # mm between candidate grip widths
+POPULATION_MAX_SIZES = 5  # largest grip size set searched
+POPULATION_COMFORT_TOLERANCE = 2.0  # comfort points a fitting size may be below the user's best candidate
+POPULATION_MIN_SAFETY = 50.0  # safety score a fitting size must reach
+
+# design screening info
+SCREEN_CANDIDATES = 4096  # random designs scored by optimize_score()
@@ -0,0 +1,213 @@
+import numpy as np
+import Constants as co
+from RecomputeGraph import RecomputeGraph
+
+# Regions of the bow body in units of the half-length from the bow's x-center
+GRIP_REGION = 0.3                  # |rel_x| < 0.3 is the grip, the rest are limbs
+POWER_REGION = (-0.5, 0.2)         # grip's power region, thickened on the +z side
+
+
+# Each scale factor is its design parameter relative to the default
+FACTOR_PARAMETERS = {
+    'thickness_factor': ('bow_thickness', co.DEFAULT_BOW_THICKNESS),
+    'curvature_factor': ('bow_curvature', co.DEFAULT_BOW_CURVATURE),
+    'grip_scale': ('grip_width', co.DEFAULT_GRIP_WIDTH),
+    'arrow_scale': ('arrow_length', co.DEFAULT_ARROW_LENGTH),
+    'tip_scale': ('tip_diameter', co.DEFAULT_ARROW_TIP_DIAMETER)
+}
+
+
+def deformation_factors(bow_thickness, bow_curvature, grip_width, arrow_length, tip_diameter):
+    """Scale factors apply_geometry_update derives from the design parameters"""
+    parameters = {
+        'bow_thickness': bow_thickness,
+        'bow_curvature': bow_curvature,
+        'grip_width': grip_width,
+        'arrow_length': arrow_length,
+        'tip_diameter': tip_diameter
+    }
+    return {factor: parameters[name] / default for factor, (name, default) in FACTOR_PARAMETERS.items()}
+
+
+def classify_components(vertex_arrays, elongation=co.ARROW_ELONGATION_RATIO):
+    """Role ('bow' or 'arrow') of each component, from its shape.
+
+    Arrows are slender: their spread along the main axis is several times the spread across
+    it (about 2.8x for the bundled arrows), while the flat bows spread over two axes (1.2-1.7x).
+    """
+    roles = []
+    for vertices in vertex_arrays:
+        # Singular values of the centered vertices are the spreads along the principal axes
+        spread = np.linalg.svd(vertices - vertices.mean(axis=0), compute_uv=False)
+        roles.append('arrow' if len(spread) < 2 or spread[0] >= elongation * spread[1] else 'bow')
+    return roles
+
+
+def bow_y_center(original_bow_vertices):
+    """Center line the grip is scaled about (arrows are scaled about it too)"""
+    return np.mean(original_bow_vertices[:, 1])
+
+
+def reference_y_center(roles, original_vertices):
+    """y center arrows are scaled about: the first bow's, or None (each arrow's own) without a bow"""
+    for role, original in zip(roles, original_vertices):
+        if role == 'bow':
+            return bow_y_center(original)
+    return None
+
+
+def deform_bow(original, thickness_factor, curvature_factor, grip_scale, out=None):
+    """Curvature, grip width and thickness edits of the bow body on raw vertex arrays.
+
+    original is never modified; the result is written to out (allocated when None).
+    """
+    if out is None:
+        out = np.empty_like(original)
+    out[:] = original
+
+    # 1. Calculate bow position - assume x-center is bow midpoint
+    x_min, x_max = np.min(original[:, 0]), np.max(original[:, 0])
+    bow_center_x = (x_min + x_max) / 2
+    rel_x = (original[:, 0] - bow_center_x) / ((x_max - x_min) / 2)
+
+    # 2. Apply curvature to bow limbs (quadratic, stronger at the limb ends, not the grip)
+    limbs = np.abs(rel_x) > GRIP_REGION
+    out[limbs, 2] += curvature_factor * rel_x[limbs]**2
+
+    # 3. Apply grip width adjustment (scale central portion in y-direction)
+    y_center = bow_y_center(original)
+    grip = np.abs(rel_x) < GRIP_REGION
+    out[grip, 1] = y_center + (original[grip, 1] - y_center) * grip_scale
+
+    # 4. Apply thickness scaling in the grip's power region, only on the +z side for easier printing
+    power = (rel_x < POWER_REGION[1]) & (rel_x > POWER_REGION[0]) & (out[:, 2] >= 0)
+    out[power, 2] *= thickness_factor
+    return out
+
+
+def deform_arrow(original, arrow_scale, tip_scale, y_center, out=None):
+    """Length and tip edits of an arrow on raw vertex arrays (scaled about the bow's y center)"""
+    if out is None:
+        out = np.empty_like(original)
+    if y_center is None:
+        y_center = np.mean(original[:, 1])
+
+    # Scale length from the arrow's x-center (arrow lies primarily along the x-axis)
+    x_min, x_max = np.min(original[:, 0]), np.max(original[:, 0])
+    arrow_center_x = (x_min + x_max) / 2
+    out[:, 0] = arrow_center_x + (original[:, 0] - arrow_center_x) * arrow_scale
+
+    # Simplified tip adjustment - uniform scaling of y and z
+    out[:, 1] = (original[:, 1] - y_center) * tip_scale + y_center
+    out[:, 2] = original[:, 2] * tip_scale
+    return out
+
+
+def deform_component(role, original, factors, y_center, out=None):
+    """Deform one component according to its role with the factors of deformation_factors()"""
+    if role == 'bow':
+        return deform_bow(original, factors['thickness_factor'], factors['curvature_factor'],
+                          factors['grip_scale'], out=out)
+    if role == 'arrow':
+        return deform_arrow(original, factors['arrow_scale'], factors['tip_scale'], y_center, out=out)
+    if out is None:
+        return original.copy()
+    out[:] = original
+    return out
+
+
+def bow_regions(original):
+    """Vertex index sets of the bow regions deform_bow edits, so each can be rewritten alone.
+
+    grip: y scaled by the grip width. Limb and power-region z: limb_z depends on the curvature,
+    power_z on the thickness and limb_power_z (their overlap) on both.
+    """
+    x_min, x_max = np.min(original[:, 0]), np.max(original[:, 0])
+    rel_x = (original[:, 0] - (x_min + x_max) / 2) / ((x_max - x_min) / 2)
+    limbs = np.abs(rel_x) > GRIP_REGION
+    power = (rel_x < POWER_REGION[1]) & (rel_x > POWER_REGION[0])
+    return {
+        'y_center': bow_y_center(original),
+        'rel_x_squared': rel_x**2,
+        'grip': np.flatnonzero(np.abs(rel_x) < GRIP_REGION),
+        'limb_z': np.flatnonzero(limbs & ~power),
+        'power_z': np.flatnonzero(power & ~limbs),
+        'limb_power_z': np.flatnonzero(limbs & power)
+    }
+
+
+def bow_region_z(original, regions, region, curvature_factor, thickness_factor):
+    """z of one bow region, computed exactly like deform_bow does"""
+    indices = regions[region]
+    z = original[indices, 2]
+    if region != 'power_z':
+        z = z + curvature_factor * regions['rel_x_squared'][indices]
+    if region != 'limb_z':
+        z = np.where(z >= 0, z * thickness_factor, z)
+    return z
+
+
+def _add_bow_sinks(graph, sink_components, i, component, original):
+    regions = bow_regions(original)
+
+    def write_z(region, curvature_factor=None, thickness_factor=None):
+        component.vertices[regions[region], 2] = bow_region_z(original, regions, region,
+                                                              curvature_factor, thickness_factor)
+
+    def grip_y(grip_scale):
+        indices = regions['grip']
+        y_center = regions['y_center']
+        component.vertices[indices, 1] = y_center + (original[indices, 1] - y_center) * grip_scale
+
+    sinks = {
+        'grip_y': (['grip_scale'], grip_y),
+        'limb_z': (['curvature_factor'], lambda curvature_factor: write_z('limb_z', curvature_factor)),
+        'power_z': (['thickness_factor'], lambda thickness_factor: write_z('power_z', None, thickness_factor)),
+        'limb_power_z': (['curvature_factor', 'thickness_factor'],
+                         lambda curvature_factor, thickness_factor: write_z('limb_power_z', curvature_factor,
+                                                                            thickness_factor))
+    }
+    for region, (dependencies, function) in sinks.items():
+        graph.add_node(f'bow[{i}].{region}', dependencies, function, sink=True)
+        sink_components[f'bow[{i}].{region}'] = i
+
+
+def _add_arrow_sinks(graph, sink_components, i, component, original, y_center):
+    x_min, x_max = np.min(original[:, 0]), np.max(original[:, 0])
+    arrow_center_x = (x_min + x_max) / 2
+    if y_center is None:
+        y_center = np.mean(original[:, 1])
+
+    def length_x(arrow_scale):
+        component.vertices[:, 0] = arrow_center_x + (original[:, 0] - arrow_center_x) * arrow_scale
+
+    def tip_yz(tip_scale):
+        component.vertices[:, 1:] = np.column_stack([(original[:, 1] - y_center) * tip_scale + y_center,
+                                                     original[:, 2] * tip_scale])
+
+    graph.add_node(f'arrow[{i}].length_x', ['arrow_scale'], length_x, sink=True)
+    graph.add_node(f'arrow[{i}].tip_yz', ['tip_scale'], tip_yz, sink=True)
+    sink_components[f'arrow[{i}].length_x'] = i
+    sink_components[f'arrow[{i}].tip_yz'] = i
+
+
+def geometry_graph(components, roles, original_vertices):
+    """Recompute graph from the design parameters to per-region rewrites of the component vertices.
+
+    Inputs are the parameters of deformation_factors(); each sink rewrites one region of one
+    component in place (e.g. only a bow's grip y for a grip width change, only the arrows for
+    an arrow change). Returns (graph, sink_components) mapping each sink to its component index.
+    """
+    graph = RecomputeGraph()
+    for factor, (name, default) in FACTOR_PARAMETERS.items():
+        graph.add_input(name)
+        graph.add_node(factor, [name], lambda value, default=default: value / default)
+
+    y_center = reference_y_center(roles, original_vertices)
+    sink_components = {}
+    for i, (role, component, original) in enumerate(zip(roles, components, original_vertices)):
+        if role == 'bow':
+            _add_bow_sinks(graph, sink_components, i, component, original)
+        elif role == 'arrow':
+            _add_arrow_sinks(graph, sink_components, i, component, original, y_center)
+    return graph, sink_components
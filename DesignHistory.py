@@ -0,0 +1,65 @@
+from collections import deque
+import Constants as co
+
+# Optimizer attributes that make up a design: its parameters and the profile context they were chosen in
+STATE_ATTRIBUTES = ['current_user', 'palm_size', 'preferred_speed', 'bow_thickness', 'bow_curvature',
+                    'limb_stiffness', 'grip_width', 'arrow_length', 'arrow_weight', 'tip_diameter', 'tip_length']
+
+
+class DesignHistory:
+    """Undo/redo over design states, storing parameter records only (never vertices).
+
+    A step is a label and the STATE_ATTRIBUTES values as a tuple (a few hundred bytes); the
+    geometry of any step is regenerated from the cached base mesh by apply_geometry_update(),
+    which rewrites regions from the original vertices and so never accumulates. At most
+    max_entries steps are kept, the oldest are dropped first. Recording after an undo
+    discards the redo steps.
+    """
+
+    def __init__(self, max_entries=co.HISTORY_MAX_ENTRIES):
+        self.entries = deque(maxlen=max_entries)
+        self.position = -1
+
+    def record(self, state, label):
+        """Add a step after the current one; returns False if the state equals the current step's"""
+        values = tuple(state[name] for name in STATE_ATTRIBUTES)
+        if self.position >= 0 and self.entries[self.position][1] == values:
+            return False
+        while len(self.entries) > self.position + 1:
+            self.entries.pop()
+        self.entries.append((label, values))
+        self.position = len(self.entries) - 1
+        return True
+
+    def step(self, index):
+        """Label and state dict of a kept step"""
+        label, values = self.entries[index]
+        return {'label': label, 'state': dict(zip(STATE_ATTRIBUTES, values))}
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries) - 1
+
+    def undo(self):
+        """Step back: the previous step, or None at the oldest kept step"""
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        return self.step(self.position)
+
+    def redo(self):
+        """Step forward again: the next step, or None at the newest"""
+        if not self.can_redo():
+            return None
+        self.position += 1
+        return self.step(self.position)
+
+    def undo_label(self):
+        """Label of the step an undo would leave (the current one), or None"""
+        return self.entries[self.position][0] if self.can_undo() else None
+
+    def redo_label(self):
+        """Label of the step a redo would return to, or None"""
+        return self.entries[self.position + 1][0] if self.can_redo() else None
@@ -0,0 +1,78 @@
+import numpy as np
+import Constants as co
+
+
+class LodMesh:
+    """Simplified copy of one component built by vertex clustering.
+
+    Every LOD vertex is one of the original vertices (the one closest to its cluster's mean),
+    so the deformed LOD is just vertices[representatives] of the deformed full mesh.
+    cluster maps every original vertex to its LOD vertex.
+    """
+
+    def __init__(self, representatives, faces, cluster):
+        self.representatives = representatives
+        self.faces = faces
+        self.cluster = cluster
+
+    def vertices(self, full_vertices):
+        """LOD vertex positions of the (deformed) full-resolution vertices"""
+        return np.asarray(full_vertices)[self.representatives]
+
+    def __len__(self):
+        return len(self.representatives)
+
+
+def cluster_vertices(vertices, cell_size):
+    """Cluster index of every vertex on a uniform grid, and the number of clusters"""
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    # One integer key per cell (much faster to unique than rows)
+    shape = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    return cluster, int(cluster.max()) + 1
+
+
+def build_lod(vertices, faces, ratio=co.LOD_VERTEX_RATIO, iterations=12):
+    """Vertex-clustering simplification to about ratio * len(vertices) vertices.
+
+    The grid cell size is found by bisection on the cluster count. Faces collapsing to a
+    line or point are dropped, duplicates are removed and the winding is kept.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    target = max(4, int(len(vertices) * ratio))
+
+    # Bisect the cell size between "everything in one cell" and a tiny fraction of the extent
+    extent = float(np.max(np.ptp(vertices, axis=0))) or 1.0
+    low, high = extent * 1e-4, extent
+    cluster, count = cluster_vertices(vertices, high)
+    for _ in range(iterations):
+        middle = np.sqrt(low * high)
+        candidate, candidate_count = cluster_vertices(vertices, middle)
+        if candidate_count > target:
+            low = middle
+        else:
+            high = middle
+            cluster, count = candidate, candidate_count
+
+    # Representative vertex per cluster: the one closest to the cluster mean
+    sums = np.zeros((count, 3))
+    np.add.at(sums, cluster, vertices)
+    means = sums / np.bincount(cluster, minlength=count)[:, None]
+    distance = np.linalg.norm(vertices - means[cluster], axis=1)
+    order = np.lexsort((distance, cluster))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = cluster[order[1:]] != cluster[order[:-1]]
+    representatives = order[first]
+
+    # Re-index faces to clusters, dropping collapsed faces and duplicates
+    lod_faces = cluster[faces]
+    keep = ((lod_faces[:, 0] != lod_faces[:, 1]) & (lod_faces[:, 1] != lod_faces[:, 2])
+            & (lod_faces[:, 0] != lod_faces[:, 2]))
+    lod_faces = lod_faces[keep]
+    corners = np.sort(lod_faces, axis=1)
+    _, unique = np.unique((corners[:, 0] * count + corners[:, 1]) * count + corners[:, 2], return_index=True)
+    lod_faces = lod_faces[np.sort(unique)]
+    return LodMesh(representatives, lod_faces, cluster)
@@ -0,0 +1,74 @@
+import numpy as np
+import Constants as co
+
+
+def mass_properties(vertices, faces, density=1.0):
+    """Volume, surface area, center of mass and inertia of a closed triangle mesh.
+
+    Sums signed tetrahedra spanned by the origin and each face, vectorized over all faces.
+    Inertia is the 3x3 tensor about the center of mass for the given density (unit density:
+    mm^5 for a mesh in mm). Faces must be consistently wound outward (as trimesh loads them).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = vertices[np.asarray(faces)]
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+
+    cross = np.cross(b - a, c - a)
+    area = 0.5 * np.linalg.norm(cross, axis=1).sum()
+
+    # Six times the signed volume of each tetrahedron (origin, a, b, c)
+    determinants = np.einsum('ij,ij->i', a, np.cross(b, c))
+    volume = determinants.sum() / 6.0
+    if volume == 0:
+        return {'volume': 0.0, 'area': area, 'center_mass': vertices.mean(axis=0), 'inertia': np.zeros((3, 3))}
+    center_mass = (determinants[:, None] * (a + b + c)).sum(axis=0) / (24.0 * volume)
+
+    # Second moments about the origin; per tetrahedron det / 120 * (aa^T + bb^T + cc^T + ss^T), s = a + b + c
+    s = a + b + c
+    covariance = sum(np.einsum('f,fi,fj->ij', determinants, p, p) for p in (a, b, c, s)) / 120.0
+    # Move to the center of mass and convert to an inertia tensor
+    covariance = covariance - volume * np.outer(center_mass, center_mass)
+    inertia = (np.trace(covariance) * np.eye(3) - covariance) * density
+
+    return {'volume': volume, 'area': area, 'center_mass': center_mass, 'inertia': inertia}
+
+
+def scaling_terms(vertices, faces):
+    """Per-mesh terms for scaled_volume_area(): the volume and the squared face-normal components"""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = vertices[np.asarray(faces)]
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    cross = np.cross(b - a, c - a)
+    return {
+        'volume': np.einsum('ij,ij->i', a, np.cross(b, c)).sum() / 6.0,
+        'axial_squared': cross[:, 0]**2,
+        'cross_squared': cross[:, 1]**2 + cross[:, 2]**2
+    }
+
+
+def scaled_volume_area(terms, axial_scale, cross_scale):
+    """Exact volume and area of the mesh after scaling x by axial_scale and y, z by cross_scale.
+
+    Under diag(a, t, t) the volume scales by a * t^2 and a face normal (nx, ny, nz) becomes
+    (t^2 nx, a t ny, a t nz), so no deformed copy of the mesh is needed. The scales may be
+    arrays (broadcast against each other).
+    """
+    axial_scale = np.asarray(axial_scale, dtype=np.float64)
+    cross_scale = np.asarray(cross_scale, dtype=np.float64)
+    volume = terms['volume'] * axial_scale * cross_scale**2
+    # Scales may be arrays; faces run along a trailing axis
+    axial, cross = axial_scale[..., None], cross_scale[..., None]
+    area = 0.5 * np.sqrt(cross**4 * terms['axial_squared']
+                         + (axial * cross)**2 * terms['cross_squared']).sum(axis=-1)
+    return volume, area
+
+
+def printed_mass(volume, area, density=co.PRINT_MATERIAL_DENSITY, infill=co.PRINT_INFILL,
+                 wall_thickness=co.PRINT_WALL_THICKNESS):
+    """Mass (g) of an FDM print of a part with the given volume (mm^3) and surface area (mm^2).
+
+    The walls (area * wall_thickness, at most the whole volume) are solid and the rest is
+    printed at the infill fraction. density is in g/cm^3.
+    """
+    shell = np.minimum(volume, area * wall_thickness)
+    return (shell + infill * (volume - shell)) * density / 1000.0
@@ -0,0 +1,465 @@
+import os
+import time
+import numpy as np
+import Constants as co
+
+# Wall segments start this fraction of the minimum wall below the surface
+WALL_START = 1e-3
+# Margin (mm) around a checker's reach, so that rounding in the deformation never leaves it
+REACH_SLACK = 1e-6
+# Bumped whenever find_candidates() changes, so that cached candidates are rebuilt
+CANDIDATES_VERSION = 1
+CANDIDATE_KEYS = ('first', 'second', 'wall_face', 'wall_target')
+
+
+def morton_order(points):
+    """Order of the points along a Z-order curve (10 bits per axis), keeping nearby points together"""
+    low, high = points.min(axis=0), points.max(axis=0)
+    cells = ((points - low) / np.where(high > low, high - low, 1.0) * 1023).astype(np.uint64)
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return np.argsort(codes, kind='stable')
+
+
+def segments_hit_triangles(starts, ends, triangles, eps=1e-9):
+    """Where each segment (starts[i] -> ends[i]) crosses triangle i (Moller-Trumbore, vectorized).
+
+    Returns (hit, t): hit is False for misses and for segments parallel to their triangle, t is
+    the fraction along the segment of the crossing.
+    """
+    direction = ends - starts
+    edge1 = triangles[:, 1] - triangles[:, 0]
+    edge2 = triangles[:, 2] - triangles[:, 0]
+    h = np.cross(direction, edge2)
+    determinant = np.einsum('ij,ij->i', edge1, h)
+    usable = np.abs(determinant) > eps * np.linalg.norm(direction, axis=1) * np.linalg.norm(edge2, axis=1)
+    inverse = np.divide(1.0, determinant, out=np.zeros_like(determinant), where=usable)
+    s = starts - triangles[:, 0]
+    u = inverse * np.einsum('ij,ij->i', s, h)
+    q = np.cross(s, edge1)
+    v = inverse * np.einsum('ij,ij->i', direction, q)
+    t = inverse * np.einsum('ij,ij->i', edge2, q)
+    hit = usable & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > eps) & (t < 1 - eps)
+    return hit, t
+
+
+def triangles_intersect(first, second):
+    """Whether the triangles of each pair (first[i], second[i]) cross: an edge of one passes through the other.
+
+    Pairs with a triangle entirely on one side of the other's plane (most candidates) are
+    rejected before the edge tests; touching and coplanar pairs do not count as crossing.
+    """
+    candidates = np.arange(len(first))
+    for a, b in ((first, second), (second, first)):
+        a, b = a[candidates], b[candidates]
+        normal = np.cross(a[:, 1] - a[:, 0], a[:, 2] - a[:, 0])
+        distance = np.einsum('ij,ikj->ik', normal, b - a[:, :1])
+        # Per column rather than min/max over the short axis, which numpy reduces slowly
+        below = (distance[:, 0] < 0) | (distance[:, 1] < 0) | (distance[:, 2] < 0)
+        above = (distance[:, 0] > 0) | (distance[:, 1] > 0) | (distance[:, 2] > 0)
+        candidates = candidates[below & above]
+    crossing = np.zeros(len(candidates), dtype=bool)
+    for a, b in ((first[candidates], second[candidates]), (second[candidates], first[candidates])):
+        for i, j in ((0, 1), (1, 2), (2, 0)):
+            crossing |= segments_hit_triangles(a[:, i], a[:, j], b)[0]
+    hit = np.zeros(len(first), dtype=bool)
+    hit[candidates] = crossing
+    return hit
+
+
+def penetration_depth(first, second):
+    """How far each pair of crossing triangles pokes through each other (mm): the smaller, over
+    the two triangles, of the shorter reach of the other triangle on either side of its plane"""
+    depth = np.full(len(first), np.inf)
+    for a, b in ((first, second), (second, first)):
+        normal = np.cross(a[:, 1] - a[:, 0], a[:, 2] - a[:, 0])
+        normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+        distance = np.einsum('ij,ikj->ik', normal, b - a[:, :1])
+        depth = np.minimum(depth, np.minimum(-distance.min(axis=1), distance.max(axis=1)))
+    return depth
+
+
+def patch_areas(faces, selected, areas):
+    """Area of the patch (selected faces connected through shared vertices) each selected face is in.
+
+    Labels spread to the lowest face index of every patch by repeated vertex minima; returns
+    an array over all faces, 0 for faces not selected.
+    """
+    indices = np.flatnonzero(selected)
+    result = np.zeros(len(faces))
+    if not len(indices):
+        return result
+    patch_faces = faces[indices]
+    labels = indices
+    while True:
+        vertex_labels = np.full(faces.max() + 1, len(faces))
+        np.minimum.at(vertex_labels, patch_faces.reshape(-1), np.repeat(labels, 3))
+        spread = vertex_labels[patch_faces].min(axis=1)
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+    totals = np.bincount(labels, weights=areas[indices], minlength=len(faces))
+    result[indices] = totals[labels]
+    return result
+
+
+def boxes_meet(first_low, first_high, second_low, second_high):
+    """Whether the boxes of each pair overlap along one axis (bounds gathered per pair). Given
+    at K corners (K, pairs; see MeshChecker.find_candidates()), whether they are not apart on
+    the same side at every corner."""
+    if first_low.ndim == 1:
+        return (first_low <= second_high) & (second_low <= first_high)
+    return ((first_low - second_high).min(axis=0) <= 0) & ((second_low - first_high).min(axis=0) <= 0)
+
+
+def boxes_overlap(first, second, first_low, first_high, second_low, second_high):
+    """Keep the (first, second) index pairs whose boxes overlap; first indexes first_low/first_high
+    (per axis an (F,) array, or (K, F) at K corners), second indexes second_low/second_high.
+    Each axis only tests the previous survivors."""
+    for axis in range(3):
+        overlap = boxes_meet(first_low[axis][..., first], first_high[axis][..., first],
+                             second_low[axis][..., second], second_high[axis][..., second])
+        first, second = first[overlap], second[overlap]
+    return first, second
+
+
+def share_vertex(faces, first, second):
+    """Whether faces first[i] and second[i] have a vertex in common"""
+    return (faces[first][:, :, None] == faces[second][:, None, :]).any(axis=(1, 2))
+
+
+class FaceBVH:
+    """Bounding-volume hierarchy over the faces of one mesh, built once and refit per check.
+
+    Faces are sorted along a Z-order curve of the original centroids and grouped into leaves
+    of BVH_LEAF_SIZE; the tree above is a complete binary tree over the leaves, so it is stored
+    as one box array per level and both the refit and the queries are whole-level numpy
+    operations (boxes are stored per axis, so each axis test only sees the survivors of the
+    previous one). Deformations move faces smoothly, so the original order stays a good tree.
+    """
+
+    def __init__(self, original_vertices, faces, leaf_size=co.BVH_LEAF_SIZE):
+        self.faces = np.asarray(faces)
+        centroids = np.asarray(original_vertices, dtype=np.float64)[self.faces].mean(axis=1)
+        leaves = -(-len(self.faces) // leaf_size)
+        self.depth = max(0, int(np.ceil(np.log2(max(leaves, 1)))))
+        slots = np.full((2 ** self.depth) * leaf_size, -1, dtype=np.int64)
+        slots[:len(self.faces)] = morton_order(centroids)
+        self.leaf_faces = slots.reshape(-1, leaf_size)
+        self.levels = None
+
+    def refit(self, triangles):
+        """Recompute every box for the current triangles (F, 3, 3)"""
+        self.refit_boxes(triangles.min(axis=1).T.copy(), triangles.max(axis=1).T.copy())
+
+    def refit_boxes(self, face_low, face_high):
+        """Recompute every box from the faces' boxes low/high (per axis an (F,) array, or (K, F) at K corners)"""
+        self.face_low = face_low
+        self.face_high = face_high
+        empty = self.leaf_faces < 0
+        # Contiguous levels keep the gathers of the traversal fast
+        low = [np.ascontiguousarray(np.where(empty, np.inf, bound[..., self.leaf_faces]).min(axis=-1))
+               for bound in face_low]
+        high = [np.ascontiguousarray(np.where(empty, -np.inf, bound[..., self.leaf_faces]).max(axis=-1))
+                for bound in face_high]
+        self.levels = [(low, high)]
+        while low[0].shape[-1] > 1:
+            low = [np.minimum(bound[..., 0::2], bound[..., 1::2]) for bound in low]
+            high = [np.maximum(bound[..., 0::2], bound[..., 1::2]) for bound in high]
+            self.levels.append((low, high))
+        self.levels.reverse()
+
+    def traverse(self, low, high):
+        """(query, leaf) pairs whose boxes overlap, for query boxes low/high (per axis, like the face boxes)"""
+        queries = np.arange(low[0].shape[-1])
+        nodes = np.zeros(low[0].shape[-1], dtype=np.int64)
+        for level, (node_low, node_high) in enumerate(self.levels):
+            if level:
+                # Children of node n are 2n and 2n + 1 on the next level
+                queries = np.repeat(queries, 2)
+                nodes = (2 * nodes[:, None] + np.array([0, 1])).reshape(-1)
+            for axis in range(3):
+                overlap = boxes_meet(low[axis][..., queries], high[axis][..., queries],
+                                     node_low[axis][..., nodes], node_high[axis][..., nodes])
+                queries, nodes = queries[overlap], nodes[overlap]
+        return queries, nodes
+
+    def overlap(self, first, second, low=None, high=None):
+        """Keep the (first, second) index pairs whose boxes overlap; first indexes low/high (default: faces)"""
+        low = self.face_low if low is None else low
+        high = self.face_high if high is None else high
+        return boxes_overlap(first, second, low, high, self.face_low, self.face_high)
+
+    def query(self, low, high, changed, symmetric=False):
+        """Pairs (i, j) where the query box of changed face i overlaps the box of face j (i != j).
+
+        low/high (per axis, like the face boxes) are one query box per face (e.g. the faces' own boxes). The queries of
+        each leaf are merged into one box and traversed together, then expanded to face pairs,
+        which is far cheaper than one traversal per face. With symmetric (the faces' own boxes),
+        every overlapping pair with a changed face is returned once.
+        """
+        size = self.leaf_faces.shape[1]
+        members = self.leaf_faces
+        valid = (members >= 0) & changed[members]
+        query_leaves = np.flatnonzero(valid.any(axis=1))
+        valid = valid[query_leaves]
+        members = members[query_leaves]
+        leaf_low = [np.ascontiguousarray(np.where(valid, bound[..., members], np.inf).min(axis=-1)) for bound in low]
+        leaf_high = [np.ascontiguousarray(np.where(valid, bound[..., members], -np.inf).max(axis=-1)) for bound in high]
+        queries, leaves = self.traverse(leaf_low, leaf_high)
+
+        # A leaf's query box only covers its changed faces, so every pair is taken from the side
+        # of a changed face; a pair of two changed faces is found from both sides
+        first = np.repeat(members[queries], size, axis=1).reshape(-1)
+        second = np.tile(self.leaf_faces[leaves], (1, size)).reshape(-1)
+        keep = (first >= 0) & (second >= 0) & (first != second)
+        keep[keep] = changed[first[keep]]
+        if symmetric:
+            keep[keep] = (first[keep] < second[keep]) | ~changed[second[keep]]
+        return self.overlap(first[keep], second[keep], low, high)
+
+
+class MeshChecker:
+    """Printability checks of one deformed component, run on the raw arrays after every deformation.
+
+    Three defects are looked for: faces crossing other faces (self-intersection), faces whose
+    normal turned against the original normal (inverted), and walls thinner than
+    MESH_MIN_WALL_THICKNESS (a segment of that length from a face's centroid into the material
+    leaves it through another face that shares no vertex with it). Only faces with a vertex that
+    moved since the previous check are tested again, together with the walls a moved face may
+    now bound or no longer bounds; the rest keep their previous result. Defects the original
+    mesh already has are not reported. Defects no larger than MESH_DEFECT_TOLERANCE (crossings
+    no deeper, folds no wider, thin patches no larger than its square) do not make the mesh
+    invalid, since the slicer merges or drops them, but they are still counted.
+
+    reach bounds every vertex at the corners of the parameter bounds (see DeformationBasis.reach()).
+    With it the face pairs that can overlap for some design are found once (find_candidates(),
+    or given as candidates, e.g. from a cache), and a check only filters the pairs of moved
+    faces by their current boxes instead of querying the BVH, some tens of ms rather than some
+    hundreds. Vertices outside the reach (designs beyond the parameter bounds) fall back to the
+    refit BVH.
+    """
+
+    def __init__(self, original_vertices, faces, reach=None, candidates=None, min_wall=co.MESH_MIN_WALL_THICKNESS,
+                 tolerance=co.MESH_DEFECT_TOLERANCE):
+        self.original_vertices = np.asarray(original_vertices, dtype=np.float64)
+        self.faces = np.asarray(faces, dtype=np.int64)
+        self.min_wall = min_wall
+        self.tolerance = tolerance
+        self.reach = None if reach is None else (np.asarray(reach[0]) - REACH_SLACK, np.asarray(reach[1]) + REACH_SLACK)
+        self.reach_low = None if reach is None else self.reach[0].min(axis=0)
+        self.reach_high = None if reach is None else self.reach[1].max(axis=0)
+        self.bvh = FaceBVH(self.original_vertices, self.faces)
+        triangles = self.original_vertices[self.faces]
+        self.original_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        self.checked_vertices = None
+        self.baseline = None
+        self.candidates = candidates
+
+    def find_candidates(self):
+        """Face pairs (first, second) that may overlap for some design, and pairs (wall_face,
+        wall_target) where the target may come within min_wall of the face's centroid (which
+        holds its wall segment); neither has pairs sharing a vertex, which are never tested.
+        Returns the dict of these four arrays, also kept as self.candidates.
+
+        The BVH is fit to the boxes of the faces at every corner of the reach and a pair is
+        dropped when, along some axis, it is apart on the same side at every corner: by the
+        bound of reach it is then apart for every design. Along each axis only the corners
+        that differ are kept (the bow's x, for one, is the same at all of them).
+        """
+        face_low, face_high, centroid_low, centroid_high = [], [], [], []
+        for axis in range(3):
+            low, high = (bound[:, :, axis] for bound in self.reach)
+            corners = [k for k in range(len(low)) if not any(np.array_equal(low[k], low[kept]) and
+                                                             np.array_equal(high[k], high[kept]) for kept in range(k))]
+            if len(corners) == 1:
+                corners = corners[0]
+            low, high = low[corners][..., self.faces], high[corners][..., self.faces]
+            face_low.append(low.min(axis=-1))
+            face_high.append(high.max(axis=-1))
+            centroid_low.append(low.mean(axis=-1) - self.min_wall)
+            centroid_high.append(high.mean(axis=-1) + self.min_wall)
+        self.bvh.refit_boxes(face_low, face_high)
+        everything = np.ones(len(self.faces), dtype=bool)
+        first, second = self.bvh.query(face_low, face_high, everything, symmetric=True)
+        wall_face, wall_target = self.bvh.query(centroid_low, centroid_high, everything)
+        shared = share_vertex(self.faces, first, second)
+        wall_shared = share_vertex(self.faces, wall_face, wall_target)
+        self.candidates = {'first': first[~shared], 'second': second[~shared],
+                           'wall_face': wall_face[~wall_shared], 'wall_target': wall_target[~wall_shared]}
+        return self.candidates
+
+    def check(self, vertices):
+        """Check the current vertices (N, 3) of the component; returns a report dict (see report())"""
+        start = time.perf_counter()
+        vertices = np.asarray(vertices, dtype=np.float64)
+        if self.baseline is None:
+            if self.reach is not None and self.candidates is None:
+                self.find_candidates()
+            # Whole original mesh once: its defects are the baseline, not reported
+            self.pairs = np.empty(0, dtype=np.int64)
+            self.depths = np.empty(0)
+            self.folds = np.zeros(len(self.faces))
+            self.areas = np.zeros(len(self.faces))
+            self.wall = np.full(len(self.faces), np.inf)
+            self.wall_hits = np.full(len(self.faces), -1)
+            self.update(self.original_vertices, np.ones(len(self.faces), dtype=bool))
+            self.baseline = {'pairs': self.pairs.copy(), 'thin': self.wall < self.min_wall}
+            self.checked_vertices = self.original_vertices.copy()
+
+        moved = np.any(vertices != self.checked_vertices, axis=1)
+        changed = moved[self.faces].any(axis=1)
+        if changed.any():
+            self.update(vertices, changed)
+            self.checked_vertices[moved] = vertices[moved]
+        return self.report(int(changed.sum()), time.perf_counter() - start)
+
+    def update(self, vertices, changed):
+        """Redo the three checks for the changed faces (boolean mask)"""
+        triangles = vertices[self.faces]
+        changed_faces = np.flatnonzero(changed)
+        face_count = len(self.faces)
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        face_low, face_high = triangles.min(axis=1).T.copy(), triangles.max(axis=1).T.copy()
+        # The candidate pairs hold every overlap while all vertices are within the reach
+        use_candidates = (self.reach is not None and self.candidates is not None
+                          and np.all(vertices >= self.reach_low) and np.all(vertices <= self.reach_high))
+        if not use_candidates:
+            self.bvh.refit_boxes(face_low, face_high)
+
+        # Inverted faces, with the width of the fold (height of the face over its longest edge)
+        inverted = np.einsum('ij,ij->i', normals[changed_faces], self.original_normals[changed_faces]) <= 0
+        longest = np.linalg.norm(triangles[changed_faces] - np.roll(triangles[changed_faces], 1, axis=1), axis=2).max(axis=1)
+        width = np.linalg.norm(normals[changed_faces], axis=1) / np.maximum(longest, 1e-12)
+        self.folds[changed_faces] = np.where(inverted, width, 0.0)
+        self.areas[changed_faces] = np.linalg.norm(normals[changed_faces], axis=1) / 2
+
+        # Self-intersections: pairs with a changed face, not sharing a vertex
+        if use_candidates:
+            first, second = self.candidates['first'], self.candidates['second']
+            selected = changed[first] | changed[second]
+            first, second = boxes_overlap(first[selected], second[selected], face_low, face_high, face_low, face_high)
+        else:
+            first, second = self.bvh.query(face_low, face_high, changed, symmetric=True)
+            shared = share_vertex(self.faces, first, second)
+            first, second = first[~shared], second[~shared]
+        crossing = triangles_intersect(triangles[first], triangles[second])
+        first, second = first[crossing], second[crossing]
+        codes = np.minimum(first, second) * face_count + np.maximum(first, second)
+        kept = ~(changed[self.pairs // face_count] | changed[self.pairs % face_count])
+        codes, unique = np.unique(np.concatenate([self.pairs[kept], codes]), return_index=True)
+        self.pairs = codes
+        self.depths = np.concatenate([self.depths[kept], penetration_depth(triangles[first], triangles[second])])[unique]
+
+        # Wall thickness: segment of min_wall length from the centroid along the inward normal,
+        # leaving the material through a face turned the other way. It starts just below the
+        # surface so that its box misses the coplanar neighbouring faces. Besides the moved faces,
+        # faces whose segment may reach a moved face and faces whose wall a moved face bounded
+        # are measured again.
+        measure = changed.copy()
+        if use_candidates:
+            wall_face, wall_target = self.candidates['wall_face'], self.candidates['wall_target']
+            measure[wall_face[changed[wall_target]]] = True
+        elif not changed.all():
+            _, near = self.bvh.query(face_low - self.min_wall, face_high + self.min_wall, changed)
+            measure[near] = True
+        bounded = self.wall_hits >= 0
+        measure[bounded] |= changed[self.wall_hits[bounded]]
+        measured = np.flatnonzero(measure)
+        lengths = np.linalg.norm(normals[measured], axis=1, keepdims=True)
+        inward = -np.divide(normals[measured], lengths, out=np.zeros((len(measured), 3)), where=lengths > 0)
+        starts = np.zeros((face_count, 3))
+        ends = np.zeros((face_count, 3))
+        starts[measured] = triangles[measured].mean(axis=1) + inward * (self.min_wall * WALL_START)
+        ends[measured] = starts[measured] + inward * (self.min_wall * (1 - WALL_START))
+        segment_low, segment_high = np.minimum(starts, ends).T, np.maximum(starts, ends).T
+        if use_candidates:
+            selected = measure[wall_face]
+            first, second = boxes_overlap(wall_face[selected], wall_target[selected], segment_low, segment_high,
+                                          face_low, face_high)
+        else:
+            first, second = self.bvh.query(segment_low, segment_high, measure)
+            # A neighbour sharing a vertex is a corner of the same wall, not its other side
+            shared = share_vertex(self.faces, first, second)
+            first, second = first[~shared], second[~shared]
+        hit, t = segments_hit_triangles(starts[first], ends[first], triangles[second])
+        hit &= np.einsum('ij,ij->i', normals[second], ends[first] - starts[first]) > 0
+        # Nearest hit of every face: sorted by face, then by distance
+        first, second, t = first[hit], second[hit], t[hit]
+        order = np.lexsort((t, first))
+        faces_hit, nearest = np.unique(first[order], return_index=True)
+        self.wall[measured] = np.inf
+        self.wall_hits[measured] = -1
+        self.wall[faces_hit] = (WALL_START + t[order][nearest] * (1 - WALL_START)) * self.min_wall
+        self.wall_hits[faces_hit] = second[order][nearest]
+
+    def report(self, checked_faces, seconds):
+        """Defects beyond the original mesh's: counts (those over the tolerance separately), the
+        deepest crossing, widest fold and thinnest new wall (mm) and the check time"""
+        new = ~np.isin(self.pairs, self.baseline['pairs'])
+        depths = self.depths[new]
+        folds = self.folds[self.folds > 0]
+        thin = (self.wall < self.min_wall) & ~self.baseline['thin']
+        severe_crossings = int((depths > self.tolerance).sum())
+        severe_folds = int((folds > self.tolerance).sum())
+        severe_thin = int((patch_areas(self.faces, thin, self.areas) > self.tolerance**2).sum())
+        return {
+            'valid': severe_crossings == 0 and severe_folds == 0 and severe_thin == 0,
+            'self_intersections': int(len(depths)),
+            'severe_self_intersections': severe_crossings,
+            'max_penetration': float(depths.max()) if len(depths) else 0.0,
+            'flipped_faces': int(len(folds)),
+            'severe_flipped_faces': severe_folds,
+            'max_fold': float(folds.max()) if len(folds) else 0.0,
+            'thin_faces': int(thin.sum()),
+            'severe_thin_faces': severe_thin,
+            'min_wall': float(self.wall[thin].min()) if thin.any() else None,
+            'checked_faces': checked_faces,
+            'seconds': seconds
+        }
+
+
+def save_candidates(path, checkers):
+    """Store the candidate pairs of the checkers (one per component) in one .npz file"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **{f'{i}_{key}': checker.candidates[key]
+                      for i, checker in enumerate(checkers) for key in CANDIDATE_KEYS})
+
+
+def load_candidates(path, count):
+    """Candidate pairs of count checkers stored by save_candidates(), or None if there is no such file"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return [{key: data[f'{i}_{key}'] for key in CANDIDATE_KEYS} for i in range(count)]
+
+
+def merge_reports(reports):
+    """One report for several components (counts and times summed, extremes over all)"""
+    walls = [report['min_wall'] for report in reports if report['min_wall'] is not None]
+    merged = {'valid': all(report['valid'] for report in reports)}
+    for key in ('self_intersections', 'severe_self_intersections', 'flipped_faces', 'severe_flipped_faces',
+                'thin_faces', 'severe_thin_faces', 'checked_faces', 'seconds'):
+        merged[key] = sum(report[key] for report in reports)
+    merged['max_penetration'] = max((report['max_penetration'] for report in reports), default=0.0)
+    merged['max_fold'] = max((report['max_fold'] for report in reports), default=0.0)
+    merged['min_wall'] = min(walls) if walls else None
+    return merged
+
+
+def describe_defects(report):
+    """Short text of the defects that make a report invalid, e.g. for an error message"""
+    parts = []
+    if report['severe_self_intersections']:
+        parts.append(f"{report['severe_self_intersections']} face pairs crossing by more than "
+                     f"{co.MESH_DEFECT_TOLERANCE} mm (deepest {report['max_penetration']:.2f} mm)")
+    if report['severe_flipped_faces']:
+        parts.append(f"{report['severe_flipped_faces']} inverted faces folded over more than "
+                     f"{co.MESH_DEFECT_TOLERANCE} mm (widest {report['max_fold']:.2f} mm)")
+    if report['severe_thin_faces']:
+        parts.append(f"{report['severe_thin_faces']} faces in patches over {co.MESH_DEFECT_TOLERANCE**2:g} mm2 on walls "
+                     f"thinner than {co.MESH_MIN_WALL_THICKNESS} mm (thinnest {report['min_wall']:.2f} mm)")
+    return ', '.join(parts) or 'no defects'
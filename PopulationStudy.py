@@ -0,0 +1,167 @@
+import contextlib
+import io
+import itertools
+import time
+import numpy as np
+import Constants as co
+from BatchScoring import comfort_scores, score_designs
+
+
+def sample_palm_sizes(profile, count=co.POPULATION_SIZE, rng=None):
+    """Palm sizes (mm) of `count` users drawn from the profile's POPULATION_PALM_SIZES normal distribution"""
+    rng = rng if rng is not None else np.random.default_rng(0)
+    mean, deviation = co.POPULATION_PALM_SIZES[profile]
+    return np.clip(rng.normal(mean, deviation, count), co.MIN_PALM_SIZE, co.MAX_PALM_SIZE)
+
+
+def candidate_grip_widths(step=co.POPULATION_GRIP_STEP):
+    """Grip widths (mm) from MIN_GRIP_WIDTH to MAX_GRIP_WIDTH in steps of `step`"""
+    return np.round(np.arange(co.MIN_GRIP_WIDTH, co.MAX_GRIP_WIDTH + step / 2, step), 6)
+
+
+def fit_matrix(optimizer, design, grip_widths, palm_sizes, profile):
+    """Scores of every candidate grip width (rows) for every user (columns) and which sizes fit whom.
+
+    design is (bow_thickness, bow_curvature, limb_stiffness). Draw force and safety do not
+    depend on the palm, so they are scored once per size; comfort is scored for all sizes
+    and users at once. A size is feasible if its draw force is within the profile's
+    max_draw_force and its safety score reaches POPULATION_MIN_SAFETY; it fits a user if it is
+    feasible and its comfort is within POPULATION_COMFORT_TOLERANCE of the user's most
+    comfortable feasible size (the other comfort terms are the same for every size).
+    Returns a dict of (sizes,) and (sizes, users) arrays.
+    """
+    bow_thickness, bow_curvature, limb_stiffness = design
+    sizes = score_designs(optimizer, bow_thickness, bow_curvature, limb_stiffness, grip_widths,
+                          co.DEFAULT_PALM_SIZE, profile)
+    comfort = comfort_scores(bow_thickness, bow_curvature, limb_stiffness, grip_widths[:, None],
+                             palm_sizes[None, :], profile)
+    feasible = ((sizes['draw_force'] <= optimizer.user_profiles[profile]['max_draw_force'])
+                & (sizes['safety_score'] >= co.POPULATION_MIN_SAFETY))
+    best = np.where(feasible[:, None], comfort, -np.inf).max(axis=0)
+    return {
+        'comfort': comfort,
+        'draw_force': sizes['draw_force'],
+        'safety_score': sizes['safety_score'],
+        'feasible': feasible,
+        'fit': feasible[:, None] & (comfort >= best - co.POPULATION_COMFORT_TOLERANCE)
+    }
+
+
+def choose_grip_sizes(fit, coverage=co.POPULATION_COVERAGE, max_sizes=co.POPULATION_MAX_SIZES):
+    """Smallest set of sizes (rows of fit) fitting at least `coverage` of the users (columns).
+
+    Users are reduced to their distinct fit patterns (weighted by count) and sizes whose users
+    another size also fits are dropped; every set of 1, 2, ... max_sizes remaining sizes is then
+    tried, so the first set reaching the coverage is a smallest one (ties go to the smaller
+    widths). If none does, the set of at most max_sizes sizes fitting the most users is returned.
+    Returns (size indices, covered fraction).
+    """
+    # One byte string key per user column (np.unique along an axis is far slower)
+    packed = np.ascontiguousarray(np.packbits(fit, axis=0).T)
+    keys = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    patterns = fit[:, first]
+    weights = counts / fit.shape[1]
+    # Size i is dominated if some size j fits all of its users (and more, or j comes first)
+    contains = ~(patterns[:, None, :] & ~patterns[None, :, :]).any(axis=2)
+    same = contains & contains.T
+    index = np.arange(len(patterns))
+    dominated = (contains & (~same | (index[None, :] < index[:, None]))).any(axis=1)
+    kept = np.flatnonzero(~dominated & patterns.any(axis=1))
+
+    best_sizes, best_coverage = [], 0.0
+    for count in range(1, min(max_sizes, len(kept)) + 1):
+        sets = np.array(list(itertools.combinations(kept, count)))
+        covered = patterns[sets].any(axis=1) @ weights
+        best = int(np.argmax(covered))
+        if covered[best] > best_coverage + 1e-12:
+            best_sizes, best_coverage = sets[best].tolist(), float(covered[best])
+        if best_coverage >= coverage - 1e-12:
+            break
+    return best_sizes, best_coverage
+
+
+def percentiles(values):
+    """5th, 50th and 95th percentile of values"""
+    return [float(value) for value in np.percentile(values, [5, 50, 95])] if len(values) else []
+
+
+def study_profile(optimizer, profile, design, palm_sizes, grip_widths=None, coverage=co.POPULATION_COVERAGE,
+                  max_sizes=co.POPULATION_MAX_SIZES):
+    """Fit study of one profile's design over sampled palm sizes: the grip sizes to make and who they fit.
+
+    Each user gets the chosen size that fits them best (highest comfort, then the smaller width),
+    or their most comfortable chosen size if none fits. Returns the chosen grip widths, the
+    covered fraction, the feasible candidates, per-size shares and the comfort, draw force and
+    safety percentiles (5th, 50th, 95th) of the users on their assigned size. With no feasible
+    candidate nothing is chosen and the coverage is 0.
+    """
+    start = time.perf_counter()
+    grip_widths = candidate_grip_widths() if grip_widths is None else np.asarray(grip_widths, dtype=np.float64)
+    scores = fit_matrix(optimizer, design, grip_widths, palm_sizes, profile)
+    chosen, covered = choose_grip_sizes(scores['fit'], coverage, max_sizes)
+
+    result = {
+        'profile': profile,
+        'design': dict(zip(['bow_thickness', 'bow_curvature', 'limb_stiffness'], map(float, design))),
+        'users': len(palm_sizes),
+        'palm_size_percentiles': percentiles(palm_sizes),
+        'coverage_target': coverage,
+        'grip_widths': [float(grip_widths[i]) for i in chosen],
+        'coverage': covered,
+        'reached': covered >= coverage - 1e-12,
+        'feasible_grip_widths': grip_widths[scores['feasible']].tolist(),
+        'lowest_draw_force': float(scores['draw_force'].min()),
+        'max_draw_force': float(optimizer.user_profiles[profile]['max_draw_force']),
+        'sizes': []
+    }
+    if chosen:
+        comfort = scores['comfort'][chosen]
+        fit = scores['fit'][chosen]
+        assigned = np.argmax(np.where(fit, comfort, -np.inf), axis=0)
+        unfit = ~fit.any(axis=0)
+        assigned[unfit] = np.argmax(comfort[:, unfit], axis=0)
+        users = np.arange(len(palm_sizes))
+        result['comfort_percentiles'] = percentiles(comfort[assigned, users])
+        result['draw_force_percentiles'] = percentiles(scores['draw_force'][chosen][assigned])
+        result['safety_percentiles'] = percentiles(scores['safety_score'][chosen][assigned])
+        for slot, size in enumerate(chosen):
+            mine = assigned == slot
+            result['sizes'].append({
+                'grip_width': float(grip_widths[size]),
+                'share': float(mine.mean()),
+                'fitted_share': float((mine & ~unfit).mean()),
+                'palm_size_range': [float(palm_sizes[mine].min()), float(palm_sizes[mine].max())] if mine.any() else None,
+                'draw_force': float(scores['draw_force'][size]),
+                'safety_score': float(scores['safety_score'][size])
+            })
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def population_study(optimizer, profiles=None, count=co.POPULATION_SIZE, coverage=co.POPULATION_COVERAGE,
+                     optimize=True, seed=0, grip_widths=None, max_sizes=co.POPULATION_MAX_SIZES):
+    """study_profile() of every profile over `count` sampled users each.
+
+    The studied design of a profile is what "Optimize Design" gives for it (its default
+    parameters if not optimize); the grip width is what varies. The optimizer's design is
+    restored afterwards (its geometry is rebuilt on next use).
+    """
+    profiles = profiles or list(co.POPULATION_PALM_SIZES)
+    rng = np.random.default_rng(seed)
+    state = optimizer.design_state()
+    results = []
+    try:
+        for profile in profiles:
+            with contextlib.redirect_stdout(io.StringIO()):
+                optimizer.set_user_profile(profile)
+                if optimize:
+                    targets = optimizer.user_profiles[profile]
+                    optimizer.optimize_for_performance(targets['max_launch_speed'], targets['max_draw_force'],
+                                                       lock_speed=True, lock_force=True)
+            design = (optimizer.bow_thickness, optimizer.bow_curvature, optimizer.limb_stiffness)
+            palm_sizes = sample_palm_sizes(profile, count, rng)
+            results.append(study_profile(optimizer, profile, design, palm_sizes, grip_widths, coverage, max_sizes))
+    finally:
+        optimizer.restore_design(state)
+    return results
@@ -0,0 +1,328 @@
+import re
+import time
+import numpy as np
+import Constants as co
+
+# Bundled prints (STL, Cura G-code of that STL) the estimate is checked against. The Broadhead
+# arrow G-code is a 4.7 mm tall part (not the 12.7 mm STL) and the combined flat-bow plate uses
+# other walls, layer height and infill, so they are left out.
+GCODE_REFERENCES = [
+    ('MostPowerful.stl', '3DPrint/Final_AK2_MostPowerful.gcode'),
+    ('ChildBow.stl', '3DPrint/Flora_AK2_ChildBow.gcode'),
+    ('PowerfulBow.stl', '3DPrint/Flora_AK2_PowerfulBow.gcode'),
+    ('ProfessionalBow.stl', '3DPrint/Flora_AK2_ProfessionalBow.gcode')
+]
+# Cura ;TYPE: sections counted as each estimate_print() line kind; moves that extrude nothing are travel
+GCODE_LINE_KINDS = {'WALL-OUTER': 'wall', 'WALL-INNER': 'wall', 'SKIN': 'skin', 'FILL': 'infill'}
+
+
+def print_constants():
+    """The calibration constants estimate_print() uses by default (PRINT_*), as calibrate_print_constants() returns them"""
+    return {
+        'wall_line_width': co.PRINT_WALL_LINE_WIDTH,
+        'wall_path_ratio': co.PRINT_WALL_PATH_RATIO,
+        'travel_ratio': co.PRINT_TRAVEL_RATIO,
+        'speeds': dict(co.PRINT_SPEEDS),
+        'time_factor': co.PRINT_TIME_FACTOR
+    }
+
+
+def setting_value(text):
+    """Number in a get_print_settings() string such as '0.16mm' or '25%' (percentages as fractions)"""
+    value = float(re.search(r'[\d.]+', text).group())
+    return value / 100.0 if text.strip().endswith('%') else value
+
+
+def layer_tops(height, layer_height, first_layer_height=co.PRINT_FIRST_LAYER_HEIGHT):
+    """Top heights of the layers of a part `height` mm tall; like Cura, a layer is printed if its middle is inside"""
+    count = max(1, int(np.ceil((height - first_layer_height) / layer_height - 0.5 - 1e-6)) + 1)
+    return first_layer_height + layer_height * np.arange(count)
+
+
+def slice_layers(vertices, faces, zs):
+    """Section perimeter (mm) and area (mm^2) of a closed mesh at every height zs, in one pass.
+
+    Every face is paired with the sorted planes between its lowest and highest vertex and all
+    pairs are cut at once. Each segment is oriented by its face normal (outer loops counter-
+    clockwise, holes clockwise), so the shoelace sum per plane is the net section area.
+    """
+    zs = np.asarray(zs, dtype=np.float64)
+    vertices = np.asarray(vertices, dtype=np.float64)
+    # Shoelace terms relative to the center keep the sums accurate
+    vertices = vertices - np.append(vertices[:, :2].mean(axis=0), 0.0)
+    triangles = vertices[np.asarray(faces)]
+    first = np.searchsorted(zs, triangles[:, :, 2].min(axis=1))
+    counts = np.searchsorted(zs, triangles[:, :, 2].max(axis=1)) - first
+    face_index = np.repeat(np.arange(len(triangles)), counts)
+    plane_index = first[face_index] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    pairs = triangles[face_index]
+    height = pairs[:, :, 2] - zs[plane_index][:, None]
+    ends = []
+    crossed = []
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        crosses = (height[:, a] < 0) != (height[:, b] < 0)
+        denominator = np.where(crosses, height[:, a] - height[:, b], 1.0)
+        fraction = height[:, a] / denominator
+        ends.append(pairs[:, a, :2] + fraction[:, None] * (pairs[:, b, :2] - pairs[:, a, :2]))
+        crossed.append(crosses)
+    ends = np.stack(ends, axis=1)
+    crossed = np.stack(crossed, axis=1)
+    cut = crossed.sum(axis=1) == 2
+    order = np.argsort(~crossed[cut], axis=1, kind='stable')[:, :2]
+    segments = np.take_along_axis(ends[cut], order[:, :, None], axis=1)
+
+    # Outward normal (nx, ny) -> counter-clockwise direction (-ny, nx)
+    normals = np.cross(pairs[cut, 1] - pairs[cut, 0], pairs[cut, 2] - pairs[cut, 0])
+    direction = segments[:, 1] - segments[:, 0]
+    sign = np.sign(direction[:, 1] * normals[:, 0] - direction[:, 0] * normals[:, 1])
+    lengths = np.hypot(direction[:, 0], direction[:, 1])
+    areas = sign * 0.5 * (segments[:, 0, 0] * segments[:, 1, 1] - segments[:, 1, 0] * segments[:, 0, 1])
+    planes = plane_index[cut]
+    return np.bincount(planes, lengths, len(zs)), np.bincount(planes, areas, len(zs))
+
+
+def skin_areas(interior, layers):
+    """Solid top/bottom skin area of every layer: interior not covered by each of the `layers` layers above and below.
+
+    Covered area is taken as the smallest interior among those layers (no 2D overlap test).
+    """
+    count = len(interior)
+    padded = np.concatenate([np.zeros(layers), interior, np.zeros(layers)])
+    above = np.min([padded[layers + k:layers + k + count] for k in range(1, layers + 1)], axis=0)
+    below = np.min([padded[layers - k:layers - k + count] for k in range(1, layers + 1)], axis=0)
+    return np.minimum(interior, np.maximum(interior - above, 0) + np.maximum(interior - below, 0))
+
+
+def plate_sections(vertex_arrays, face_arrays, layer_height):
+    """Layer heights, section perimeters and areas of the components sliced together as one plate.
+
+    The plate is sliced at layer_height (after a PRINT_FIRST_LAYER_HEIGHT first layer) from the
+    common lowest point of the components, at the middle of every layer.
+    """
+    offsets = np.cumsum([0] + [len(vertices) for vertices in vertex_arrays[:-1]])
+    vertices = np.concatenate([np.asarray(vertices, dtype=np.float64) for vertices in vertex_arrays])
+    faces = np.concatenate([np.asarray(faces) + offset for faces, offset in zip(face_arrays, offsets)])
+    z_min = vertices[:, 2].min()
+
+    tops = layer_tops(vertices[:, 2].max() - z_min, layer_height)
+    heights = np.diff(np.concatenate([[0.0], tops]))
+    perimeter, area = slice_layers(vertices, faces, z_min + tops - heights / 2)
+    return heights, perimeter, area
+
+
+def estimate_print(vertex_arrays, face_arrays, layer_height=co.PRINT_LAYER_HEIGHT, infill=co.PRINT_INFILL,
+                   constants=None):
+    """Filament length, mass and print time of the components printed together as one plate.
+
+    The components are sliced at layer_height (after a PRINT_FIRST_LAYER_HEIGHT first layer)
+    from their common lowest point. Per layer, the wall follows PRINT_WALL_PATH_RATIO of the
+    section perimeter at PRINT_WALL_LINE_WIDTH; the area inside it is solid skin where the
+    layers within PRINT_TOP_BOTTOM_THICKNESS above or below do not cover it, and infill
+    elsewhere. Time sums every line at its PRINT_SPEEDS speed plus PRINT_TRAVEL_RATIO of the
+    wall length as travel, times PRINT_TIME_FACTOR. Supports and the skirt are left out
+    (about 1% of the filament of the bundled prints). constants replaces these calibration
+    constants (a print_constants() dict, e.g. from calibrate_print_constants()).
+    """
+    start = time.perf_counter()
+    constants = constants or print_constants()
+    heights, perimeter, area = plate_sections(vertex_arrays, face_arrays, layer_height)
+
+    wall_length = perimeter * constants['wall_path_ratio']
+    interior = np.maximum(area - wall_length * constants['wall_line_width'], 0)
+    skin = skin_areas(interior, max(1, int(round(co.PRINT_TOP_BOTTOM_THICKNESS / layer_height))))
+    sparse = interior - skin
+    volume = float((heights * (wall_length * constants['wall_line_width'] + skin + infill * sparse)).sum())
+
+    lengths = {
+        'wall': float(wall_length.sum()),
+        'skin': float(skin.sum() / co.PRINT_LINE_WIDTH),
+        'infill': float(infill * sparse.sum() / co.PRINT_LINE_WIDTH)
+    }
+    lengths['travel'] = constants['travel_ratio'] * lengths['wall']
+    seconds = constants['time_factor'] * sum(length / constants['speeds'][kind] for kind, length in lengths.items())
+    filament_area = np.pi * (co.FILAMENT_DIAMETER / 2)**2
+    return {
+        'layer_height': float(layer_height),
+        'infill': float(infill),
+        'layers': int(np.count_nonzero(area > 0)),
+        'filament_m': volume / filament_area / 1000.0,
+        'mass': volume * co.PRINT_MATERIAL_DENSITY / 1000.0,
+        'print_time_s': float(seconds),
+        'line_lengths_m': {kind: length / 1000.0 for kind, length in lengths.items()},
+        'seconds': time.perf_counter() - start
+    }
+
+
+def gcode_header(path):
+    """Print time (s), filament (m), layer height (mm) and print bounds from the header comments of a Cura G-code file.
+
+    'bounds' is [[min x, min y, min z], [max x, max y, max z]] in printer coordinates.
+    """
+    header = {}
+    bounds = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line[:5] in (';MINX', ';MINY', ';MINZ', ';MAXX', ';MAXY', ';MAXZ'):
+                bounds[line[1:5]] = float(line[6:])
+            elif line.startswith(';TIME:'):
+                header['print_time_s'] = float(line[6:])
+            elif line.startswith(';Filament used:'):
+                header['filament_m'] = float(line[15:].strip().rstrip('m'))
+            elif line.startswith(';Layer height:'):
+                header['layer_height'] = float(line[14:])
+            elif line.startswith(';LAYER:'):
+                break
+    if len(bounds) == 6:
+        header['bounds'] = [[bounds['MIN' + axis] for axis in 'XYZ'], [bounds['MAX' + axis] for axis in 'XYZ']]
+    return header
+
+
+def gcode_usage(path):
+    """Path length (mm), feed-rate time (s) and filament (mm) of every line kind in a Cura G-code file.
+
+    Only moves inside layers count. Extruding moves are grouped by GCODE_LINE_KINDS (other
+    ;TYPE: sections, such as supports and the skirt, as 'other'); moves that extrude nothing
+    are 'travel'. Returns a dict of {kind: value} dicts under 'length', 'seconds' and 'filament'.
+    """
+    x = y = e = feed = 0.0
+    relative = False
+    kind = 'other'
+    in_layers = False
+    usage = {'length': {}, 'seconds': {}, 'filament': {}}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith(';'):
+                if line.startswith(';LAYER:'):
+                    in_layers = True
+                elif line.startswith(';TYPE:'):
+                    kind = GCODE_LINE_KINDS.get(line[6:].strip(), 'other')
+                continue
+            words = line.split(';', 1)[0].split()
+            if not words:
+                continue
+            command = words[0]
+            if command in ('G0', 'G1'):
+                nx, ny, ne = x, y, (0.0 if relative else e)
+                for word in words[1:]:
+                    axis = word[0]
+                    if axis == 'X':
+                        nx = float(word[1:])
+                    elif axis == 'Y':
+                        ny = float(word[1:])
+                    elif axis == 'E':
+                        ne = float(word[1:])
+                    elif axis == 'F':
+                        feed = float(word[1:]) / 60.0
+                extruded = ne if relative else ne - e
+                distance = float(np.hypot(nx - x, ny - y))
+                if in_layers and distance > 0:
+                    move = kind if command == 'G1' and extruded > 0 else 'travel'
+                    usage['length'][move] = usage['length'].get(move, 0.0) + distance
+                    usage['seconds'][move] = usage['seconds'].get(move, 0.0) + distance / feed
+                    usage['filament'][move] = usage['filament'].get(move, 0.0) + max(extruded, 0.0)
+                x, y = nx, ny
+                if not relative:
+                    e = ne
+            elif command == 'G92':
+                for word in words[1:]:
+                    if word[0] == 'E':
+                        e = float(word[1:])
+            elif command == 'M82':
+                relative = False
+            elif command == 'M83':
+                relative = True
+    return usage
+
+
+def measure_reference(stl_path, gcode_path):
+    """A reference print for calibrate_print_constants(): its STL's components, G-code header and gcode_usage()"""
+    import trimesh
+
+    components = trimesh.load(stl_path).split()
+    header = gcode_header(gcode_path)
+    header.setdefault('layer_height', co.PRINT_LAYER_HEIGHT)
+    return {
+        'model': stl_path,
+        'gcode': gcode_path,
+        'vertex_arrays': [np.asarray(component.vertices) for component in components],
+        'face_arrays': [np.asarray(component.faces) for component in components],
+        'header': header,
+        'usage': gcode_usage(gcode_path)
+    }
+
+
+def fit_print_constants(measurements):
+    """Calibration constants of estimate_print() from measure_reference() results.
+
+    Speeds, wall line width (wall filament over wall length and layer height), wall path ratio
+    (wall length over the STL's section perimeters) and travel ratio are measured from the
+    toolpaths, summed over all the prints; the time factor is then fitted so that the
+    estimated times add up to the G-code ;TIME: totals.
+    """
+    def total(quantity, kind):
+        return sum(m['usage'][quantity].get(kind, 0.0) for m in measurements)
+
+    filament_area = np.pi * (co.FILAMENT_DIAMETER / 2)**2
+    perimeter = sum(plate_sections(m['vertex_arrays'], m['face_arrays'], m['header']['layer_height'])[1].sum()
+                    for m in measurements)
+    constants = {
+        'wall_line_width': total('filament', 'wall') * filament_area
+                           / sum(m['usage']['length']['wall'] * m['header']['layer_height'] for m in measurements),
+        'wall_path_ratio': float(total('length', 'wall') / perimeter),
+        'travel_ratio': total('length', 'travel') / total('length', 'wall'),
+        'speeds': {kind: total('length', kind) / total('seconds', kind)
+                   for kind in ('wall', 'skin', 'infill', 'travel')},
+        'time_factor': 1.0
+    }
+    feed_seconds = sum(estimate_print(m['vertex_arrays'], m['face_arrays'], m['header']['layer_height'],
+                                      constants=constants)['print_time_s'] for m in measurements)
+    constants['time_factor'] = sum(m['header']['print_time_s'] for m in measurements) / feed_seconds
+    return constants
+
+
+def calibrate_print_constants(references=GCODE_REFERENCES):
+    """fit_print_constants() of the reference prints (STL, G-code) pairs; the PRINT_* constants come from all of GCODE_REFERENCES"""
+    return fit_print_constants([measure_reference(stl_path, gcode_path) for stl_path, gcode_path in references])
+
+
+def validate_against_gcode(references=GCODE_REFERENCES):
+    """Leave-one-out check of estimate_print() against the G-code's own numbers.
+
+    Each reference STL is estimated at its G-code's layer height with the constants fitted to
+    the other references only, so the errors are held out. Returns one row per reference with
+    the estimate, the G-code values, the relative errors and the held-out constants; the
+    'fitted_*_error' keys are the errors with the PRINT_* constants, which were fitted to all
+    of GCODE_REFERENCES (in-sample for the bundled prints).
+    """
+    measurements = [measure_reference(stl_path, gcode_path) for stl_path, gcode_path in references]
+    rows = []
+    for index, measurement in enumerate(measurements):
+        constants = fit_print_constants(measurements[:index] + measurements[index + 1:])
+        header = measurement['header']
+        estimate = estimate_print(measurement['vertex_arrays'], measurement['face_arrays'], header['layer_height'],
+                                  constants=constants)
+        fitted = estimate_print(measurement['vertex_arrays'], measurement['face_arrays'], header['layer_height'])
+        rows.append({
+            'model': measurement['model'],
+            'gcode': measurement['gcode'],
+            'estimate': estimate,
+            'constants': constants,
+            'gcode_filament_m': header['filament_m'],
+            'gcode_print_time_s': header['print_time_s'],
+            'filament_error': estimate['filament_m'] / header['filament_m'] - 1,
+            'print_time_error': estimate['print_time_s'] / header['print_time_s'] - 1,
+            'fitted_filament_error': fitted['filament_m'] / header['filament_m'] - 1,
+            'fitted_print_time_error': fitted['print_time_s'] / header['print_time_s'] - 1
+        })
+    return rows
+
+
+def rank_by_print_cost(records, metric='print_time_s'):
+    """Records (e.g. generate_variants() results or catalogue entries) with a 'print_estimate', cheapest first.
+
+    metric is an estimate_print() key ('print_time_s', 'filament_m' or 'mass'); records
+    without an estimate go last.
+    """
+    return sorted(records, key=lambda record: (record.get('print_estimate') is None,
+                                               (record.get('print_estimate') or {}).get(metric, 0.0)))
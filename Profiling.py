@@ -0,0 +1,133 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+import Constants as co
+
+
+class _NullSpan:
+    """Shared no-op span returned while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Timed region; nested spans on the same thread become its children"""
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.children = []
+        self.start_ns = 0
+        self.duration_ns = 0
+
+    def __enter__(self):
+        self.tracer.stack().append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        stack = self.tracer.stack()
+        stack.pop()
+        self.tracer.record(self, parent=stack[-1] if stack else None)
+        return False
+
+
+class Tracer:
+    """Nested span timer with Chrome trace-event export.
+
+    Disabled by default (set BOW_PROFILE=1 or call enable()); while disabled span() returns a
+    shared no-op object and traced functions call straight through after one attribute check.
+    """
+
+    def __init__(self, enabled=False, max_events=co.PROFILE_MAX_EVENTS):
+        self.enabled = enabled
+        self.events = collections.deque(maxlen=max_events)
+        self.last_root = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def span(self, name):
+        """Context manager timing the enclosed block"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def traced(self, name=None):
+        """Decorator timing every call of a function (named after its qualified name by default)"""
+        def decorator(function):
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with Span(self, span_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, span, parent):
+        with self.lock:
+            self.events.append((span.name, span.start_ns, span.duration_ns, threading.get_ident()))
+        if parent is not None:
+            parent.children.append(span)
+        else:
+            self.last_root = span
+
+    def last_summary(self):
+        """One-line readout of the last finished top-level span and its direct children"""
+        root = self.last_root
+        if root is None:
+            return "No profiling data yet"
+        children = ", ".join(f"{child.name} {child.duration_ns / 1e6:.1f} ms" for child in root.children)
+        summary = f"{root.name}: {root.duration_ns / 1e6:.1f} ms"
+        return f"{summary} ({children})" if children else summary
+
+    def dump_chrome_trace(self, path):
+        """Write all recorded spans as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        with self.lock:
+            events = list(self.events)
+        trace_events = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': start_ns / 1000,
+                'dur': duration_ns / 1000,
+                'pid': os.getpid(),
+                'tid': thread_id
+            }
+            for name, start_ns, duration_ns, thread_id in events
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+        self.last_root = None
+
+
+# Process-wide tracer used by the optimizer and the UI
+tracer = Tracer(enabled=os.environ.get('BOW_PROFILE', '') not in ('', '0'))
+span = tracer.span
+traced = tracer.traced
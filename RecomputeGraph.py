@@ -0,0 +1,74 @@
+import collections
+
+
+class RecomputeGraph:
+    """Dependency graph over named values that recomputes only stale nodes.
+
+    Inputs are set with set_input(); a changed value marks the nodes depending on it stale.
+    evaluate() recomputes stale nodes in the order they were added (dependencies first).
+    A node whose new value equals its old one does not make its dependents stale.
+    Sinks are side-effect nodes (e.g. rewriting one region of a vertex buffer); they have no
+    dependents, run after all values are up to date and may run concurrently.
+    """
+
+    def __init__(self):
+        self.nodes = collections.OrderedDict()  # name -> (dependencies, function, sink)
+        self.values = {}
+        self.dependents = collections.defaultdict(list)
+        self.stale = set()
+
+    def add_input(self, name):
+        self.dependents[name]
+
+    def add_node(self, name, dependencies, function, sink=False):
+        """Add a node computed as function(*dependency values); new nodes start stale"""
+        for dependency in dependencies:
+            if dependency not in self.dependents:
+                raise ValueError(f"Unknown dependency {dependency} of node {name}")
+            self.dependents[dependency].append(name)
+        self.nodes[name] = (list(dependencies), function, sink)
+        if not sink:
+            self.dependents[name]
+        self.stale.add(name)
+
+    def set_input(self, name, value):
+        """Set an input value; dependents become stale only if it changed"""
+        if name in self.values and self.values[name] == value:
+            return
+        self.values[name] = value
+        self.stale.update(self.dependents[name])
+
+    def set_inputs(self, **values):
+        for name, value in values.items():
+            self.set_input(name, value)
+
+    def invalidate(self):
+        """Mark every node stale, e.g. after the buffers were changed outside the graph"""
+        self.stale = set(self.nodes)
+
+    def evaluate(self, executor=None):
+        """Recompute the stale nodes and run the stale sinks; returns the names of the sinks run"""
+        sinks = []
+        for name, (dependencies, function, sink) in self.nodes.items():
+            if name not in self.stale:
+                continue
+            if sink:
+                sinks.append(name)
+                continue
+            self.stale.discard(name)
+            value = function(*[self.values[dependency] for dependency in dependencies])
+            if name not in self.values or self.values[name] != value:
+                self.values[name] = value
+                self.stale.update(self.dependents[name])
+
+        def run(name):
+            dependencies, function, _ = self.nodes[name]
+            function(*[self.values[dependency] for dependency in dependencies])
+
+        if executor is not None and len(sinks) > 1:
+            list(executor.map(run, sinks))
+        else:
+            for name in sinks:
+                run(name)
+        self.stale.difference_update(sinks)
+        return sinks
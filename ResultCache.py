@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import Constants as co
+
+
+def hash_mesh(mesh):
+    """Content hash of a mesh (vertex and face arrays), independent of the file it came from"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(mesh.vertices, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(mesh.faces, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def make_key(model_hash, constants, inputs):
+    """Combine the mesh hash, physics constants and optimizer inputs into one cache key.
+
+    Floats are rounded so that values coming back from Qt spin boxes and sliders
+    (e.g. 3.5000000001) still hit the same entry.
+    """
+    def normalize(value):
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, (float, np.floating)):
+            return round(float(value), co.RESULT_CACHE_DECIMALS)
+        return value
+
+    payload = json.dumps({
+        'model': model_hash,
+        'constants': normalize(constants),
+        'inputs': normalize(inputs)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Persistent SQLite store of optimization results, bounded by least-recently-used eviction"""
+
+    def __init__(self, path=co.RESULT_CACHE_PATH, max_entries=co.RESULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The UI may load the optimizer on a worker thread and use it from the main thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " model_hash TEXT NOT NULL,"
+            " inputs TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " solve_seconds REAL NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        self.connection.commit()
+
+    def get(self, key):
+        """Return the stored value for key (or None) and refresh its position in the LRU order"""
+        row = self.connection.execute(
+            "SELECT value, solve_seconds FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE results SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+        )
+        self.connection.commit()
+        value = json.loads(row[0])
+        value['solve_seconds'] = row[1]
+        return value
+
+    def put(self, key, model_hash, inputs, value, solve_seconds):
+        """Store a solved result and evict the least recently used entries beyond max_entries"""
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results (key, model_hash, inputs, value, solve_seconds, created, last_access, hits)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+            (key, model_hash, json.dumps(inputs, sort_keys=True), json.dumps(value), solve_seconds, now, now)
+        )
+        self.connection.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self.connection.commit()
+
+    def stats(self):
+        """Summary of the cache contents"""
+        entries, hits, solve_seconds = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(solve_seconds), 0.0) FROM results"
+        ).fetchone()
+        return {
+            'entries': entries,
+            'hits': hits,
+            'total_solve_seconds': solve_seconds,
+            'max_entries': self.max_entries
+        }
+
+    def clear(self):
+        """Remove every stored result"""
+        self.connection.execute("DELETE FROM results")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,92 @@
+import numpy as np
+import Constants as co
+from BatchScoring import score_designs
+
+PARAMETERS = ['bow_thickness', 'bow_curvature', 'limb_stiffness', 'grip_width', 'palm_size']
+OUTPUTS = ['launch_speed', 'draw_force', 'comfort_score', 'safety_score', 'performance_score']
+
+# Finite-difference steps for the piecewise scores: one UI spin box step per parameter, so a
+# non-zero entry means "one click of this knob changes the score by this much"
+SCORE_STEPS = np.array([
+    co.SINGLE_STEP_DISTANCE,    # bow_thickness (mm)
+    co.SINGLE_STEP_CURVATURE,   # bow_curvature
+    co.SINGLE_STEP_STIFFNESS,   # limb_stiffness
+    co.SINGLE_STEP_DISTANCE,    # grip_width (mm)
+    co.SINGLE_STEP_PALM_SIZE    # palm_size (mm)
+])
+
+# Step for differentiating the arrow mass model
+MASS_STEP = 1e-4
+
+# Which model the analytic rows describe, returned with every report
+MODEL_NOTE = ("Launch speed and draw force are differentiated on the unrounded tip diameter; the scores "
+              "(score_designs, simulate_performance) round it to 0.01 mm, which makes their speed piecewise constant")
+
+
+def design_sensitivity(optimizer, designs, palm_sizes, profile=None):
+    """Jacobian and normalized elasticities of the performance outputs for many designs.
+
+    designs is an (N, 4) array of (thickness, curvature, stiffness, grip width) and palm_sizes
+    an (N,) array. Launch speed and draw force are differentiated analytically from the
+    closed-form beam model (plus the arrow mass term of the speed); comfort, safety and overall scores are piecewise, so they use
+    central differences with one spin box step, evaluated for all designs in one batch.
+    The arrow mass term uses the unrounded tip diameter (design_arrow_mass()), not the 0.01 mm
+    rounding of the scoring pipeline, whose speed is flat between rounding steps (see
+    MODEL_NOTE; benchmark.py's sensitivity_check compares both with finite differences).
+    Returns a dict with 'values' (N, 5), 'jacobian' (N, 5, 5) and 'elasticity' (N, 5, 5)
+    indexed [design, output, parameter] in the order of OUTPUTS and PARAMETERS, and 'model'
+    (MODEL_NOTE).
+    """
+    profile = profile or optimizer.current_user
+    designs = np.atleast_2d(np.asarray(designs, dtype=np.float64))
+    palm_sizes = np.broadcast_to(np.asarray(palm_sizes, dtype=np.float64), (len(designs),))
+    inputs = np.column_stack([designs, palm_sizes])
+    count = len(inputs)
+
+    base = score_designs(optimizer, *inputs.T, profile=profile)
+    values = np.column_stack([base[name] for name in OUTPUTS])
+    jacobian = np.zeros((count, len(OUTPUTS), len(PARAMETERS)))
+
+    # Analytic part: F = C * t / L^3 with L = sqrt((a g)^2 + h^2), a the measured span ratio, and v = sqrt(2 F d / m)
+    thickness, stiffness, grip_width = inputs[:, 0], inputs[:, 2], inputs[:, 3]
+    force, speed = base['draw_force'], base['launch_speed']
+    constants = optimizer.physics_constants()
+    height_difference = constants['height_difference_between_beam_ends']
+    span_ratio = constants['beam_span_ratio']
+    force_gradient = np.zeros((count, len(PARAMETERS)))
+    force_gradient[:, 0] = force / thickness
+    force_gradient[:, 3] = (-3.0 * force * span_ratio**2 * grip_width
+                            / ((span_ratio * grip_width)**2 + height_difference**2))
+    jacobian[:, 1, :] = force_gradient
+    # The arrow mass m follows the tip diameter derived from thickness and stiffness; its
+    # gradient comes from central differences of the (smooth) printed-mass model
+    mass = optimizer.design_arrow_mass(thickness, stiffness, profile)
+    mass_gradient = np.zeros((count, len(PARAMETERS)))
+    mass_gradient[:, 0] = (optimizer.design_arrow_mass(thickness + MASS_STEP, stiffness, profile)
+                           - optimizer.design_arrow_mass(thickness - MASS_STEP, stiffness, profile)) / (2.0 * MASS_STEP)
+    mass_gradient[:, 2] = (optimizer.design_arrow_mass(thickness, stiffness + MASS_STEP, profile)
+                           - optimizer.design_arrow_mass(thickness, stiffness - MASS_STEP, profile)) / (2.0 * MASS_STEP)
+    jacobian[:, 0, :] = (speed / 2.0)[:, None] * (force_gradient / force[:, None] - mass_gradient / mass[:, None])
+
+    # Central differences for the piecewise scores, all perturbations in one batch
+    offsets = np.eye(len(PARAMETERS)) * SCORE_STEPS
+    perturbed = np.concatenate([inputs[None, :, :] + offsets[:, None, :],
+                                inputs[None, :, :] - offsets[:, None, :]]).reshape(-1, len(PARAMETERS))
+    scores = score_designs(optimizer, *perturbed.T, profile=profile)
+    for output_index, name in enumerate(OUTPUTS[2:], start=2):
+        shifted = scores[name].reshape(2, len(PARAMETERS), count)
+        jacobian[:, output_index, :] = ((shifted[0] - shifted[1]) / (2.0 * SCORE_STEPS[:, None])).T
+
+    # Elasticity: relative change of the output per relative change of the parameter
+    with np.errstate(divide='ignore', invalid='ignore'):
+        elasticity = jacobian * inputs[:, None, :] / values[:, :, None]
+    elasticity = np.nan_to_num(elasticity, nan=0.0, posinf=0.0, neginf=0.0)
+
+    return {
+        'parameters': PARAMETERS,
+        'outputs': OUTPUTS,
+        'values': values,
+        'jacobian': jacobian,
+        'elasticity': elasticity,
+        'model': MODEL_NOTE
+    }
@@ -0,0 +1,226 @@
+import contextlib
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from BowArrowOpt import BowArrowOptimizer
+from Profiling import NULL_SPAN
+from ViewMesh import component_view_arrays, part_colors
+
+SESSION_VERSION = 1
+
+
+class _RecordedAction:
+    """Times one UI action and appends it to the session when the block ends"""
+
+    def __init__(self, recorder, name, inputs):
+        self.recorder = recorder
+        self.name = name
+        self.inputs = inputs
+        self.start = 0.0
+
+    def __enter__(self):
+        self.recorder.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        self.recorder.depth -= 1
+        if exc_type is None:
+            self.recorder.actions.append({
+                'action': self.name,
+                'at': self.start - self.recorder.started,
+                'inputs': self.inputs,
+                'seconds': seconds
+            })
+        return False
+
+
+class SessionRecorder:
+    """Records the UI actions of a session with their inputs and latency, for replay_session().
+
+    Disabled until start(); while disabled, or inside another recorded action, action()
+    returns a shared no-op context manager, so only the outermost handler is recorded.
+    """
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.recording = False
+        self.actions = []
+        self.started = 0.0
+        self.created = None
+        self.depth = 0
+
+    def start(self):
+        self.recording = True
+        self.actions = []
+        self.started = time.perf_counter()
+        self.created = datetime.datetime.now().isoformat(timespec='seconds')
+
+    def stop(self):
+        self.recording = False
+
+    def action(self, name, **inputs):
+        """Context manager recording the enclosed block as action `name` (a REPLAY_ACTIONS key)"""
+        if not self.recording or self.depth:
+            return NULL_SPAN
+        return _RecordedAction(self, name, inputs)
+
+    def save(self, path):
+        """Write the session as JSON: the model, when it was recorded and the actions in order"""
+        with open(path, 'w') as f:
+            json.dump({
+                'version': SESSION_VERSION,
+                'model': self.model_path,
+                'created': self.created,
+                'actions': self.actions
+            }, f, indent=2)
+        return path
+
+
+def refresh_view(optimizer):
+    """Headless counterpart of BowArrowUI.update_model_view: view arrays (full and LOD) of the changed components"""
+    colors = part_colors(optimizer.component_roles(), optimizer.components)
+    lods = optimizer.level_of_detail()
+    arrays = []
+    for index in optimizer.take_dirty_components():
+        component = optimizer.components[index]
+        arrays.append(component_view_arrays(component, colors[index]))
+        arrays.append(component_view_arrays(component, colors[index], lods[index]))
+    return arrays
+
+
+def update_performance(optimizer):
+    """Headless counterpart of BowArrowUI.update_performance_displays"""
+    optimizer.simulate_performance()
+    optimizer.sensitivity_report()
+
+
+def replay_apply_profile(optimizer, inputs, export_dir):
+    if optimizer.set_user_profile(inputs['profile'], inputs['palm_size'], inputs['speed']):
+        optimizer.record_design(f"Apply {inputs['profile']} Profile")
+
+
+def replay_preview(optimizer, inputs, export_dir):
+    vertices = optimizer.preview_vertices(inputs['thickness'], inputs['curvature'], inputs['grip_width'],
+                                          inputs['draw_fraction'])
+    for index, lod_mesh in enumerate(optimizer.level_of_detail()):
+        lod_mesh.vertices(vertices[index])
+    if inputs['draw_fraction'] > 0:
+        optimizer.estimate_draw_force(inputs['thickness'], inputs['curvature'], inputs['stiffness'],
+                                      inputs['grip_width'])
+
+
+def replay_apply_parameters(optimizer, inputs, export_dir):
+    optimizer.set_user_profile(inputs['profile'], inputs['palm_size'], inputs['speed'])
+    optimizer.refresh_parameters(inputs['thickness'], inputs['curvature'], inputs['stiffness'], inputs['grip_width'],
+                                 optimizer.arrow_length, optimizer.arrow_weight, optimizer.tip_diameter)
+    optimizer.apply_geometry_update()
+    optimizer.record_design("Apply Parameters")
+    refresh_view(optimizer)
+
+
+def replay_optimize_design(optimizer, inputs, export_dir):
+    targets = optimizer.user_profiles[optimizer.current_user]
+    optimizer.optimize_for_performance(targets['max_launch_speed'], targets['max_draw_force'],
+                                       lock_speed=True, lock_force=True)
+    optimizer.record_design("Optimize Design")
+    refresh_view(optimizer)
+
+
+def replay_optimize_performance(optimizer, inputs, export_dir):
+    result = optimizer.optimize_for_performance(inputs['target_speed'], inputs['target_force'],
+                                                inputs['lock_speed'], inputs['lock_force'], mode=inputs['mode'])
+    if result['status'] != 'infeasible':
+        optimizer.record_design("Optimize Performance")
+        refresh_view(optimizer)
+
+
+def replay_optimize_score(optimizer, inputs, export_dir):
+    if optimizer.optimize_score()['applied']:
+        optimizer.record_design("Maximize Score")
+        refresh_view(optimizer)
+
+
+def replay_simulate(optimizer, inputs, export_dir):
+    update_performance(optimizer)
+
+
+def replay_export(optimizer, inputs, export_dir):
+    optimizer.export_model(os.path.join(export_dir, 'session_export.stl'), allow_invalid=True)
+
+
+def replay_undo(optimizer, inputs, export_dir):
+    optimizer.undo()
+
+
+def replay_redo(optimizer, inputs, export_dir):
+    optimizer.redo()
+
+
+def replay_history_rebuild(optimizer, inputs, export_dir):
+    refresh_view(optimizer)
+    update_performance(optimizer)
+
+
+# Recorded action name -> function(optimizer, inputs, export_dir) doing the handler's work without Qt
+REPLAY_ACTIONS = {
+    'apply_profile': replay_apply_profile,
+    'preview': replay_preview,
+    'apply_parameters': replay_apply_parameters,
+    'optimize_design': replay_optimize_design,
+    'optimize_performance': replay_optimize_performance,
+    'optimize_score': replay_optimize_score,
+    'simulate': replay_simulate,
+    'export': replay_export,
+    'undo': replay_undo,
+    'redo': replay_redo,
+    'history_rebuild': replay_history_rebuild
+}
+
+
+def load_session(path):
+    with open(path) as f:
+        session = json.load(f)
+    if session.get('version') != SESSION_VERSION:
+        raise ValueError(f"Unsupported session version {session.get('version')} in {path}")
+    unknown = sorted({action['action'] for action in session['actions']} - set(REPLAY_ACTIONS))
+    if unknown:
+        raise ValueError(f"Unknown session actions in {path}: {', '.join(unknown)}")
+    return session
+
+
+def replay_session(session, model_path=None, use_cache=False):
+    """Run a recorded session's actions back to back through the optimizer; returns the latency of each step.
+
+    The model is loaded first (as the UI's loader thread does) and timed as step 'load'. Think
+    time between actions is not replayed. Without use_cache every optimization is solved
+    again instead of being read from the result cache. Returns one dict per step with the
+    action, its replayed 'seconds' and the 'recorded_seconds' the UI measured (None for 'load').
+    """
+    steps = []
+    with tempfile.TemporaryDirectory() as export_dir, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        optimizer = BowArrowOptimizer(model_path or session['model'], use_cache=use_cache)
+        optimizer.level_of_detail()
+        steps.append({'action': 'load', 'seconds': time.perf_counter() - start, 'recorded_seconds': None})
+        for action in session['actions']:
+            start = time.perf_counter()
+            REPLAY_ACTIONS[action['action']](optimizer, action['inputs'], export_dir)
+            steps.append({'action': action['action'], 'seconds': time.perf_counter() - start,
+                          'recorded_seconds': action['seconds']})
+    return steps
+
+
+def action_latencies(steps):
+    """Total, median and largest latency (ms) per action type over replayed steps"""
+    latencies = {}
+    for step in steps:
+        latencies.setdefault(step['action'], []).append(step['seconds'] * 1000)
+    return {action: {'count': len(samples), 'total_ms': float(np.sum(samples)),
+                     'median_ms': float(np.median(samples)), 'max_ms': float(np.max(samples))}
+            for action, samples in latencies.items()}
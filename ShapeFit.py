@@ -0,0 +1,107 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import Constants as co
+from BlendShapes import DeformationBasis
+from Deformation import FACTOR_PARAMETERS, classify_components
+
+# Scale factors that change the bow body's shape, in search order; limb stiffness only enters
+# the force model, so it cannot be recovered from geometry
+FIT_FACTORS = ['thickness_factor', 'curvature_factor', 'grip_scale']
+
+
+def bow_vertices(mesh):
+    """Vertices of the bow components of a loaded mesh, stacked (arrows are left out)"""
+    vertex_arrays = [np.array(component.vertices) for component in mesh.split()]
+    bows = [vertices for role, vertices in zip(classify_components(vertex_arrays), vertex_arrays) if role == 'bow']
+    if not bows:
+        raise ValueError("Mesh has no bow component")
+    return np.concatenate(bows)
+
+
+class ShapeFitter:
+    """Recovers the bow parameters that deform a base bow into a target shape.
+
+    Candidates are deformed in batches with the blend-shape basis of the base bow and scored by
+    the symmetric Chamfer distance (mean nearest-neighbour distance in both directions, via KD
+    trees) to the target vertices, so the two meshes need no vertex correspondence. A coarse grid
+    over FIT_FACTOR_BOUNDS is scored on a vertex sample, then the best grid points are refined
+    concurrently with Nelder-Mead on all vertices.
+    """
+
+    def __init__(self, base_vertices, workers=None, seed=0):
+        self.basis = DeformationBasis(['bow'], [np.asarray(base_vertices, dtype=np.float64)])
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = np.random.default_rng(seed)
+
+    def deform(self, factor_rows):
+        """Deformed base vertices for an (K, 3) array of FIT_FACTORS values: (K, N, 3)"""
+        factor_rows = np.atleast_2d(factor_rows)
+        factors = {name: factor_rows[:, i] for i, name in enumerate(FIT_FACTORS)}
+        factors.update(arrow_scale=1.0, tip_scale=1.0)
+        return self.basis.evaluate_many(factors)
+
+    def chamfer(self, candidates, target_tree, target_points, executor):
+        """Symmetric Chamfer distance (mm) of each candidate shape to the target"""
+        from scipy.spatial import cKDTree
+
+        count, size, _ = candidates.shape
+        forward, _ = target_tree.query(candidates.reshape(-1, 3), workers=self.workers)
+        forward = forward.reshape(count, size).mean(axis=1)
+        backward = np.fromiter(executor.map(lambda shape: cKDTree(shape).query(target_points)[0].mean(), candidates),
+                               dtype=np.float64, count=count)
+        return (forward + backward) / 2
+
+    def fit(self, target_vertices):
+        """Best-fitting parameters for the target bow vertices.
+
+        Returns a dict with the parameters (limb_stiffness is None: it does not change the
+        shape), the scale factors, the Chamfer distance in mm, whether it is within
+        FIT_TOLERANCE_MM, the number of candidates scored and the time taken.
+        """
+        from scipy.optimize import minimize
+        from scipy.spatial import cKDTree
+
+        start = time.perf_counter()
+        target_vertices = np.asarray(target_vertices, dtype=np.float64)
+        target_tree = cKDTree(target_vertices)
+        bounds = [co.FIT_FACTOR_BOUNDS[name] for name in FIT_FACTORS]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Coarse grid, every candidate deformed and scored in one batch on a vertex sample
+            axes = [np.linspace(low, high, co.FIT_GRID_POINTS) for low, high in bounds]
+            grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(FIT_FACTORS))
+            sample = self.rng.choice(len(self.basis.offset), min(co.FIT_SAMPLE_POINTS, len(self.basis.offset)),
+                                     replace=False)
+            target_sample = target_vertices[self.rng.choice(len(target_vertices),
+                                                            min(co.FIT_SAMPLE_POINTS, len(target_vertices)),
+                                                            replace=False)]
+            grid_scores = self.chamfer(self.deform(grid)[:, sample], target_tree, target_sample, executor)
+            starts = grid[np.argsort(grid_scores)[:co.FIT_REFINE_STARTS]]
+
+            # Refine the best grid points concurrently on all vertices
+            steps = np.array([(high - low) / (co.FIT_GRID_POINTS - 1) for low, high in bounds])
+
+            def refine(x0):
+                return minimize(
+                    lambda x: self.chamfer(self.deform(x), target_tree, target_vertices, executor)[0],
+                    x0, method='Nelder-Mead', bounds=bounds,
+                    options={'xatol': 1e-4, 'fatol': 1e-7, 'initial_simplex': np.vstack([x0, x0 + np.diag(steps) / 2])}
+                )
+
+            with ThreadPoolExecutor(max_workers=len(starts)) as refiners:
+                refined = list(refiners.map(refine, starts))
+        best = min(refined, key=lambda result: result.fun)
+
+        factors = dict(zip(FIT_FACTORS, (float(value) for value in best.x)))
+        parameters = {FACTOR_PARAMETERS[name][0]: value * FACTOR_PARAMETERS[name][1] for name, value in factors.items()}
+        parameters['limb_stiffness'] = None
+        return {
+            'parameters': parameters,
+            'factors': factors,
+            'chamfer_mm': float(best.fun),
+            'matched': bool(best.fun <= co.FIT_TOLERANCE_MM),
+            'candidates': len(grid) + sum(result.nfev for result in refined),
+            'seconds': time.perf_counter() - start
+        }
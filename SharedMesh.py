@@ -0,0 +1,208 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import Constants as co
+from BatchScoring import derived_tip_diameter
+from Deformation import deformation_factors, reference_y_center, deform_component
+from MassProperties import mass_properties, printed_mass
+from MeshValidity import MeshChecker, merge_reports
+from PrintEstimate import estimate_print
+
+# Buffers attached by a worker process (set by attach_worker)
+_worker_state = {}
+
+
+class SharedMeshBuffers:
+    """Base component vertex and face arrays placed once in shared memory.
+
+    Worker processes attach read-only views through the picklable handle() instead of
+    pickling or reloading the trimesh, so each worker only adds its private output buffers.
+    Use as a context manager (or call close()) to release the blocks.
+    """
+
+    def __init__(self, optimizer):
+        self.blocks = []
+        self.components = []
+        for role, vertices, component in zip(optimizer.component_roles(), optimizer.original_vertices,
+                                             optimizer.components):
+            faces = np.asarray(component.faces)
+            entry = {'role': role}
+            for key, array in (('vertices', np.ascontiguousarray(vertices, dtype=np.float64)),
+                               ('faces', np.ascontiguousarray(faces, dtype=np.int64))):
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                self.blocks.append(block)
+                entry[key] = (block.name, array.shape, array.dtype.str)
+            self.components.append(entry)
+
+    def handle(self):
+        """Picklable description of the shared blocks for attach()"""
+        return list(self.components)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _attach_block(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached blocks with the resource tracker; pool workers
+        # share the creator's tracker, so the creator's unlink still releases them once
+        return shared_memory.SharedMemory(name=name)
+
+
+def private_memory_kb():
+    """Memory private to this process (not shared with other processes) in kB, or None if unknown"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None
+    return sum(int(fields[key].split()[0]) for key in ('Private_Clean', 'Private_Dirty') if key in fields)
+
+
+def attach(handle):
+    """Attach read-only views of the shared component arrays.
+
+    Returns (components, blocks): components is a list of dicts with 'role', 'vertices' and
+    'faces'; blocks must stay referenced as long as the views are used.
+    """
+    components = []
+    blocks = []
+    for entry in handle:
+        component = {'role': entry['role']}
+        for key in ('vertices', 'faces'):
+            name, shape, dtype = entry[key]
+            block = _attach_block(name)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            component[key] = array
+            blocks.append(block)
+        components.append(component)
+    return components, blocks
+
+
+def attach_worker(handle, checker_data=None):
+    """Process-pool initializer: attach the shared arrays and allocate private output buffers and mesh checkers.
+
+    checker_data is an optional (reach, candidates) per component (see MeshValidity.MeshChecker),
+    so the workers' checks filter the parent's candidate pairs instead of querying the BVH.
+    """
+    components, blocks = attach(handle)
+    _worker_state['components'] = components
+    _worker_state['blocks'] = blocks
+    _worker_state['outputs'] = [np.empty_like(component['vertices']) for component in components]
+    _worker_state['checkers'] = [MeshChecker(component['vertices'], component['faces'], *data)
+                                 for component, data in zip(components, checker_data or [(None, None)] * len(components))]
+
+
+def deform_components(components, parameters, outputs=None):
+    """Deform raw component arrays for one parameter set (same edits as apply_geometry_update).
+
+    parameters needs bow_thickness, bow_curvature, grip_width and either tip_diameter or
+    limb_stiffness (+ optional profile) to derive it like refresh_parameters does.
+    """
+    profile = parameters.get('profile', 'Adult')
+    tip_diameter = parameters.get('tip_diameter')
+    if tip_diameter is None:
+        tip_diameter = float(derived_tip_diameter(parameters['limb_stiffness'], parameters['bow_thickness'], profile))
+    factors = deformation_factors(parameters['bow_thickness'], parameters['bow_curvature'], parameters['grip_width'],
+                                  parameters.get('arrow_length', co.DEFAULT_ARROW_LENGTH), tip_diameter)
+    if outputs is None:
+        outputs = [np.empty_like(component['vertices']) for component in components]
+
+    y_center = reference_y_center([component['role'] for component in components],
+                                  [component['vertices'] for component in components])
+    for component, out in zip(components, outputs):
+        deform_component(component['role'], component['vertices'], factors, y_center, out=out)
+    return outputs
+
+
+def write_binary_stl(path, components, vertex_arrays):
+    """Write the deformed components as one binary STL using numpy only"""
+    triangles = np.concatenate([vertices[component['faces']] for component, vertices in zip(components, vertex_arrays)])
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    record = np.zeros(len(triangles), dtype=[('normal', '<f4', 3), ('triangle', '<f4', (3, 3)), ('attribute', '<u2')])
+    record['normal'] = normals
+    record['triangle'] = triangles
+    with open(path, 'wb') as f:
+        f.write(b'Bow variant'.ljust(80, b'\0'))
+        f.write(np.uint32(len(record)).tobytes())
+        f.write(record.tobytes())
+    return os.path.abspath(path)
+
+
+def _variant_task(task):
+    """Worker body: deform into the private buffers, check, estimate and return only a small result record.
+
+    A variant failing the mesh check is not exported unless allow_invalid. The print estimate
+    and the printed mass use the optional 'layer_height' and 'infill' of the parameters
+    (default: the bundled prints').
+    """
+    index, parameters, export_path, return_vertices, allow_invalid = task
+    components = _worker_state['components']
+    outputs = deform_components(components, parameters, _worker_state['outputs'])
+    validity = merge_reports([checker.check(out) for checker, out in zip(_worker_state['checkers'], outputs)])
+    infill = parameters.get('infill', co.PRINT_INFILL)
+    masses = [mass_properties(out, component['faces']) for component, out in zip(components, outputs)]
+
+    result = {
+        'index': index,
+        'parameters': parameters,
+        'bounds': [np.min(np.vstack(outputs), axis=0).tolist(), np.max(np.vstack(outputs), axis=0).tolist()],
+        'validity': validity,
+        'mass': float(sum(printed_mass(properties['volume'], properties['area'], infill=infill)
+                          for properties in masses)),
+        'print_estimate': estimate_print(outputs, [component['faces'] for component in components],
+                                         parameters.get('layer_height', co.PRINT_LAYER_HEIGHT), infill),
+        'pid': os.getpid()
+    }
+    if export_path and (validity['valid'] or allow_invalid):
+        result['path'] = write_binary_stl(export_path, components, outputs)
+    if return_vertices:
+        result['vertices'] = [out.copy() for out in outputs]
+    result['worker_private_kb'] = private_memory_kb()
+    return result
+
+
+def generate_variants(optimizer, parameter_sets, export_paths=None, workers=None, return_vertices=False,
+                      allow_invalid=False):
+    """Deform (and optionally export) many parameter sets in parallel worker processes.
+
+    The base arrays go to shared memory once; workers are spawned fresh (no inherited copy
+    of the parent's meshes) and return only their result records, in input order. Every
+    variant is run through the mesh check ('validity' in its record), with the optimizer's
+    candidate face pairs; invalid variants get no file (no 'path') unless allow_invalid. Every record also has a 'print_estimate', so
+    the variants can be ranked by print cost (PrintEstimate.rank_by_print_cost).
+    """
+    export_paths = export_paths or [None] * len(parameter_sets)
+    tasks = [(i, dict(parameters), path, return_vertices, allow_invalid)
+             for i, (parameters, path) in enumerate(zip(parameter_sets, export_paths))]
+    if not tasks:
+        return []
+
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    if optimizer.mesh_checkers is None:
+        optimizer.mesh_checkers = optimizer.build_mesh_checkers()
+    checker_data = [(reach, checker.candidates) for reach, checker in zip(optimizer.vertex_reach(), optimizer.mesh_checkers)]
+    with SharedMeshBuffers(optimizer) as buffers:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=attach_worker, initargs=(buffers.handle(), checker_data)) as pool:
+            results = list(pool.map(_variant_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return results
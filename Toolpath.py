@@ -0,0 +1,151 @@
+import time
+import numpy as np
+import Constants as co
+
+# Line colors (RGBA) of the Cura ;TYPE: sections; other types are drawn in OTHER_COLOR
+TYPE_COLORS = {
+    'WALL-OUTER': (0.9, 0.3, 0.2, 1.0),
+    'WALL-INNER': (0.3, 0.8, 0.3, 1.0),
+    'SKIN': (0.95, 0.8, 0.2, 1.0),
+    'FILL': (0.8, 0.5, 0.2, 1.0),
+    'SUPPORT': (0.3, 0.7, 0.9, 1.0),
+    'SUPPORT-INTERFACE': (0.2, 0.5, 0.9, 1.0),
+    'SKIRT': (0.7, 0.7, 0.7, 1.0),
+    'TRAVEL': (0.4, 0.4, 0.9, 0.4)
+}
+OTHER_COLOR = (0.6, 0.6, 0.6, 1.0)
+TYPE_NAMES = list(TYPE_COLORS)
+KIND_COLORS = np.array([TYPE_COLORS[name] for name in TYPE_NAMES] + [OTHER_COLOR], dtype=np.float32)
+
+
+def decimate(starts, ends, kinds, tolerance=co.TOOLPATH_DECIMATION_TOLERANCE):
+    """Merge chained moves of one type into longer segments while the path moves less than tolerance (mm).
+
+    Moves k and k + 1 are merged if k ends where k + 1 starts, both have the same kind and the
+    shared point (plus the error already merged into either move) lies within tolerance of the
+    merged segment. Each pass merges every other mergeable joint of a chain at once, so all
+    merges of a pass are independent; passes repeat until nothing merges.
+    Returns the kept (starts, ends, kinds).
+    """
+    errors = np.zeros(len(starts))
+    for _ in range(co.TOOLPATH_DECIMATION_PASSES):
+        if len(starts) < 2:
+            break
+        chained = np.all(ends[:-1] == starts[1:], axis=1) & (kinds[:-1] == kinds[1:])
+        # Distance of the shared point to the merged segment (projection clamped to its ends)
+        chord = ends[1:] - starts[:-1]
+        offset = ends[:-1] - starts[:-1]
+        length_squared = np.einsum('ij,ij->i', chord, chord)
+        fraction = np.clip(np.einsum('ij,ij->i', offset, chord) / np.where(length_squared > 0, length_squared, 1.0),
+                           0.0, 1.0)
+        distance = np.linalg.norm(offset - fraction[:, None] * chord, axis=1)
+        merged_error = distance + np.maximum(errors[:-1], errors[1:])
+        candidates = chained & (merged_error <= tolerance)
+        if not candidates.any():
+            break
+
+        # Every other joint of each run of candidates, so no move takes part in two merges
+        index = np.arange(len(candidates))
+        run_start = np.maximum.accumulate(np.where(candidates, 0, index + 1))
+        joints = np.flatnonzero(candidates & ((index - run_start) % 2 == 0))
+
+        ends[joints] = ends[joints + 1]
+        errors[joints] = merged_error[joints]
+        keep = np.ones(len(starts), dtype=bool)
+        keep[joints + 1] = False
+        starts, ends, kinds, errors = starts[keep], ends[keep], kinds[keep], errors[keep]
+    return starts, ends, kinds
+
+
+def build_layer(index, moves, tolerance=co.TOOLPATH_DECIMATION_TOLERANCE):
+    """Compact line buffers of one layer from its moves (x0, y0, z0, x1, y1, z1, kind).
+
+    Returns a dict with the layer index and height, float32 'positions' (2S, 3) and 'colors'
+    (2S, 4) of the S kept segments (pairs of points, as GL line lists take them), and the
+    move and segment counts.
+    """
+    moves = np.asarray(moves, dtype=np.float64).reshape(-1, 7)
+    starts, ends, kinds = decimate(moves[:, :3].copy(), moves[:, 3:6].copy(), moves[:, 6].astype(np.intp), tolerance)
+    positions = np.empty((2 * len(starts), 3), dtype=np.float32)
+    positions[0::2] = starts
+    positions[1::2] = ends
+    return {
+        'index': index,
+        'z': float(np.median(moves[:, 5])) if len(moves) else 0.0,
+        'positions': positions,
+        'colors': np.repeat(KIND_COLORS[kinds], 2, axis=0),
+        'moves': len(moves),
+        'segments': len(starts)
+    }
+
+
+def stream_layers(path, tolerance=co.TOOLPATH_DECIMATION_TOLERANCE, include_travel=False):
+    """Parse a G-code file one layer at a time, yielding build_layer() dicts as each ;LAYER: section ends.
+
+    Only moves inside layers are kept: extruding G1 moves (absolute or relative E) colored by
+    their ;TYPE:, and travel moves if include_travel. Nothing but the current layer's moves is
+    held in memory.
+    """
+    x = y = z = e = 0.0
+    relative = False
+    kind = len(TYPE_NAMES)
+    travel = TYPE_NAMES.index('TRAVEL')
+    layer = None
+    moves = []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith(';'):
+                if line.startswith(';LAYER:'):
+                    if layer is not None:
+                        yield build_layer(layer, moves, tolerance)
+                    layer = int(line[7:])
+                    moves = []
+                elif line.startswith(';TYPE:'):
+                    name = line[6:].strip()
+                    kind = TYPE_NAMES.index(name) if name in TYPE_COLORS else len(TYPE_NAMES)
+                continue
+            words = line.split(';', 1)[0].split()
+            if not words:
+                continue
+            command = words[0]
+            if command in ('G0', 'G1'):
+                nx, ny, nz, ne = x, y, z, (0.0 if relative else e)
+                for word in words[1:]:
+                    axis = word[0]
+                    if axis == 'X':
+                        nx = float(word[1:])
+                    elif axis == 'Y':
+                        ny = float(word[1:])
+                    elif axis == 'Z':
+                        nz = float(word[1:])
+                    elif axis == 'E':
+                        ne = float(word[1:])
+                if layer is not None and (nx != x or ny != y):
+                    extruding = command == 'G1' and (ne > 0 if relative else ne > e)
+                    if extruding or include_travel:
+                        moves.append((x, y, z, nx, ny, nz, kind if extruding else travel))
+                x, y, z = nx, ny, nz
+                if not relative:
+                    e = ne
+            elif command == 'G92':
+                for word in words[1:]:
+                    if word[0] == 'E':
+                        e = float(word[1:])
+            elif command == 'M82':
+                relative = False
+            elif command == 'M83':
+                relative = True
+    if layer is not None:
+        yield build_layer(layer, moves, tolerance)
+
+
+def load_toolpath(path, tolerance=co.TOOLPATH_DECIMATION_TOLERANCE, include_travel=False):
+    """All layers of a G-code file (see stream_layers), with the move and segment totals and the time taken"""
+    start = time.perf_counter()
+    layers = list(stream_layers(path, tolerance, include_travel))
+    return {
+        'layers': layers,
+        'moves': sum(layer['moves'] for layer in layers),
+        'segments': sum(layer['segments'] for layer in layers),
+        'seconds': time.perf_counter() - start
+    }
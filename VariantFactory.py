@@ -0,0 +1,211 @@
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import os
+import Constants as co
+from BatchScoring import score_designs
+from DesignHistory import STATE_ATTRIBUTES
+from PrintEstimate import setting_value
+from ResultCache import make_key
+from SharedMesh import generate_variants
+
+PROFILES = ['Child', 'Adult', 'Professional']
+SPEEDS = ['Low', 'Medium', 'High']
+
+# Bump when the cell pipeline changes so that every cell is rebuilt on the next run
+FACTORY_VERSION = 7
+
+
+def load_matrix(path):
+    """Read a catalogue matrix JSON file.
+
+    Keys: 'model' (optional), 'profiles', 'palm_sizes' (mm), 'speeds' and optional 'targets'.
+    'targets' is a list of {'launch_speed', 'draw_force', 'lock_speed', 'lock_force', 'mode'}
+    entries applied to every profile, or a dict mapping a profile to such a list.
+    """
+    with open(path, encoding='utf-8') as f:
+        matrix = json.load(f)
+    for key in ('profiles', 'palm_sizes', 'speeds'):
+        if not matrix.get(key):
+            raise ValueError(f"Matrix is missing '{key}'")
+    unknown = [name for name in matrix['profiles'] if name not in PROFILES]
+    unknown += [name for name in matrix['speeds'] if name not in SPEEDS]
+    if unknown:
+        raise ValueError(f"Unknown profiles or speeds in matrix: {', '.join(unknown)}")
+    return matrix
+
+
+def expand_matrix(matrix):
+    """Every (profile, palm size, speed, target) cell of the matrix, in a stable order"""
+    targets = matrix.get('targets')
+    cells = []
+    for profile in matrix['profiles']:
+        profile_targets = targets.get(profile) if isinstance(targets, dict) else targets
+        for palm_size, speed, target in itertools.product(matrix['palm_sizes'], matrix['speeds'],
+                                                          profile_targets or [None]):
+            cells.append({
+                'profile': profile,
+                'palm_size': float(palm_size),
+                'preferred_speed': speed,
+                'target': target
+            })
+    return cells
+
+
+def cell_name(cell):
+    """File name stem of a cell, e.g. Adult_palm85_Medium or Adult_palm85_Medium_3.5ms_5N"""
+    name = f"{cell['profile']}_palm{cell['palm_size']:g}_{cell['preferred_speed']}"
+    target = cell['target']
+    if target:
+        name += f"_{target['launch_speed']:g}ms_{target['draw_force']:g}N"
+        if target.get('lock_speed') or target.get('lock_force'):
+            name += '_locked' + ('S' if target.get('lock_speed') else '') + ('F' if target.get('lock_force') else '')
+    return name
+
+
+def cell_key(optimizer, cell):
+    """Hash of everything a cell's output depends on; an unchanged key means the file is up to date"""
+    return make_key(optimizer.model_hash, optimizer.physics_constants(),
+                    {'cell': cell, 'factory_version': FACTORY_VERSION})
+
+
+def solve_cell(optimizer, cell):
+    """Apply the cell's profile, palm size, speed preference and optional targets to the optimizer.
+
+    Returns (status, parameters); parameters are everything the deformation needs.
+    """
+    optimizer.set_user_profile(cell['profile'], cell['palm_size'], cell['preferred_speed'])
+    status = 'solved'
+    target = cell['target']
+    if target:
+        result = optimizer.optimize_for_performance(
+            target['launch_speed'], target['draw_force'],
+            lock_speed=target.get('lock_speed', False), lock_force=target.get('lock_force', False),
+            mode=target.get('mode', 'penalty'), constraint_kind=target.get('constraint_kind', 'eq')
+        )
+        status = result['status']
+    parameters = {
+        'profile': optimizer.current_user,
+        'palm_size': optimizer.palm_size,
+        'bow_thickness': float(optimizer.bow_thickness),
+        'bow_curvature': float(optimizer.bow_curvature),
+        'limb_stiffness': float(optimizer.limb_stiffness),
+        'grip_width': float(optimizer.grip_width),
+        'arrow_length': float(optimizer.arrow_length),
+        'arrow_weight': float(optimizer.arrow_weight),
+        'tip_diameter': float(optimizer.tip_diameter)
+    }
+    return status, parameters
+
+
+def cell_scores(optimizer, parameters):
+    """simulate_performance() scores of a solved cell, without touching the optimizer's logs"""
+    scores = score_designs(optimizer, parameters['bow_thickness'], parameters['bow_curvature'],
+                           parameters['limb_stiffness'], parameters['grip_width'], parameters['palm_size'],
+                           parameters['profile'], parameters['arrow_weight'], parameters['tip_diameter'])
+    return {name: float(value) for name, value in scores.items()}
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_catalogue(optimizer, matrix, output_dir=co.VARIANT_OUTPUT_DIR, workers=None, force=False,
+                    allow_invalid=False):
+    """Optimize, deform and export every cell of the matrix and write the manifest.
+
+    Cells whose key matches the previous manifest and whose file still exists are kept as
+    they are (unless force). The remaining cells are solved one after another on the optimizer
+    (cheap, and cached across runs) and then deformed and exported in parallel worker
+    processes by SharedMesh.generate_variants. Infeasible cells are listed without a file or
+    scores. Every deformed cell gets the mesh check's report ('validity'); cells failing it are
+    listed as 'invalid' without a file, unless allow_invalid. Every deformed cell gets the print
+    estimate of its own mesh at its recommended layer height and infill. File paths in the
+    manifest are relative to output_dir.
+    Returns the manifest dict.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, co.VARIANT_MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    previous_entries = {entry['key']: entry for entry in (previous or {}).get('variants', [])}
+
+    entries = []
+    pending = []
+    saved_state = {name: getattr(optimizer, name) for name in STATE_ATTRIBUTES}
+    geometry_changed = False
+    for cell in expand_matrix(matrix):
+        key = cell_key(optimizer, cell)
+        old = previous_entries.get(key)
+        # A cell failing the check is rebuilt when the allow_invalid setting no longer matches its entry
+        failed = old is not None and not old.get('validity', {'valid': True})['valid']
+        if old is not None and not force and not (failed and (old['status'] == 'invalid') == allow_invalid) and (
+                old['file'] is None or os.path.exists(os.path.join(output_dir, old['file']))):
+            entries.append(dict(old, reused=True))
+            continue
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            status, parameters = solve_cell(optimizer, cell)
+            # The optimizer's mesh is not the cell's; the variant's mass comes from its worker
+            print_settings = optimizer.get_print_settings(estimate=False, mass=False)
+        # optimize_for_performance also updates the optimizer's own mesh
+        geometry_changed |= bool(cell['target']) and status != 'infeasible'
+        entry = {
+            'name': cell_name(cell),
+            'key': key,
+            'cell': cell,
+            'status': status,
+            'file': None,
+            'parameters': parameters,
+            'scores': None,
+            'print_settings': print_settings,
+            'reused': False
+        }
+        if status != 'infeasible':
+            entry['file'] = entry['name'] + '.stl'
+            entry['scores'] = cell_scores(optimizer, parameters)
+            pending.append(entry)
+        entries.append(entry)
+
+    # Leave the optimizer in the state it started with
+    for name, value in saved_state.items():
+        setattr(optimizer, name, value)
+    if geometry_changed:
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer.apply_geometry_update()
+
+    if pending:
+        # Each variant's print cost is estimated in its worker, at the recommended settings
+        results = generate_variants(optimizer, [dict(entry['parameters'],
+                                                     layer_height=setting_value(entry['print_settings']['layer_height']),
+                                                     infill=setting_value(entry['print_settings']['infill']))
+                                                for entry in pending],
+                                    [os.path.join(output_dir, entry['file']) for entry in pending],
+                                    workers=workers, allow_invalid=allow_invalid)
+        for entry, result in zip(pending, results):
+            entry['bounds'] = result['bounds']
+            entry['validity'] = result['validity']
+            entry['print_estimate'] = result['print_estimate']
+            entry['print_settings']['estimated_mass'] = round(result['mass'], 2)
+            if 'path' not in result:
+                entry['status'] = 'invalid'
+                entry['file'] = None
+
+    manifest = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'model': matrix.get('model'),
+        'model_hash': optimizer.model_hash,
+        'constants_profile_version': optimizer.constants_profile_version,
+        'generated': sum(entry['file'] is not None for entry in pending),
+        'rejected': sum(entry['status'] == 'invalid' for entry in pending),
+        'failed_check': sum(not entry['validity']['valid'] for entry in pending),
+        'reused': sum(entry['reused'] for entry in entries),
+        'variants': entries
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
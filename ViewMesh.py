@@ -0,0 +1,80 @@
+import numpy as np
+from Deformation import bow_regions
+
+BOW_COLOR = [0.7, 0.3, 0.3, 1.0]
+ARROW_COLOR = [0.3, 0.5, 0.7, 1.0]
+
+# Viewer color modes: by part, by displacement from the original geometry, by deformation region
+COLOR_MODES = ['Parts', 'Displacement', 'Region']
+
+# Displacement heatmap: color stops from no displacement (0) to the largest displacement (1)
+HEATMAP_POSITIONS = [0.0, 0.33, 0.66, 1.0]
+HEATMAP_STOPS = np.array([
+    [0.2, 0.3, 0.8, 1.0],
+    [0.2, 0.8, 0.8, 1.0],
+    [0.9, 0.9, 0.2, 1.0],
+    [0.9, 0.2, 0.2, 1.0]
+])
+
+# Deformation regions of the bow (see bow_regions in Deformation.py); vertices in none stay fixed
+REGION_COLORS = {
+    'fixed': [0.6, 0.6, 0.6, 1.0],
+    'grip': [0.3, 0.7, 0.3, 1.0],
+    'limb_z': [0.9, 0.6, 0.2, 1.0],
+    'power_z': [0.6, 0.3, 0.8, 1.0],
+    'limb_power_z': [0.9, 0.3, 0.5, 1.0]
+}
+
+
+def part_colors(roles, components):
+    """Per-component vertex colors by part: BOW_COLOR for bows, ARROW_COLOR for arrows"""
+    return [np.tile(BOW_COLOR if role == 'bow' else ARROW_COLOR, (len(component.vertices), 1))
+            for role, component in zip(roles, components)]
+
+
+def component_view_arrays(component, colors, lod_mesh=None):
+    """Vertex, face and color arrays of one component (or its LOD mesh) for its own viewer mesh item.
+
+    This is what the viewer uploads per changed component; colors are the component's vertex
+    colors (e.g. from part_colors()).
+    """
+    if lod_mesh is not None:
+        return lod_mesh.vertices(component.vertices), lod_mesh.faces, colors[lod_mesh.representatives]
+    return np.asarray(component.vertices), np.asarray(component.faces), colors
+
+
+def heatmap_colors(values, max_value):
+    """RGBA heatmap colors of values scaled to [0, max_value]"""
+    scaled = np.clip(values / max_value, 0.0, 1.0) if max_value > 0 else np.zeros_like(values)
+    return np.column_stack([np.interp(scaled, HEATMAP_POSITIONS, HEATMAP_STOPS[:, channel])
+                            for channel in range(4)])
+
+
+def displacement_colors(original_vertices, vertex_arrays):
+    """Per-component vertex colors by displacement from the original geometry, in one pass.
+
+    All components share one scale (the largest displacement, also returned) so colors compare.
+    """
+    original = np.vstack(original_vertices)
+    magnitudes = np.linalg.norm(np.vstack([np.asarray(vertices) for vertices in vertex_arrays]) - original, axis=1)
+    max_displacement = float(magnitudes.max()) if len(magnitudes) else 0.0
+    colors = heatmap_colors(magnitudes, max_displacement)
+    splits = np.cumsum([len(vertices) for vertices in original_vertices])[:-1]
+    return np.split(colors, splits), max_displacement
+
+
+def region_colors(roles, original_vertices):
+    """Per-component vertex colors by the deformation region each vertex belongs to"""
+    colors = []
+    for role, original in zip(roles, original_vertices):
+        if role == 'bow':
+            component_colors = np.tile(REGION_COLORS['fixed'], (len(original), 1))
+            regions = bow_regions(original)
+            # The grip overlaps the power region; its z edit wins the color
+            for region in ('grip', 'limb_z', 'power_z', 'limb_power_z'):
+                component_colors[regions[region]] = REGION_COLORS[region]
+        else:
+            # Every arrow vertex moves with the length and tip edits
+            component_colors = np.tile(ARROW_COLOR, (len(original), 1))
+        colors.append(component_colors)
+    return colors
@@ -0,0 +1,55 @@
+import numpy as np
+import Constants as co
+
+
+class WarmStartIndex:
+    """In-memory nearest-neighbour index of solved optimizations, used to warm-start new solves.
+
+    Each entry maps (targets, lock flags, profile, palm size) to the solved bow parameters.
+    Features are scaled to comparable ranges; profiles are one-hot encoded with a large
+    weight so that a solution from another profile is only used when none exist for this one.
+    """
+
+    PROFILES = ['Child', 'Adult', 'Professional']
+
+    def __init__(self, max_entries=co.WARM_START_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.features = []
+        self.solutions = []
+        self.tree = None
+
+    def feature_vector(self, target_speed, target_force, lock_speed, lock_force, profile, palm_size):
+        """Scaled feature vector for one optimization request"""
+        profile_one_hot = [co.WARM_START_PROFILE_WEIGHT * (profile == name) for name in self.PROFILES]
+        return np.array([
+            target_speed / (co.MAX_LAUNCH_SPEED - co.MIN_LAUNCH_SPEED),
+            target_force / (co.MAX_DRAW_FORCE - co.MIN_DRAW_FORCE),
+            float(lock_speed),
+            float(lock_force),
+            palm_size / (co.MAX_PALM_SIZE - co.MIN_PALM_SIZE),
+            *profile_one_hot
+        ], dtype=np.float64)
+
+    def add(self, features, solution):
+        """Record a solved optimization; the tree is rebuilt lazily on the next query"""
+        self.features.append(np.asarray(features, dtype=np.float64))
+        self.solutions.append(np.asarray(solution, dtype=np.float64))
+        if len(self.features) > self.max_entries:
+            # Drop the oldest entries first
+            del self.features[0]
+            del self.solutions[0]
+        self.tree = None
+
+    def query(self, features):
+        """Return (solution, distance) of the nearest solved request, or (None, None) when empty"""
+        if not self.features:
+            return None, None
+        if self.tree is None:
+            # Imported on first use to keep optimizer imports cheap
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(np.vstack(self.features))
+        distance, index = self.tree.query(features)
+        return self.solutions[index].copy(), float(distance)
+
+    def __len__(self):
+        return len(self.features)
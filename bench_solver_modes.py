@@ -0,0 +1,109 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import numpy as np
+from BowArrowOpt import BowArrowOptimizer
+import Constants as co
+
+
+def run_benchmark(model_path, speeds, forces, profiles):
+    """Solve every (profile, target, lock) combination with the penalty and constrained modes"""
+    optimizer = BowArrowOptimizer(model_path, use_cache=False)
+    lock_combinations = [(True, False), (False, True), (True, True)]
+    rows = []
+
+    for profile in profiles:
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer.set_user_profile(profile, co.DEFAULT_PALM_SIZE, 'Medium')
+        start = [optimizer.bow_thickness, optimizer.bow_curvature, optimizer.limb_stiffness, optimizer.grip_width]
+
+        for target_speed in speeds:
+            for target_force in forces:
+                for lock_speed, lock_force in lock_combinations:
+                    row = {
+                        'profile': profile,
+                        'target_speed': float(target_speed),
+                        'target_force': float(target_force),
+                        'lock_speed': lock_speed,
+                        'lock_force': lock_force
+                    }
+                    for mode in ('penalty', 'constrained'):
+                        solved = optimizer.solve_performance(target_speed, target_force, lock_speed, lock_force,
+                                                             initial_guess=start, mode=mode)
+                        errors = []
+                        if lock_speed:
+                            errors.append(abs(solved['launch_speed'] - target_speed) / target_speed)
+                        if lock_force:
+                            errors.append(abs(solved['draw_force'] - target_force) / target_force)
+                        row[mode] = {
+                            'status': solved['status'],
+                            'iterations': solved['iterations'],
+                            'function_evaluations': solved['function_evaluations'],
+                            'solve_seconds': solved['solve_seconds'],
+                            'locked_relative_error': max(errors)
+                        }
+                    rows.append(row)
+    return rows
+
+
+def summarize(rows):
+    """Compare the two modes on the requests the constrained mode reports as feasible"""
+    feasible = [row for row in rows if row['constrained']['status'] == 'solved']
+    summary = {
+        'requests': len(rows),
+        'feasible': len(feasible),
+        'infeasible': len(rows) - len(feasible)
+    }
+    for mode in ('penalty', 'constrained'):
+        if not feasible:
+            break
+        iterations = np.array([row[mode]['iterations'] for row in feasible])
+        evaluations = np.array([row[mode]['function_evaluations'] for row in feasible])
+        seconds = np.array([row[mode]['solve_seconds'] for row in feasible])
+        errors = np.array([row[mode]['locked_relative_error'] for row in feasible])
+        summary[mode] = {
+            'median_iterations': float(np.median(iterations)),
+            'median_function_evaluations': float(np.median(evaluations)),
+            'median_solve_ms': float(np.median(seconds) * 1000),
+            'median_locked_relative_error': float(np.median(errors)),
+            'max_locked_relative_error': float(np.max(errors))
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare penalty and hard-constraint solves of optimize_for_performance")
+    parser.add_argument('--model', default='models/Bow_Arrow_Combined.stl')
+    parser.add_argument('--steps', type=int, default=6, help="number of target values per metric")
+    parser.add_argument('--output', default=None, help="write per-request results and the summary as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Model file {args.model} does not exist.")
+        sys.exit(1)
+
+    speeds = np.linspace(co.MIN_LAUNCH_SPEED, co.MAX_LAUNCH_SPEED, args.steps)
+    forces = np.linspace(co.MIN_DRAW_FORCE, co.MAX_DRAW_FORCE, args.steps)
+    rows = run_benchmark(args.model, speeds, forces, ['Child', 'Adult', 'Professional'])
+    summary = summarize(rows)
+
+    print(f"Requests: {summary['requests']} ({summary['feasible']} feasible, {summary['infeasible']} infeasible)")
+    for mode in ('penalty', 'constrained'):
+        if mode in summary:
+            stats = summary[mode]
+            print(f"{mode:>12}: {stats['median_iterations']:.0f} iterations, "
+                  f"{stats['median_function_evaluations']:.0f} evaluations, "
+                  f"{stats['median_solve_ms']:.2f} ms, "
+                  f"locked error median {stats['median_locked_relative_error']:.2e} / max {stats['max_locked_relative_error']:.2e}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'requests': rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
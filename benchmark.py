@@ -0,0 +1,315 @@
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import trimesh
+from BowArrowOpt import BowArrowOptimizer
+from BlendShapes import BASIS_FACTORS
+from BeamAnalysis import measure_beams
+from BatchScoring import score_designs
+from PrintEstimate import estimate_print
+from Sensitivity import design_sensitivity, SCORE_STEPS
+from SessionReplay import load_session, replay_session, action_latencies
+from ViewMesh import component_view_arrays, part_colors
+from WarmStart import WarmStartIndex
+import Constants as co
+
+PROFILES = ['Child', 'Adult', 'Professional']
+# Largest difference from the finite differences of the unrounded model sensitivity_check accepts
+SENSITIVITY_TOLERANCE = 1e-2
+
+
+def default_models():
+    """Every STL in models/ plus the repo-root presets"""
+    return sorted(glob.glob('models/*.stl')) + sorted(glob.glob('*.stl'))
+
+
+def time_stage(function, repeats, warmup=1):
+    """Run function warmup + repeats times with stdout silenced; return the timed samples in ms"""
+    samples = []
+    for i in range(warmup + repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+    return samples
+
+
+def summarize(samples):
+    """Median and percentiles of a list of timings (ms)"""
+    samples = np.asarray(samples)
+    return {
+        'samples': len(samples),
+        'median_ms': float(np.median(samples)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'min_ms': float(np.min(samples)),
+        'max_ms': float(np.max(samples))
+    }
+
+
+def blend_shape_check(optimizer, samples=20, seed=0):
+    """Largest difference between the blend-shape basis and the reference deformation over random factors"""
+    rng = np.random.default_rng(seed)
+    basis = optimizer.deformation_basis()
+    errors = [basis.reference_error(dict(zip(BASIS_FACTORS[1:], rng.uniform(0.5, 1.5, len(BASIS_FACTORS) - 1))))
+              for _ in range(samples)]
+    return {'samples': samples, 'max_error_mm': float(max(errors))}
+
+
+def sensitivity_check(optimizer, samples=20, seed=0, step=1e-5):
+    """Launch speed and draw force columns of design_sensitivity() against central differences.
+
+    'max_error' compares them with the unrounded model the Jacobian differentiates (relative
+    step `step`); 'pipeline_max_error' with score_designs() at one spin box step, whose tip
+    diameter is rounded to 0.01 mm. Both are the largest absolute difference over random designs.
+    """
+    rng = np.random.default_rng(seed)
+    low, high = np.array(optimizer.parameter_bounds()).T
+    designs = low + (high - low) * rng.random((samples, 4))
+    palm_sizes = np.full(samples, optimizer.palm_size)
+    jacobian = design_sensitivity(optimizer, designs, palm_sizes)['jacobian'][:, :2, :4]
+
+    def unrounded(inputs):
+        thickness, curvature, stiffness, grip_width = inputs.T
+        mass = optimizer.design_arrow_mass(thickness, stiffness)
+        return np.stack([optimizer.estimate_launch_speed(thickness, curvature, stiffness, grip_width, mass),
+                         optimizer.estimate_draw_force(thickness, curvature, stiffness, grip_width)], axis=1)
+
+    def pipeline(inputs):
+        scores = score_designs(optimizer, *inputs.T, palm_sizes)
+        return np.stack([scores['launch_speed'], scores['draw_force']], axis=1)
+
+    errors = {}
+    for name, model, steps in (('max_error', unrounded, step * (high - low)), ('pipeline_max_error', pipeline, SCORE_STEPS[:4])):
+        differences = np.stack([(model(designs + offset) - model(designs - offset)) / (2.0 * h)
+                                for offset, h in zip(np.eye(4) * steps, steps)], axis=2)
+        errors[name] = float(np.abs(differences - jacobian).max())
+    return dict(samples=samples, **errors)
+
+
+def mesh_check_times(optimizer, steps=5):
+    """Time (ms) of the mesh check apply_geometry_update runs after each of a few thickness steps"""
+    samples = []
+    checked_faces = []
+    start_thickness = optimizer.bow_thickness
+    for i in range(steps + 1):
+        optimizer.bow_thickness = start_thickness + (i % 2) * co.SINGLE_STEP_DISTANCE
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer.apply_geometry_update()
+        report = optimizer.mesh_validity
+        if i:
+            samples.append(report['seconds'] * 1000)
+            checked_faces.append(report['checked_faces'])
+    return dict(summarize(samples), checked_faces=int(np.median(checked_faces)))
+
+
+def view_component_arrays(optimizer):
+    """What BowArrowUI.refresh_model_items builds after a full update: the part colors and the
+    full and LOD view arrays of every component"""
+    colors = part_colors(optimizer.component_roles(), optimizer.components)
+    lods = optimizer.level_of_detail()
+    for index, component in enumerate(optimizer.components):
+        component_view_arrays(component, colors[index])
+        component_view_arrays(component, colors[index], lods[index])
+
+
+def benchmark_model(model_path, repeats, export_dir):
+    """Time every pipeline stage on one model; stages the model does not support are marked skipped"""
+    stages = {}
+    stages['load'] = summarize(time_stage(lambda: trimesh.load(model_path), repeats))
+    mesh = trimesh.load(model_path)
+    stages['split'] = summarize(time_stage(lambda: mesh.split(), repeats))
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer = BowArrowOptimizer(model_path, use_cache=False)
+    except ValueError as e:
+        stages['optimizer'] = {'skipped': str(e)}
+        return stages
+
+    bows = [i for i, role in enumerate(optimizer.roles) if role == 'bow']
+    if bows:
+        bow = optimizer.components[bows[0]]
+        stages['beam_analysis'] = summarize(
+            time_stage(lambda: measure_beams(optimizer.original_vertices[bows[0]], bow.faces), repeats))
+    else:
+        stages['beam_analysis'] = {'skipped': "no bow component"}
+    stages['apply_geometry_update'] = summarize(time_stage(optimizer.apply_geometry_update, repeats))
+    stages['preview_vertices'] = summarize(time_stage(lambda: optimizer.preview_vertices(draw_fraction=0.5), repeats))
+    stages['blend_shape_check'] = blend_shape_check(optimizer)
+    stages['sensitivity_check'] = sensitivity_check(optimizer)
+    stages['mesh_validity'] = mesh_check_times(optimizer)
+    # At the layer height get_print_settings() recommends for the default parameters
+    stages['print_estimate'] = summarize(time_stage(
+        lambda: estimate_print([component.vertices for component in optimizer.components],
+                               [component.faces for component in optimizer.components], 0.16), repeats))
+
+    for profile in PROFILES:
+        def optimize():
+            # Fresh warm-start index so every repeat is a cold solve
+            optimizer.warm_start_index = WarmStartIndex()
+            optimizer.set_user_profile(profile, None, 'Medium')
+            targets = optimizer.user_profiles[profile]
+            optimizer.optimize_for_performance(targets['max_launch_speed'], targets['max_draw_force'],
+                                               lock_speed=True, lock_force=True)
+        stages[f'optimize_for_performance[{profile}]'] = summarize(time_stage(optimize, repeats))
+
+    stages['simulate_performance'] = summarize(time_stage(optimizer.simulate_performance, repeats))
+
+    export_path = os.path.join(export_dir, os.path.basename(model_path))
+    stages['export_model'] = summarize(time_stage(lambda: optimizer.export_model(export_path, allow_invalid=True),
+                                                  repeats))
+
+    stages['view_component_arrays'] = summarize(time_stage(lambda: view_component_arrays(optimizer), repeats))
+    return stages
+
+
+def meta(repeats):
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'trimesh': trimesh.__version__,
+        'platform': platform.platform(),
+        'repeats': repeats
+    }
+
+
+def run(models, repeats):
+    results = {}
+    with tempfile.TemporaryDirectory() as export_dir:
+        for model_path in models:
+            print(f"Benchmarking {model_path} ...")
+            results[model_path] = benchmark_model(model_path, repeats, export_dir)
+    return {'meta': meta(repeats), 'results': results}
+
+
+def replay(session_paths, repeats, model_path=None, use_cache=False):
+    """Replay recorded UI sessions; every step becomes a stage ('003 apply_parameters') so compare() works on the result"""
+    results = {}
+    actions = {}
+    for session_path in session_paths:
+        print(f"Replaying {session_path} ...")
+        session = load_session(session_path)
+        runs = [replay_session(session, model_path, use_cache) for _ in range(repeats)]
+        results[session_path] = {
+            f"{index:03d} {step['action']}": dict(summarize([steps[index]['seconds'] * 1000 for steps in runs]),
+                                                  recorded_ms=(step['recorded_seconds'] * 1000
+                                                               if step['recorded_seconds'] is not None else None))
+            for index, step in enumerate(runs[0])
+        }
+        actions[session_path] = action_latencies([step for steps in runs for step in steps])
+    return {'meta': meta(repeats), 'results': results, 'actions': actions}
+
+
+def compare(baseline, candidate, threshold):
+    """Stages whose median slowed down by more than threshold (fraction); returns (rows, regressions)"""
+    rows = []
+    regressions = 0
+    for model, stages in candidate['results'].items():
+        for stage, stats in stages.items():
+            old = baseline['results'].get(model, {}).get(stage)
+            if 'median_ms' not in stats or not old or 'median_ms' not in old:
+                continue
+            change = stats['median_ms'] / old['median_ms'] - 1.0 if old['median_ms'] > 0 else 0.0
+            regressed = change > threshold
+            regressions += regressed
+            rows.append((model, stage, old['median_ms'], stats['median_ms'], change, regressed))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bow pipeline stages on the bundled STL models")
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help="time every stage and write JSON results")
+    run_parser.add_argument('models', nargs='*', help="STL files (default: models/*.stl and ./*.stl)")
+    run_parser.add_argument('--repeats', type=int, default=10)
+    run_parser.add_argument('--output', default='benchmark_results.json')
+
+    replay_parser = subparsers.add_parser('replay', help="replay recorded UI sessions and time every action")
+    replay_parser.add_argument('sessions', nargs='+', help="session JSON files (Profiling > Record Session)")
+    replay_parser.add_argument('--model', help="STL file to replay on (default: the session's model)")
+    replay_parser.add_argument('--repeats', type=int, default=3)
+    replay_parser.add_argument('--use-cache', action='store_true',
+                               help="read optimizations from the result cache instead of solving them again")
+    replay_parser.add_argument('--output', default='replay_results.json')
+
+    compare_parser = subparsers.add_parser('compare', help="flag regressions between two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="relative median slowdown counted as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        rows, regressions = compare(baseline, candidate, args.threshold)
+        for model, stage, old, new, change, regressed in rows:
+            flag = "REGRESSION" if regressed else ""
+            print(f"{model:<45} {stage:<40} {old:9.2f} -> {new:9.2f} ms {change * 100:+7.1f}% {flag}")
+        print(f"{regressions} regression(s) above {args.threshold * 100:.0f}%")
+        sys.exit(1 if regressions else 0)
+
+    if args.command == 'replay':
+        report = replay(args.sessions, args.repeats, args.model, args.use_cache)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        for session_path, stages in report['results'].items():
+            print(session_path)
+            for stage, stats in stages.items():
+                recorded = f"  (UI {stats['recorded_ms']:8.2f} ms)" if stats['recorded_ms'] is not None else ""
+                print(f"  {stage:<30} median {stats['median_ms']:8.2f} ms  max {stats['max_ms']:8.2f} ms{recorded}")
+            for action, stats in report['actions'][session_path].items():
+                print(f"  {action:<30} {stats['count']:3d} x  total {stats['total_ms']:9.2f} ms  "
+                      f"median {stats['median_ms']:8.2f} ms")
+        print(f"Results written to {args.output}")
+        return
+
+    if args.command != 'run':
+        parser.print_help()
+        sys.exit(1)
+
+    models = args.models or default_models()
+    report = run(models, args.repeats)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    mismatches = 0
+    for model, stages in report['results'].items():
+        print(model)
+        for stage, stats in stages.items():
+            if 'skipped' in stats:
+                print(f"  {stage:<40} skipped: {stats['skipped']}")
+            elif 'max_error_mm' in stats:
+                # The blend-shape preview must reproduce apply_geometry_update exactly
+                mismatch = stats['max_error_mm'] > 0
+                mismatches += mismatch
+                print(f"  {stage:<40} max error {stats['max_error_mm']:.3g} mm {'MISMATCH' if mismatch else ''}")
+            elif 'pipeline_max_error' in stats:
+                mismatch = stats['max_error'] > SENSITIVITY_TOLERANCE
+                mismatches += mismatch
+                print(f"  {stage:<40} max error {stats['max_error']:.3g} (pipeline {stats['pipeline_max_error']:.3g}) "
+                      f"{'MISMATCH' if mismatch else ''}")
+            else:
+                print(f"  {stage:<40} median {stats['median_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms")
+    print(f"Results written to {args.output}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+from BowArrowOpt import BowArrowOptimizer
+from Calibration import MEASUREMENT_COLUMNS, load_measurements, fit_constants, write_constants_profile
+import Constants as co
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit Young's modulus or the empirical corrective factor to measured draw forces and launch speeds")
+    parser.add_argument('measurements', help=f"CSV with columns: {', '.join(MEASUREMENT_COLUMNS)}")
+    parser.add_argument('--fit', choices=['empirical_corrective_factor', 'youngs_modulus'],
+                        default='empirical_corrective_factor',
+                        help="constant to solve for; the other one is kept at its current value")
+    parser.add_argument('--model', default='models/Bow_Arrow_Combined.stl')
+    parser.add_argument('--output-dir', default=co.CONSTANTS_PROFILE_DIR)
+    parser.add_argument('--dry-run', action='store_true', help="print the fit without writing a profile")
+    args = parser.parse_args()
+
+    for path in (args.measurements, args.model):
+        if not os.path.exists(path):
+            print(f"Input file {path} does not exist.")
+            sys.exit(1)
+
+    # Fit relative to the hand-tuned defaults, not a previously written profile
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = BowArrowOptimizer(args.model, use_cache=False, constants_profile=False)
+    result = fit_constants(optimizer, load_measurements(args.measurements), fit=args.fit)
+
+    print(f"Fitted {result['fitted']} from {result['force_measurements']} force and "
+          f"{result['speed_measurements']} speed measurements")
+    print(f"  Young's modulus:             {result['youngs_modulus']:.6f} N/mm^2")
+    print(f"  Empirical corrective factor: {result['empirical_corrective_factor']:.3f}")
+    if result['force_rms_relative_error'] is not None:
+        print(f"  Draw force RMS error:   {result['force_rms_relative_error'] * 100:.1f}%")
+    if result['speed_rms_relative_error'] is not None:
+        print(f"  Launch speed RMS error: {result['speed_rms_relative_error'] * 100:.1f}%")
+    for row in result['per_model']:
+        print(f"  {row['model']}: force {row['predicted_draw_force']:.2f} N (measured {row['measured_draw_force']}), "
+              f"speed {row['predicted_launch_speed']:.2f} m/s (measured {row['measured_launch_speed']})")
+
+    if not args.dry_run:
+        path = write_constants_profile(result, args.measurements, args.output_dir)
+        print(f"Constants profile written to {path}")
+
+
+if __name__ == '__main__':
+    main()
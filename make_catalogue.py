@@ -0,0 +1,67 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from BowArrowOpt import BowArrowOptimizer
+from VariantFactory import load_matrix, build_catalogue
+from MeshValidity import describe_defects
+from PrintEstimate import rank_by_print_cost
+import Constants as co
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Optimize, deform and export every profile x palm size x speed (x target) cell of a matrix")
+    parser.add_argument('matrix', nargs='?', default='catalogue_matrix.json', help="matrix JSON file")
+    parser.add_argument('--model', help="STL model (default: the matrix's 'model')")
+    parser.add_argument('--output-dir', default=co.VARIANT_OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="rebuild cells whose inputs are unchanged")
+    parser.add_argument('--allow-invalid', action='store_true',
+                        help="export cells whose mesh fails the self-intersection / inverted-face / wall-thickness check")
+    parser.add_argument('--rank-by', choices=['print_time_s', 'filament_m', 'mass'],
+                        help="list the cells by estimated print cost, cheapest first (default: matrix order)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.matrix):
+        print(f"Matrix file {args.matrix} does not exist.")
+        sys.exit(1)
+    matrix = load_matrix(args.matrix)
+    matrix['model'] = args.model or matrix.get('model') or 'models/Bow_Arrow_Combined.stl'
+    if not os.path.exists(matrix['model']):
+        print(f"Model file {matrix['model']} does not exist.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = BowArrowOptimizer(matrix['model'])
+    manifest = build_catalogue(optimizer, matrix, args.output_dir, workers=args.workers, force=args.force,
+                               allow_invalid=args.allow_invalid)
+    elapsed = time.perf_counter() - start
+
+    entries = manifest['variants']
+    if args.rank_by:
+        entries = rank_by_print_cost(entries, args.rank_by)
+    for entry in entries:
+        if entry['status'] == 'infeasible':
+            print(f"  {entry['name']:<45} infeasible, not exported")
+            continue
+        if entry['status'] == 'invalid':
+            print(f"  {entry['name']:<45} mesh check failed, not exported: {describe_defects(entry['validity'])}")
+            continue
+        state = "unchanged" if entry['reused'] else "generated"
+        print(f"  {entry['name']:<45} {state:<10} performance {entry['scores']['performance_score']:5.1f}  "
+              f"{entry['print_settings']['material']}, {entry['print_settings']['layer_height']}, "
+              f"infill {entry['print_settings']['infill']}, "
+              f"{entry['print_estimate']['print_time_s'] / 60:.0f} min, {entry['print_estimate']['filament_m']:.2f} m")
+        if not entry['validity']['valid']:
+            print(f"  {'':<45} mesh check failed: {describe_defects(entry['validity'])}")
+    print(f"{manifest['generated']} generated ({manifest['failed_check']} failing the mesh check), "
+          f"{manifest['rejected']} rejected, {manifest['reused']} unchanged in {elapsed:.1f} s; "
+          f"manifest written to {os.path.join(args.output_dir, co.VARIANT_MANIFEST_NAME)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from BowArrowOpt import BowArrowOptimizer
+from PopulationStudy import population_study
+import Constants as co
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Choose the fewest grip sizes that fit a target share of each profile's sampled users")
+    parser.add_argument('model', nargs='?', default='models/Bow_Arrow_Combined.stl')
+    parser.add_argument('--profiles', nargs='+', choices=list(co.POPULATION_PALM_SIZES))
+    parser.add_argument('--users', type=int, default=co.POPULATION_SIZE, help="sampled users per profile")
+    parser.add_argument('--coverage', type=float, default=co.POPULATION_COVERAGE,
+                        help="fraction of the users the sizes must fit (default %(default)s)")
+    parser.add_argument('--max-sizes', type=int, default=co.POPULATION_MAX_SIZES)
+    parser.add_argument('--no-optimize', action='store_true',
+                        help="study each profile's default parameters instead of its optimized design")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Model file {args.model} does not exist.")
+        sys.exit(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = BowArrowOptimizer(args.model)
+    results = population_study(optimizer, args.profiles, args.users, args.coverage, not args.no_optimize,
+                               args.seed, max_sizes=args.max_sizes)
+
+    for result in results:
+        design = result['design']
+        low, median, high = result['palm_size_percentiles']
+        print(f"{result['profile']}: {result['users']} users, palm {low:.0f}-{high:.0f} mm (median {median:.0f}); "
+              f"design thickness {design['bow_thickness']:.2f} mm, curvature {design['bow_curvature']:.2f}, "
+              f"stiffness {design['limb_stiffness']:.2f}  ({result['seconds'] * 1000:.0f} ms)")
+        sizes = ", ".join(f"{width:g} mm" for width in result['grip_widths']) or "none"
+        status = "reached" if result['reached'] else "NOT reached"
+        print(f"  sizes {sizes}: fit {result['coverage'] * 100:.1f}% of users "
+              f"(target {result['coverage_target'] * 100:.0f}% {status})")
+        if not result['feasible_grip_widths']:
+            print(f"  no grip width keeps the draw force within {result['max_draw_force']:g} N with a safety score "
+                  f"of {co.POPULATION_MIN_SAFETY:g} (lowest draw force {result['lowest_draw_force']:.2f} N)")
+        for size in result['sizes']:
+            palms = size['palm_size_range']
+            palm_text = f"palm {palms[0]:.0f}-{palms[1]:.0f} mm" if palms else "no users"
+            print(f"  {size['grip_width']:5.1f} mm  {size['share'] * 100:5.1f}% of users ({palm_text}), "
+                  f"draw force {size['draw_force']:.2f} N, safety {size['safety_score']:.1f}")
+        if result['sizes']:
+            print("  comfort p5/p50/p95 " + "/".join(f"{value:.1f}" for value in result['comfort_percentiles']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
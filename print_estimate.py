@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import trimesh
+from PrintEstimate import estimate_print, validate_against_gcode
+import Constants as co
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate filament use and print time of STL files by slicing them, or check the estimate "
+                    "against the bundled Cura G-code files (leave-one-out)")
+    parser.add_argument('models', nargs='*', help="STL files to estimate (default: leave-one-out check against 3DPrint/*.gcode)")
+    parser.add_argument('--layer-height', type=float, default=co.PRINT_LAYER_HEIGHT, help="mm")
+    parser.add_argument('--infill', type=float, default=co.PRINT_INFILL, help="sparse infill fraction")
+    args = parser.parse_args()
+
+    if not args.models:
+        rows = validate_against_gcode()
+        for row in rows:
+            estimate = row['estimate']
+            print(f"{row['model']:<22} filament {estimate['filament_m']:6.3f} m (G-code {row['gcode_filament_m']:.3f} m, "
+                  f"{row['filament_error'] * 100:+5.1f}%)  time {estimate['print_time_s'] / 60:5.1f} min "
+                  f"(G-code {row['gcode_print_time_s'] / 60:.1f} min, {row['print_time_error'] * 100:+5.1f}%)  "
+                  f"{estimate['seconds'] * 1000:.0f} ms  (fitted to all: {row['fitted_filament_error'] * 100:+.1f}%, "
+                  f"{row['fitted_print_time_error'] * 100:+.1f}%)")
+        print("Held-out errors: each print is estimated with the constants calibrated on the other prints only")
+        return
+
+    for path in args.models:
+        if not os.path.exists(path):
+            print(f"Model file {path} does not exist.")
+            sys.exit(1)
+        components = trimesh.load(path).split()
+        estimate = estimate_print([component.vertices for component in components],
+                                  [component.faces for component in components], args.layer_height, args.infill)
+        print(f"{path:<30} {estimate['layers']} layers  filament {estimate['filament_m']:6.3f} m  "
+              f"{estimate['mass']:6.2f} g  time {estimate['print_time_s'] / 60:5.1f} min  "
+              f"{estimate['seconds'] * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
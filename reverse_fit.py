@@ -0,0 +1,45 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import trimesh
+from ShapeFit import ShapeFitter, bow_vertices
+import Constants as co
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recover bow thickness, curvature and grip width of STL files by fitting the base bow to them")
+    parser.add_argument('targets', nargs='*', help="STL files to fit (default: the ./*.stl presets)")
+    parser.add_argument('--base', default='models/Bow.stl', help="undeformed bow the targets were made from")
+    parser.add_argument('--workers', type=int, help="threads for KD-tree queries and refinement (default: one per CPU)")
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    targets = args.targets or sorted(glob.glob('*.stl'))
+    for path in [args.base] + targets:
+        if not os.path.exists(path):
+            print(f"Model file {path} does not exist.")
+            sys.exit(1)
+
+    fitter = ShapeFitter(bow_vertices(trimesh.load(args.base)), workers=args.workers)
+    results = {}
+    for path in targets:
+        result = fitter.fit(bow_vertices(trimesh.load(path)))
+        results[path] = result
+        parameters = result['parameters']
+        note = "" if result['matched'] else f"  (above {co.FIT_TOLERANCE_MM} mm: not a deformation of {args.base})"
+        print(f"{path:<30} thickness {parameters['bow_thickness']:6.2f} mm  curvature {parameters['bow_curvature']:6.3f}  "
+              f"grip width {parameters['grip_width']:6.2f} mm  chamfer {result['chamfer_mm']:.4f} mm  "
+              f"{result['seconds']:.1f} s{note}")
+    print("Limb stiffness only changes the force model, not the shape, so it cannot be recovered from an STL.")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'base': args.base, 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()